@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of conversion of XML files to dicts: the whole tree by `etree.fromstring` and
+`recursive_read_dict`, which was used before, against the streaming `iterparse` builder of `get_xml_data`.
+
+Time is measured in this process, peak RSS is measured in a fresh subprocess for every file and method
+(by `/proc`, so on Linux only).
+
+    python benchmarks/bench_dict_builder.py [--lots 20000] [--depth 190] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lxml import etree  # noqa: E402
+from gov.law import util  # noqa: E402
+from bench_tag_handlers import _make_xml  # noqa: E402
+
+
+_METHODS = ("recursive", "iterative")
+
+
+def _make_deep_xml(depth: int) -> bytes:
+    return ("<export><doc>" + "<a>" * depth + "1" + "</a>" * depth + "</doc></export>").encode("utf-8")
+
+
+def _make_files(lots: int, depth: int) -> dict:
+    return {
+        "notification": _make_xml(5),
+        "large": _make_xml(lots),
+        "deep": _make_deep_xml(depth),
+    }
+
+
+def _convert(method: str, xml: bytes):
+    limits = util.XMLLimits(max_size=len(xml), max_depth=1000, max_elements=10 ** 9)
+    if method == "recursive":
+        return util.recursive_read_dict(etree.fromstring(xml))
+
+    return util.get_xml_data(xml, limits=limits)
+
+
+def _measure(method: str, xml: bytes, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _convert(method, xml)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def _get_peak_rss() -> int:
+    """Peak RSS of this process in KB. `ru_maxrss` is not used, it is inherited from the parent process"""
+
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+
+    return 0
+
+
+def _child(args):
+    with open(args.file, "rb") as f:
+        xml = f.read()
+    before = _get_peak_rss()
+    _convert(args.child, xml)
+    print(_get_peak_rss() - before)
+
+
+def _measure_memory(path: str, method: str) -> int:
+    """Peak RSS growth in KB. The file is read from disk, so generation of data does not raise the peak"""
+
+    return int(subprocess.check_output([sys.executable, __file__, "--child", method, "--file", path]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lots", type=int, default=20000, help="Lots of the large file")
+    parser.add_argument("--depth", type=int, default=190, help="Nesting of the deep file")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats of measurement, the best one is reported")
+    parser.add_argument("--child", choices=_METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file, xml in _make_files(args.lots, args.depth).items():
+            path = os.path.join(tmp_dir, file + ".xml")
+            with open(path, "wb") as f:
+                f.write(xml)
+
+            print(f"{file}: {len(xml) / 1024:.0f} KB")
+            for method in _METHODS:
+                elapsed = _measure(method, xml, args.repeat)
+                memory = _measure_memory(path, method)
+                print(f"    {method:<10} {elapsed * 1000:10.2f} ms; peak RSS growth {memory / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
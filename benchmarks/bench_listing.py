@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of parsing of directory listings: splitting of LIST lines by spaces, which was used before,
+against the regex parser of LIST and the parser of MLSD.
+
+    python benchmarks/bench_listing.py [--lines 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime as dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gov.listing import parse_list_line, parse_mlsd_line  # noqa: E402
+
+
+def _generate_list_lines(count: int) -> list:
+    lines = ["total 8"]
+    for i in range(count):
+        name = f"notification_Moskva_2019{i % 12 + 1:02d}0100_2019{i % 12 + 1:02d}0200_{i:06d}.xml.zip"
+        if i % 2 == 0:
+            lines.append(f"-rw-r--r--    1 ftp      ftp      {1000 + i:>10} Jan {i % 28 + 1:02d} {i % 24:02d}:00 {name}")
+        else:
+            lines.append(f"-rw-r--r--    1 ftp      ftp      {1000 + i:>10} Jan {i % 28 + 1:02d}  2018 {name}")
+
+    return lines
+
+
+def _generate_mlsd_lines(count: int) -> list:
+    lines = ["type=cdir;modify=20190101000000; /fcs_regions/Moskva/notifications"]
+    for i in range(count):
+        name = f"notification_Moskva_2019{i % 12 + 1:02d}0100_2019{i % 12 + 1:02d}0200_{i:06d}.xml.zip"
+        lines.append(f"type=file;size={1000 + i};modify=201901{i % 28 + 1:02d}{i % 24:02d}0000;UNIX.mode=0644; {name}")
+
+    return lines
+
+
+def _parse_by_split(lines: list) -> int:
+    """The way listings were read before: no modification times, names with spaces are broken"""
+
+    size = 0
+    for item in map(str.split, lines):
+        if item[0][0] not in ("d", "t"):
+            size += int(item[4])
+
+    return size
+
+
+def _parse_list(lines: list) -> int:
+    now = dt.utcnow()
+    size = 0
+    for line in lines:
+        item = parse_list_line(line, now)
+        if item is not None and not item.is_dir:
+            size += item.size
+
+    return size
+
+
+def _parse_mlsd(lines: list) -> int:
+    size = 0
+    for line in lines:
+        item = parse_mlsd_line(line)
+        if item is not None and not item.is_dir:
+            size += item.size
+
+    return size
+
+
+def _measure(func, lines: list, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100000, help="Lines of listing")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats of measurement, the best one is reported")
+    args = parser.parse_args()
+
+    list_lines = _generate_list_lines(args.lines)
+    mlsd_lines = _generate_mlsd_lines(args.lines)
+    print(f"Lines: {args.lines}")
+
+    for title, func, lines in (("LIST, str.split", _parse_by_split, list_lines),
+                               ("LIST, regex", _parse_list, list_lines),
+                               ("MLSD", _parse_mlsd, mlsd_lines)):
+        elapsed = _measure(func, lines, args.repeat)
+        print(f"{title:<16} {elapsed:8.3f} s; {len(lines) / elapsed / 1000:8.0f}k lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of memory and iteration speed of listing entries: dicts, which were yielded by `Client` before,
+against `ArchiveEntry`.
+
+A listing of the whole tree is generated: every region has directories of months with archives.
+Lines of listing are split as `Client._list` does it, directory and region strings are shared as in `Client`.
+
+    python benchmarks/bench_listing_entries.py [--regions 86] [--months 60] [--archives 100] [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gov.purchases import ArchiveEntry  # noqa: E402
+
+
+def _generate_listing(regions: int, months: int, archives: int):
+    """Yield directory, region and split line of listing of every archive"""
+
+    for r in range(regions):
+        region = f"Region_{r:03d}_Resp"
+        for m in range(months):
+            directory = f"/fcs_regions/{region}/notifications/month_{m:03d}"
+            for a in range(archives):
+                line = (f"-rw-r--r-- 1 ftp ftp {1000 + a * 7} Jan 01 00:00 "
+                        f"notification_{region}_2019{m % 12 + 1:02d}0100_2019{m % 12 + 1:02d}0200_{a:03d}.xml.zip")
+                yield directory, region, line.split()
+
+
+def _build_dicts(listing) -> list:
+    entries = []
+    for folder, region, item in listing:
+        file = item.pop()
+        entries.append({
+            "full_name": folder + "/" + file,
+            "fname": file,
+            "fsize": int(item[4]),
+            "region": region,
+            "folder": "notifications",
+        })
+
+    return entries
+
+
+def _build_entries(listing) -> list:
+    return [ArchiveEntry(folder, item.pop(), int(item[4]), region, "notifications")
+            for folder, region, item in listing]
+
+
+def _iterate_dicts(entries: list) -> int:
+    size = 0
+    for entry in entries:
+        if entry["region"] != "" and entry["folder"] == "notifications":
+            size += entry["fsize"] + len(entry["fname"])
+
+    return size
+
+
+def _iterate_entries(entries: list) -> int:
+    size = 0
+    for entry in entries:
+        if entry.region != "" and entry.folder == "notifications":
+            size += entry.fsize + len(entry.fname)
+
+    return size
+
+
+def _measure_memory(build, args) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    entries = build(_generate_listing(args.regions, args.months, args.archives))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return entries, size
+
+
+def _measure_iteration(iterate, entries: list, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        iterate(entries)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regions", type=int, default=86, help="Count of regions")
+    parser.add_argument("--months", type=int, default=60, help="Directories of months in a region")
+    parser.add_argument("--archives", type=int, default=100, help="Archives in a directory of month")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats of iteration, the best one is reported")
+    args = parser.parse_args()
+
+    count = args.regions * args.months * args.archives
+    print(f"Entries: {count}")
+
+    for title, build, iterate in (("dict", _build_dicts, _iterate_dicts),
+                                  ("ArchiveEntry", _build_entries, _iterate_entries)):
+        entries, size = _measure_memory(build, args)
+        elapsed = _measure_iteration(iterate, entries, args.repeat)
+        print(f"{title:<14} {size / 1024 / 1024:8.1f} MB; {size / count:6.0f} B/entry; "
+              f"iteration {elapsed:.3f} s")
+        del entries
+
+
+if __name__ == "__main__":
+    main()
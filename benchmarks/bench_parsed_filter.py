@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the bloom filter of parsed archives: speed of checks of a listing and size of the filter
+against a set of `(name, size)` pairs. A check in DB is a round trip, about a millisecond.
+
+    python benchmarks/bench_parsed_filter.py [--archives 1000000] [--checks 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gov.db._bloom import BloomFilter  # noqa: E402
+
+
+def _name(i: int, prefix="notification") -> str:
+    return f"{prefix}_Moskva_2019{i % 12 + 1:02d}0100_2019{i % 12 + 1:02d}0200_{i:07d}.xml.zip"
+
+
+def _get_set_size(pairs: set) -> int:
+    size = sys.getsizeof(pairs)
+    for pair in pairs:
+        size += sys.getsizeof(pair) + sys.getsizeof(pair[0]) + sys.getsizeof(pair[1])
+
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--archives", type=int, default=1000000, help="Parsed archives in the filter")
+    parser.add_argument("--checks", type=int, default=100000, help="Checked archives of listing")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Rate of false positives")
+    args = parser.parse_args()
+
+    bloom = BloomFilter(args.archives, args.error_rate)
+    start = time.perf_counter()
+    for i in range(args.archives):
+        bloom.add(_name(i), 1000 + i)
+    print(f"Build of filter of {args.archives} archives: {time.perf_counter() - start:.1f} s; "
+          f"{len(bloom._bits) / 1024 / 1024:.1f} MB, {bloom.hashes_count} hashes")
+
+    pairs = {(_name(i), 1000 + i) for i in range(args.archives)}
+    print(f"Set of pairs: {_get_set_size(pairs) / 1024 / 1024:.1f} MB")
+
+    start = time.perf_counter()
+    hits = sum(bloom.contains(_name(i), 1000 + i) for i in range(args.checks))
+    elapsed = time.perf_counter() - start
+    print(f"Parsed archives: {hits}/{args.checks} hits, {elapsed / args.checks * 1e6:.2f} us per check")
+
+    start = time.perf_counter()
+    false_positives = sum(bloom.contains(_name(i, "protocol"), 1000 + i) for i in range(args.checks))
+    elapsed = time.perf_counter() - start
+    print(f"New archives: {false_positives / args.checks:.4f} false positive rate, "
+          f"{elapsed / args.checks * 1e6:.2f} us per check")
+
+
+if __name__ == "__main__":
+    main()
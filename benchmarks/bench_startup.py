@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of import time and start of parse workers.
+
+    python benchmarks/bench_startup.py [--repeat 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_ROOT = os.path.join(os.path.dirname(__file__), "..")
+_MODULES = ("gov.law.util", "gov.log", "gov.db", "gov.law.readers", "gov.app")
+_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://localhost/oos/export/1"><fcsContractSign><id>1</id></fcsContractSign></export>"""
+
+
+def _bench_import(module: str, repeat: int) -> float:
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=_ROOT, check=True)
+        elapsed.append(time.perf_counter() - start)
+
+    return min(elapsed)
+
+
+def _parse(raw_xml):
+    from gov.law import util
+
+    return util.get_xml_data(raw_xml)
+
+
+def _bench_workers(workers: int) -> float:
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        pool.map(_parse, [_XML] * workers)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement")
+    parser.add_argument("--workers", type=int, default=4, help="Spawned parse workers")
+    args = parser.parse_args()
+
+    baseline = _bench_import("sys", args.repeat)
+    print(f"{'interpreter':<16}: {baseline * 1000:7.1f} ms")
+    for module in _MODULES:
+        print(f"{module:<16}: {(_bench_import(module, args.repeat) - baseline) * 1000:7.1f} ms")
+
+    print(f"spawn {args.workers} parse workers: {_bench_workers(args.workers) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of reading of all XML files of archives by `zipfile.ZipFile`, by `MmapZipFile`
+and by `MmapZipFile` with a pool of inflating threads.
+
+Regional archives can be given by `--archive`, otherwise an archive of generated notifications is created
+in a temporary directory. Files are read several times, so the archive is in page cache for both readers.
+
+    python benchmarks/bench_zip.py [--archive notification_Moskva_2019010100_2019020100_001.xml.zip ...]
+                                   [--members 20000] [--threads 4] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gov.law._zip import MmapZipFile, inflate_ahead  # noqa: E402
+
+
+_NOTIFICATION = """<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:oos="http://zakupki.gov.ru/oos/types/1">
+<fcsNotificationEF schemeVersion="8.2">
+    <oos:purchaseNumber>{number:019d}</oos:purchaseNumber>
+    <oos:purchaseObjectInfo>Поставка товаров для нужд учреждения {number}</oos:purchaseObjectInfo>
+    <oos:lot><oos:maxPrice>{number}.50</oos:maxPrice>{padding}</oos:lot>
+</fcsNotificationEF>
+</export>
+"""
+
+
+def _generate_archive(path: str, members: int):
+    padding = "<oos:customerRequirement><oos:deliveryPlace>Москва</oos:deliveryPlace></oos:customerRequirement>" * 40
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for i in range(members):
+            zip_file.writestr(f"fcsNotificationEF_{i:019d}_{i}.xml",
+                              _NOTIFICATION.format(number=i, padding=padding))
+
+
+def _read_by_zipfile(path: str) -> int:
+    """The way archives were read before"""
+
+    size = 0
+    with zipfile.ZipFile(path, "r") as zip_file:
+        for entry in zip_file.infolist():
+            if entry.filename.endswith(".xml"):
+                with zip_file.open(entry.filename, "r") as f:
+                    size += len(f.read())
+
+    return size
+
+
+def _read_by_mmap(path: str) -> int:
+    size = 0
+    with MmapZipFile(path) as zip_file:
+        for entry in zip_file.infolist():
+            if entry.filename.endswith(".xml"):
+                size += len(zip_file.read(entry))
+
+    return size
+
+
+def _read_by_mmap_threads(threads: int):
+    def read(path: str) -> int:
+        size = 0
+        with MmapZipFile(path) as zip_file:
+            entries = [(entry,) for entry in zip_file.infolist() if entry.filename.endswith(".xml")]
+            for _, data in inflate_ahead(zip_file, entries, threads):
+                size += len(data)
+
+        return size
+
+    return read
+
+
+def _measure(func, archives: list, repeat: int) -> tuple:
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = sum(func(path) for path in archives)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--archive", type=str, action="append", help="Archive to read. Can be given several times")
+    parser.add_argument("--members", type=int, default=20000, help="Files in generated archive")
+    parser.add_argument("--threads", type=int, default=4, help="Threads of inflate_ahead")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats of measurement, the best one is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archives = args.archive
+        if not archives:
+            archives = [os.path.join(tmp_dir, "notification_Moskva_2019010100_2019020100_001.xml.zip")]
+            _generate_archive(archives[0], args.members)
+
+        total = sum(os.path.getsize(path) for path in archives)
+        print(f"Archives: {len(archives)}; compressed size: {total / 1024 / 1024:.1f} MB")
+
+        readers = (
+            ("zipfile.ZipFile", _read_by_zipfile),
+            ("MmapZipFile", _read_by_mmap),
+            (f"MmapZipFile, {args.threads} threads", _read_by_mmap_threads(args.threads)),
+        )
+        for title, func in readers:
+            elapsed, size = _measure(func, archives, args.repeat)
+            print(f"{title:<26} {elapsed:8.3f} s; {size / elapsed / 1024 / 1024:8.1f} MB/s of XML")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,220 @@
 
 import os
 import signal
-from datetime import datetime as dt
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime as dt, timedelta
 from enum import Enum
-from .log import get_logger
-from .purchases import Client
+from .log import get_logger, configure_logging
+from .purchases import ArchiveEntry, Client, TokenBucket, AIMDController, LISTING_AUTO, DEFAULT_TIMEOUT, \
+    DEFAULT_SERVER_TZ
 from .db import DBClient, FileStatus as DBFileStatus
-from .law.readers import FFLReaders
-from .config import conf
+from .law.readers import Readers
+from .config import get_config, set_config
 from .util import get_archive_date
 from .errors import EmptyValueError
+from .progress import Progress, format_snapshot, start_monitoring
 
 
 class _ArchiveStatus(Enum):
     ARCHIVE_EXISTS_BUT_NOT_PARSED = 1
     ARCHIVE_EXISTS_BUT_SIZE_DIFFERENT = 2
+    ARCHIVE_EXISTS_BUT_MODIFIED = 3
 
 
-_NOTIFICATIONS_FOLDER = "notifications"
-_PROTOCOLS_FOLDER = "protocols"
+_DEFAULT_PREFETCH_DEPTH = 1
+# a directory is remembered as read only if it has not been changed for this time,
+# so archives which are added during the same minute are not lost. LIST gives times without seconds
+_DIRECTORY_SETTLE_TIME = timedelta(minutes=10)
+# files can be republished in place without change of modification time of their directory,
+# so read directories are listed again after this time
+_DEFAULT_RECHECK_INTERVAL = 24 * 60 * 60
+
+
+class _DirectoryProgress():
+    """Counters of archives of directories which are up to date: parsed early or handled successfully.
+    Archives are counted by the thread of downloads and by the main thread.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, directory: str):
+        with self._lock:
+            self._counts[directory] = self._counts.get(directory, 0) + 1
+
+    def get(self, directory: str) -> int:
+        with self._lock:
+            return self._counts.get(directory, 0)
+
+
+class _DownloadSessions():
+    """FTP sessions which download archives in parallel.
+
+    Every thread of the pool has its own session, it is opened on the first download of the thread.
+    Count of sessions which transfer data at once is limited by `AIMDController` of the clients.
+
+    Args:
+        create_client (callable): It opens a new session, `Client`.
+        max_sessions (int): Count of threads and sessions.
+    """
+
+    def __init__(self, create_client, max_sessions: int):
+        self._create_client = create_client
+        self._executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="download")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._clients = []
+
+    def submit(self, download, entry: ArchiveEntry):
+        """Run `download(entry, client)` by a session of the pool.
+
+        Returns:
+            Future: Result of download.
+        """
+
+        return self._executor.submit(lambda: download(entry, self._get_client()))
+
+    def _get_client(self) -> Client:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._create_client()
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+
+        return client
+
+    def close(self):
+        """Wait for downloads and close sessions"""
+
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+
+
+class _Prefetcher():
+    """Runs iterator of downloaded archives in a background thread and keeps its results in a buffer.
+
+    The iterator takes a place in the buffer by `acquire` before download of an archive, the consumer
+    gives it back by `release` after the archive has been handled. There can be at most `depth` archives
+    ahead of the handled one and their total size is limited by `max_bytes`. One archive is always
+    allowed, even if it is larger than the limit.
+
+    Args:
+        depth (int): Count of archives which can be downloaded ahead.
+        max_bytes (int): Limit of total size of downloaded archives. 0 means no limit.
+    """
+
+    def __init__(self, depth: int, max_bytes: int):
+        self._depth = depth
+        self._max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._items = deque()
+        self._count = 0
+        self._bytes = 0
+        self._is_done = False
+        self._is_stopped = False
+        self._error = None
+        self._thread = None
+
+    def start(self, iterable):
+        self._thread = threading.Thread(target=self._run, args=(iterable,), name="prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self, iterable):
+        try:
+            for item in iterable:
+                with self._cond:
+                    self._items.append(item)
+                    self._cond.notify_all()
+                    if self._is_stopped:
+                        break
+        except BaseException as e:
+            self._error = e
+        finally:
+            with self._cond:
+                self._is_done = True
+                self._cond.notify_all()
+
+    def _has_place(self, size: int) -> bool:
+        # the handled archive is counted too, so there is one more place than depth
+        if self._count > self._depth:
+            return False
+
+        return self._max_bytes <= 0 or self._bytes == 0 or self._bytes + size <= self._max_bytes
+
+    def acquire(self, size: int, block=True) -> bool:
+        """Take a place for archive of the size. Waits until there is a place.
+
+        Args:
+            size (int): Size of archive.
+            block (bool, optional): Wait for a place. Defaults to True.
+
+        Returns:
+            bool: False if prefetching has been stopped or there is no place and `block` is False.
+        """
+
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: self._is_stopped or self._has_place(size))
+            if self._is_stopped or not self._has_place(size):
+                return False
+
+            self._count += 1
+            self._bytes += size
+
+        return True
+
+    def release(self, size: int):
+        with self._cond:
+            self._count -= 1
+            self._bytes -= size
+            self._cond.notify_all()
+
+    @property
+    def queued(self) -> int:
+        """Count of downloaded archives which wait for handling"""
+
+        with self._cond:
+            return len(self._items)
+
+    def __iter__(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._items) > 0 or self._is_done)
+                if len(self._items) > 0:
+                    item = self._items.popleft()
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+
+            yield item
+
+    def stop(self) -> list:
+        """Stop prefetching and wait for the thread.
+
+        Returns:
+            list: Items which have not been consumed.
+        """
+
+        with self._cond:
+            self._is_stopped = True
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+
+        return items
 
 
 class _GracefulKiller():
@@ -34,44 +230,50 @@ class _GracefulKiller():
         signal.signal(signal.SIGTERM, self.exit_gracefully)
 
     def exit_gracefully(self, signum, frame):
-        self.log.info(f"Got signal {signum}; Try to finish work gracefully")
+        self.log.info("Got signal %s; Try to finish work gracefully", signum)
         self.kill_now = True
 
 
 class _Application():
     """The main application class"""
 
-    def __init__(self):
+    def __init__(self, config=None):
         self.log = get_logger(__name__)
-        self.db = DBClient()
-        self._archives = {}
+        self._conf = config if config is not None else get_config()
+        self.db = DBClient(self._conf)
+        self.db.check_connection()
         self._client = None
+        self._downloads = None
+        self._rate_limiter = TokenBucket.from_config(self._conf)
+        self._controller = AIMDController.from_config(self._conf)
 
         self._check_tmp_folder()
 
-        self._folder_name = conf("app.server_folder_name")
-        self._law_number = conf("app.law_number")
-        self.log.info(f"Server folder name is '{self._folder_name}'")
+        self._targets = self._conf("app.targets") or [
+            [self._conf("app.law_number"), self._conf("app.server_folder_name")]]
+        self._law_number = None
+        # completely read directories of the current law and progress of their archives
+        self._folders = {}
+        self._directory_progress = _DirectoryProgress()
+        self._recheck_interval = self._get_recheck_interval()
+        self.log.info("Server folders are %s", ", ".join(f"{law}:{folder}" for law, folder in self._targets))
 
         self.killer = _GracefulKiller()
-        self._ffl = FFLReaders(self.killer)
-        if self._folder_name == _NOTIFICATIONS_FOLDER:
-            self._ffl_reader = self._ffl.notifications
-        else:
-            self._ffl_reader = self._ffl.protocols
+        self._progress = Progress()
+        self._readers = Readers(self.killer, self._conf, self._progress)
 
     def _check_tmp_folder(self):
-        tmp_folder: str = conf("app.tmp_folder")
+        tmp_folder: str = self._conf("app.tmp_folder")
         if not tmp_folder:
             raise EmptyValueError("The value of 'tmp_folder' in config cannot be empty")
         elif not os.path.exists(tmp_folder):
             raise FileNotFoundError(tmp_folder)
 
-    def _has_archive(self, finfo: dict) -> bool:
+    def _has_archive(self, entry: ArchiveEntry) -> bool:
         """Checking, is there already information about this archive or no.
 
         Args:
-            finfo (dict): A dict with archive data.
+            entry (ArchiveEntry): Archive on FTP server. Status of archive in DB is kept in the entry.
 
         Returns:
             bool: Result of checking.
@@ -81,158 +283,398 @@ class _Application():
         # There can be situation, when an information about the file there is in DB and
         # this file was read and parsed, but metadata between this file and file from FTP are different.
         # In this case we should update data in DB.
-        arch_status = self.db.get_archive_status(finfo["fname"], finfo["fsize"])
-
-        key = finfo["full_name"]
+        arch_status = self.db.get_archive_status(entry.fname, entry.fsize, self._law_number, entry.folder,
+                                                 entry.modified_on)
 
         if arch_status == DBFileStatus.FILE_DOES_NOT_EXIST:
             return False
         elif arch_status == DBFileStatus.FILE_EXISTS:
             return True
         elif arch_status == DBFileStatus.FILE_EXISTS_BUT_NOT_PARSED:
-            self._archives[key] = _ArchiveStatus.ARCHIVE_EXISTS_BUT_NOT_PARSED
+            entry.status = _ArchiveStatus.ARCHIVE_EXISTS_BUT_NOT_PARSED
             return True
         elif arch_status == DBFileStatus.FILE_EXISTS_BUT_SIZE_DIFFERENT:
-            self._archives[key] = _ArchiveStatus.ARCHIVE_EXISTS_BUT_SIZE_DIFFERENT
+            entry.status = _ArchiveStatus.ARCHIVE_EXISTS_BUT_SIZE_DIFFERENT
+            return True
+        elif arch_status == DBFileStatus.FILE_EXISTS_BUT_MODIFIED:
+            entry.status = _ArchiveStatus.ARCHIVE_EXISTS_BUT_MODIFIED
             return True
 
         return False
 
-    def _need_to_update_archive(self, finfo: dict) -> bool:
-        return finfo["full_name"] in self._archives
+    def _need_to_update_archive(self, entry: ArchiveEntry) -> bool:
+        return entry.status is not None
 
-    def _need_to_clean_old_files(self, finfo: dict) -> bool:
-        key = finfo["full_name"]
-        return key in self._archives and self._archives[key] == _ArchiveStatus.ARCHIVE_EXISTS_BUT_SIZE_DIFFERENT
+    def _need_to_clean_old_files(self, entry: ArchiveEntry) -> bool:
+        return entry.status in (_ArchiveStatus.ARCHIVE_EXISTS_BUT_SIZE_DIFFERENT,
+                                _ArchiveStatus.ARCHIVE_EXISTS_BUT_MODIFIED)
 
-    def _archive_was_not_parsed(self, finfo: dict) -> bool:
-        key = finfo["full_name"]
-        return key in self._archives and self._archives[key] == _ArchiveStatus.ARCHIVE_EXISTS_BUT_NOT_PARSED
+    def _archive_was_not_parsed(self, entry: ArchiveEntry) -> bool:
+        return entry.status == _ArchiveStatus.ARCHIVE_EXISTS_BUT_NOT_PARSED
 
-    def _handle_archive(self, finfo: dict) -> bool:
+    def _handle_archive(self, entry: ArchiveEntry) -> bool:
         """Work with downloaded archive. After handling the file is removed.
 
         Args:
-            finfo (dict): Information about archive file.
+            entry (ArchiveEntry): Information about archive file.
 
         Returns:
-            bool: Work result. If True - all fine, otherwise - an error has been occured.
+            bool: Work result. If True - all fine, None - reading has been interrupted by signal,
+                otherwise - an error has been occured.
         """
 
-        self.log.info(f"Archive file: {finfo['fname']}; Size: {finfo['fsize']}")
-        cfg = conf("app")
-        zip_file = cfg["tmp_folder"] + "/" + finfo["fname"]
-        read_archive_result = self._ffl_reader.handle_archive(zip_file, finfo["id"])
+        self.log.info("Archive file: %s; Size: %s", entry.fname, entry.fsize, extra={"stage": "archive"})
+        zip_file = self._get_archive_path(entry)
+
+        # dispatch the archive to the reader of its folder
+        reader = self._readers.get(self._law_number, entry.folder)
+        read_archive_result = reader.handle_archive(zip_file, entry.id, entry.region)
 
         # clean after work
+        self._remove_archive_file(entry)
+
+        return read_archive_result
+
+    def _get_archive_path(self, entry: ArchiveEntry) -> str:
+        return self._conf("app.tmp_folder") + "/" + entry.fname
+
+    def _remove_archive_file(self, entry: ArchiveEntry):
+        zip_file = self._get_archive_path(entry)
         if os.path.isfile(zip_file):
-            self.log.debug(f"Remove file {zip_file}")
+            self.log.debug("Remove file %s", zip_file)
             os.remove(zip_file)
 
             self.log.debug("Clean archive info")
-            if finfo["full_name"] in self._archives:
-                del self._archives[finfo["full_name"]]
-
-        return read_archive_result
+            entry.status = None
 
     def run(self):
-        """General method. Downloads, reads and handles archives"""
-
-        self._client = Client(
-            conf("app.ftp_server"),
-            download_dir=conf("app.tmp_folder"),
-            looking_folder=self._folder_name)
+        """General method. Downloads, reads and handles archives of every folder.
+        The limit of archives is shared by all folders.
+        """
 
         has_limit, limit = self._get_limit()
-        self.log.info(f"Limit of archives is {limit if limit is not None else 'Unlimited'}")
-        count, error_count = self._read_from_client(has_limit, limit)
+        self.log.info("Limit of archives is %s", limit if limit is not None else "Unlimited")
+        services = start_monitoring(self._progress, self._conf)
+        try:
+            count, error_count = self._read_targets(has_limit, limit)
+        finally:
+            for service in services:
+                service.stop()
+
+        self.log.info("Total were handled: %s archive(s)", count)
+        self.log.info("Total were obtained %s errors", error_count)
+        self.log.info("Progress: %s", format_snapshot(self._progress.snapshot()))
+
+    def _read_targets(self, has_limit: bool, limit):
+        """Read folders of all laws.
+
+        Returns:
+            tuple: Count of handled archives and count of errors.
+        """
+
+        count = error_count = 0
+        for law_number, folder_names in self._get_folders_by_law():
+            if self.killer.kill_now or (has_limit and count >= limit):
+                break
+
+            # all folders of the law are read by one walk over regions
+            self.log.info("Read folders %s of law %s", ", ".join(folder_names), law_number)
+            self._law_number = law_number
+            self._folders = self.db.get_folders(law_number)
+            self._directory_progress = _DirectoryProgress()
+            # one session lists directories, archives are downloaded by sessions of the pool
+            self._client = self._create_client(
+                law_number,
+                looking_folder=folder_names,
+                listing=self._conf("app.ftp.listing") or LISTING_AUTO,
+                skip_directory=self._is_unchanged_directory)
+            self._downloads = _DownloadSessions(
+                lambda law_number=law_number: self._create_client(
+                    law_number, rate_limiter=self._rate_limiter, controller=self._controller),
+                self._controller.max_sessions)
+            self._progress.set_listing(lambda client=self._client: (client.regions_listed, client.regions_count))
+
+            try:
+                law_count, law_error_count = self._read_from_client(
+                    has_limit, limit - count if has_limit else None)
+                # archives of an interrupted walk may be read partially
+                if not self.killer.kill_now:
+                    self._save_completed_directories()
+            finally:
+                self._downloads.close()
+                self._client.close()
+                self.db.save_parsed_filter()
+            count += law_count
+            error_count += law_error_count
+
+        return count, error_count
+
+    def _create_client(self, law_number: str, **kwargs) -> Client:
+        """Open a session on FTP server for the law"""
+
+        return Client(
+            self._conf("app.ftp_server"),
+            download_dir=self._conf("app.tmp_folder"),
+            law_number=law_number,
+            timeout=float(self._conf("app.ftp.timeout") or DEFAULT_TIMEOUT),
+            server_tz=self._conf("app.ftp.server_tz") or DEFAULT_SERVER_TZ,
+            **kwargs)
+
+    def _get_recheck_interval(self):
+        """Time after which a read directory is listed again, `app.ftp.recheck_interval` seconds. 0 is never"""
+
+        interval = self._conf("app.ftp.recheck_interval")
+        interval = int(interval) if interval is not None else _DEFAULT_RECHECK_INTERVAL
+
+        return timedelta(seconds=interval) if interval > 0 else None
+
+    def _is_unchanged_directory(self, path: str, modified_on: dt) -> bool:
+        """Has the directory been read completely, not been changed and been checked recently"""
+
+        stored = self._folders.get(path)
+        if stored is None:
+            return False
+
+        stored_on, checked_on = stored
+        if modified_on > stored_on:
+            return False
+
+        return self._recheck_interval is None or checked_on > dt.utcnow() - self._recheck_interval
+
+    def _save_completed_directories(self):
+        """Remember directories whose all archives have been read and are up to date.
+        They are not read again while their modification time is the same and the check is recent.
+        """
+
+        settled_on = dt.utcnow() - _DIRECTORY_SETTLE_TIME
+        folders = {}
+        for path, (modified_on, count) in self._client.completed_directories.items():
+            if modified_on <= settled_on and self._directory_progress.get(path) == count \
+                    and not self._is_unchanged_directory(path, modified_on):
+                folders[path] = modified_on
+
+        self.db.set_folders(self._law_number, folders)
+
+    def _get_folders_by_law(self) -> list:
+        """Group folders of targets by law. FTP directories differ for laws, so every law has its own walk"""
 
-        self.log.info(f"Total were handled: {count} archive(s)")
-        self.log.info(f"Total were obtained {error_count} errors")
+        folders_by_law = {}
+        for law_number, folder_name in self._targets:
+            folders_by_law.setdefault(law_number, []).append(folder_name)
+
+        return list(folders_by_law.items())
 
     def _read_from_client(self, has_limit: bool, limit):
         count = error_count = 0
+        depth, max_bytes = self._get_prefetch_settings()
 
-        for fdict in self._client.read():
+        if depth == 0:
+            jobs = self._iter_downloaded_archives(has_limit, limit)
+            prefetcher = None
+        else:
+            # archives are downloaded by a separate thread while the current one is handled
+            prefetcher = _Prefetcher(depth, max_bytes)
+            prefetcher.start(self._iter_downloaded_archives(has_limit, limit, prefetcher))
+            self._progress.set_queue("prefetch", lambda: prefetcher.queued)
+            jobs = prefetcher
 
-            # got signal from system or user. Abort any actions.
-            if self.killer.kill_now:
-                self.log.info("Abort reading archives from server because of interrupt signal")
-                break
+        try:
+            for job in jobs:
+                count += 1
+                # an interrupted archive (None) is read again next time, so its directory is not complete
+                result = self._process_archive(job)
+                if result is False:
+                    error_count += 1
+                    self._progress.add(archives_failed=1, bytes_done=job["entry"].fsize)
+                elif result:
+                    self._directory_progress.add(job["entry"].directory)
+                    self._progress.add(archives_done=1, bytes_done=job["entry"].fsize)
+
+                if prefetcher is not None:
+                    prefetcher.release(job["entry"].fsize)
+
+                # got signal from system or user. Abort any actions.
+                if self.killer.kill_now:
+                    self.log.info("Abort reading archives from server because of interrupt signal")
+                    break
+        finally:
+            if prefetcher is not None:
+                self._progress.set_queue("prefetch", None)
+                for job in prefetcher.stop():
+                    self._remove_archive_file(job["entry"])
+
+        return count, error_count
+
+    def _get_prefetch_settings(self):
+        """Count of archives which are downloaded ahead and limit of their total size in bytes. 0 is no limit"""
 
-            # invoke filters
-            if self._skip_archive_by_region_filter(fdict["region"]):
-                continue
+        depth = self._conf("app.prefetch.depth")
+        max_bytes = self._conf("app.prefetch.max_bytes")
 
-            if self._skip_archive_by_date_filter(fdict['fname']):
-                continue
+        return int(depth) if depth is not None else _DEFAULT_PREFETCH_DEPTH, int(max_bytes or 0)
 
-            archive_id = None
-            need_to_touch_archive = need_to_update_archive_size = False
+    def _iter_downloaded_archives(self, has_limit: bool, limit, budget=None):
+        """Read archives from server, skip archives by filters and already parsed ones and download the rest.
 
-            if self._has_archive(fdict):
-                # we already have this parsed archive. Just skip it.
-                if not self._need_to_update_archive(fdict):
-                    self.log.debug(f"The file {fdict['fname']} had been parsed early. Skip them.")
+        Args:
+            has_limit (bool): Is there limit of archives.
+            limit (int): Limit of archives.
+            budget (_Prefetcher, optional): Budget of downloaded archives. Defaults to None.
+
+        Yields:
+            dict: Job of archive with info about archive in `entry`, result of download in `downloaded`.
+                Jobs are yielded in order of listing.
+        """
+
+        # archives are downloaded ahead in parallel only within the budget of prefetching
+        window = self._controller.max_sessions if budget is not None else 1
+        pending = deque()
+        count = 0
+        try:
+            for entry in self._client.read():
+                if self.killer.kill_now:
+                    break
+
+                job = self._prepare_archive(entry)
+                if job is None:
+                    self._progress.add(archives_skipped=1)
                     continue
 
-                # we have non parsed archive or size of archive is different.
-                # Anyway we should reparse archive again.
-                archive = self.db.get_archive(fdict["fname"], fdict["fsize"])
-                archive_id = archive.id
-                self.log.info(f"Found archive wih ID {archive_id}")
-                if self._need_to_clean_old_files(fdict):
-                    self.db.delete_archive_files(archive_id)
-                    need_to_update_archive_size = True
-                elif self._archive_was_not_parsed(fdict):
-                    need_to_touch_archive = True
-
-            count += 1
-            if not self._download(fdict):
-                error_count += 1
-                continue
-
-            if archive_id is None:
-                archive_id = self.db.add_archive(
-                    fname=fdict["fname"],
-                    fsize=fdict["fsize"],
-                    law_number=self._law_number, folder_name=self._folder_name)
-
-            fdict["id"] = archive_id
-            if self._handle_archive(fdict) is False:
-                error_count += 1
-            elif need_to_touch_archive:
-                self.db.update_archive(
-                    archive_id,
-                    reason="Archive was upload early, but not parsed",
-                    updated_on=dt.utcnow()
-                )
-            elif need_to_update_archive_size:
-                self.db.update_archive(
-                    archive_id,
-                    size=fdict["fsize"],
-                    updated_on=dt.utcnow(),
-                    reason="Archive was upload and parsed early, but current size of file is different"
-                )
-
-            if has_limit and count >= limit:
-                break
+                count += 1
+                self._progress.add(archives_listed=1, bytes_listed=entry.fsize)
+                if budget is not None:
+                    # places of archives downloaded ahead are released only after they are handled
+                    while len(pending) > 0 and not budget.acquire(entry.fsize, block=False):
+                        yield self._pop_downloaded(pending)
+                    if len(pending) == 0 and not budget.acquire(entry.fsize):
+                        break
+
+                pending.append((job, self._downloads.submit(self._download, entry)))
+                while len(pending) >= window:
+                    yield self._pop_downloaded(pending)
+
+                if has_limit and count >= limit:
+                    break
+
+            while len(pending) > 0 and not self.killer.kill_now:
+                yield self._pop_downloaded(pending)
+        finally:
+            # archives which have not been yielded are not handled
+            for job, download in pending:
+                download.result()
+                self._remove_archive_file(job["entry"])
+
+    @staticmethod
+    def _pop_downloaded(pending: deque) -> dict:
+        """Wait for download of the first archive of the queue"""
+
+        job, download = pending.popleft()
+        job["downloaded"] = download.result()
+        return job
+
+    def _prepare_archive(self, entry: ArchiveEntry):
+        """Check filters and status of archive in DB.
 
-        return count, error_count
+        Returns:
+            dict: Job of archive or None if the archive has to be skipped.
+        """
+
+        # invoke filters
+        if self._skip_archive_by_region_filter(entry.region):
+            return None
+
+        if self._skip_archive_by_date_filter(entry.fname):
+            return None
+
+        job = {"entry": entry, "archive_id": None, "need_to_touch_archive": False,
+               "need_to_update_archive_size": False, "need_to_update_modification": False}
+
+        if self._has_archive(entry):
+            # we already have this parsed archive. Just skip it.
+            if not self._need_to_update_archive(entry):
+                self.log.debug("The file %s had been parsed early. Skip them.", entry.fname,
+                               extra={"stage": "skip_archive"})
+                self._directory_progress.add(entry.directory)
+                return None
+
+            # we have non parsed archive or size of archive is different.
+            # Anyway we should reparse archive again.
+            archive = self.db.get_archive(entry.fname, entry.fsize)
+            job["archive_id"] = archive.id
+            self.log.info("Found archive wih ID %s", archive.id)
+            if self._need_to_clean_old_files(entry):
+                self.db.delete_archive_files(archive.id)
+                if entry.status == _ArchiveStatus.ARCHIVE_EXISTS_BUT_MODIFIED:
+                    job["need_to_update_modification"] = True
+                else:
+                    job["need_to_update_archive_size"] = True
+            elif self._archive_was_not_parsed(entry):
+                job["need_to_touch_archive"] = True
+
+        return job
+
+    def _process_archive(self, job: dict) -> bool:
+        """Register downloaded archive in DB and handle it.
+
+        Returns:
+            bool: Work result. If True - all fine, None - reading has been interrupted by signal,
+                otherwise - an error has been occured.
+        """
 
-    def _download(self, finfo: dict) -> bool:
+        entry = job["entry"]
+        if not job["downloaded"]:
+            self._remove_archive_file(entry)
+            return False
+
+        archive_id = job["archive_id"]
+        if archive_id is None:
+            archive_id = self.db.add_archive(
+                fname=entry.fname,
+                fsize=entry.fsize,
+                law_number=self._law_number, folder_name=entry.folder,
+                modified_on=entry.modified_on)
+
+        entry.id = archive_id
+        result = self._handle_archive(entry)
+        if result is None or result is False:
+            return result
+        elif job["need_to_touch_archive"]:
+            self.db.update_archive(
+                archive_id,
+                reason="Archive was upload early, but not parsed",
+                updated_on=dt.utcnow()
+            )
+        elif job["need_to_update_archive_size"]:
+            self.db.update_archive(
+                archive_id,
+                size=entry.fsize,
+                updated_on=dt.utcnow(),
+                reason="Archive was upload and parsed early, but current size of file is different"
+            )
+        elif job["need_to_update_modification"]:
+            self.db.update_archive(
+                archive_id,
+                modified_on=entry.modified_on,
+                updated_on=dt.utcnow(),
+                reason="Archive was upload and parsed early, but it has been modified on server"
+            )
+
+        return True
+
+    def _download(self, entry: ArchiveEntry, client: Client) -> bool:
         try:
-            self._client.download(finfo["full_name"], finfo["fname"])
+            client.download(entry.full_name, entry.fname)
         except Exception as e:
-            # TODO: here we should catch exception "time is over" and reconnect to server
-            self.log.error(f"Error to download archive: {e}")
+            # lost connection has been already repeated by client, so it is something else
+            self.log.error("Error to download archive: %s", e)
             self.log.info("Try to next iteration")
             return False
 
+        self._progress.add(bytes_downloaded=entry.fsize)
         return True
 
     def _get_limit(self):
-        limit = conf("app.limit_archives")
+        limit = self._conf("app.limit_archives")
         has_limit = limit != 0
         if not has_limit:
             limit = None
@@ -240,7 +682,7 @@ class _Application():
         return has_limit, limit
 
     def _skip_archive_by_region_filter(self, region) -> bool:
-        f = conf("app.filters")
+        f = self._conf("app.filters")
 
         if f.has_region_filter:
             if f.filter_region(region) and f.is_positive_region_match:
@@ -248,19 +690,19 @@ class _Application():
             elif not f.filter_region(region) and f.is_negative_region_match:
                 return False
             else:
-                self.log.info(f"Skip region {region} due to region filter")
+                self.log.info("Skip region %s due to region filter", region)
                 self._client.set_region_skipped(region)
                 return True
 
         return False
 
     def _skip_archive_by_date_filter(self, archive_name: str) -> bool:
-        f = conf("app.filters")
+        f = self._conf("app.filters")
 
         if f.has_date_filter:
             date, error = get_archive_date(archive_name)
             if error is not None:
-                self.log.error(f"Got error during parse name of archive: {error}")
+                self.log.error("Got error during parse name of archive: %s", error)
                 return False
 
             if f.filter_date(date) and f.is_positive_date_match:
@@ -268,18 +710,24 @@ class _Application():
             elif not f.filter_date(date) and f.is_negative_date_match:
                 return False
             else:
-                self.log.info(f"Skip the archive {archive_name} due to date filter")
+                self.log.info("Skip the archive %s due to date filter", archive_name, extra={"stage": "skip_archive"})
                 return True
 
         return False
 
 
-def run():
+def run(config=None):
+    """Entry point. Config is loaded from command line arguments if it is not given"""
+
+    config = config if config is not None else get_config()
+    set_config(config)
+    configure_logging(config)
+
     log = get_logger(__name__)
     log.info("Init work")
     log.debug("Create instance of Application")
 
-    app = _Application()
+    app = _Application(config)
     log.debug("Run")
     app.run()
     log.info("End of work")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""Fill projected fields of rows which were stored before the fields appeared"""
+
+from .log import get_logger, configure_logging
+from .config import get_config, set_config
+from .db import FortyFourthLawDB
+from .db.models import FFLNotificationsData, FFLProtocolsData
+from .law._ffl_readers import FortyFourthLawNotifications, FortyFourthLawProtocols
+from .util import get_archive_date, get_archive_region
+
+
+_BATCH_SIZE = 1000
+_FOLDERS = {
+    "notifications": (FortyFourthLawNotifications, FFLNotificationsData),
+    "protocols": (FortyFourthLawProtocols, FFLProtocolsData),
+}
+
+
+def backfill(db: FortyFourthLawDB, folder_name: str, config, batch_size=_BATCH_SIZE) -> int:
+    """Fill projected fields of all rows of the folder's data table.
+
+    Args:
+        db (FortyFourthLawDB): DB client.
+        folder_name (str): Folder name, `notifications` or `protocols`.
+        config (Config): Config.
+        batch_size (int, optional): Rows per batch. Defaults to 1000.
+
+    Returns:
+        int: Count of updated rows.
+    """
+
+    log = get_logger(__name__)
+    reader, table = _FOLDERS[folder_name]
+    columns = reader.get_projected_columns(config)
+    last_id = count = 0
+
+    while True:
+        rows = db.get_data_batch(table, last_id, batch_size)
+        if len(rows) == 0:
+            break
+
+        updated_rows = []
+        for row_id, data, xml_type, archive_name in rows:
+            fields = reader.project(xml_type, data, columns)
+            fields["region"], _ = get_archive_region(archive_name)
+            archive_date, _ = get_archive_date(archive_name)
+            fields["archive_date"] = archive_date.date() if archive_date is not None else None
+            fields["id"] = row_id
+            updated_rows.append(fields)
+
+        db.update_projected_fields(table, updated_rows)
+        last_id = rows[-1][0]
+        count += len(rows)
+        log.info("Updated %s row(s) of %s, last ID is %s", count, table.__tablename__, last_id)
+
+    return count
+
+
+def run(config=None):
+    config = config if config is not None else get_config()
+    set_config(config)
+    configure_logging(config)
+    log = get_logger(__name__)
+    folder_name = config("app.server_folder_name")
+    log.info("Fill projected fields of folder '%s'", folder_name)
+
+    count = backfill(FortyFourthLawDB(config), folder_name, config)
+    log.info("Total were updated: %s row(s)", count)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""Store of raw files in compressed packs.
+
+Files are compressed by zlib and appended to rolling pack files, e.g. `<root>/packs/<pack>.pack`,
+so millions of small XML files do not take millions of inodes and renames. A pack is closed and
+a new one is started when its size is above the limit. The key of file is its location,
+`<pack>:<offset>:<length>`, so the file is read by one seek without any index.
+
+Every file is stored once: a local SQLite index keeps keys by SHA-256 of bytes of files.
+Bytes are written as they are, without any decoding, so the stored file is identical to the original one.
+
+Keys of files stored one per file by older versions, hex SHA-256 digests of `<root>/ab/cd/<digest>.z`,
+are read as before.
+"""
+
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+_DEFAULT_COMPRESS_LEVEL = 6
+_DEFAULT_PACK_SIZE = 256 * 1024 * 1024
+_PACKS_FOLDER = "packs"
+_PACK_SUFFIX = ".pack"
+_INDEX_FILE = "index.sqlite"
+_BLOB_SUFFIX = ".z"
+_KEY_SEPARATOR = ":"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest BLOB PRIMARY KEY,
+    key TEXT NOT NULL
+);
+"""
+
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+class BlobStore():
+    """Local store of raw files in packs.
+
+    Packs and the index are opened on the first `put`, so a store which is only read does not write anything.
+
+    Args:
+        root (str): Root directory of the store. It is created if it does not exist.
+        compress_level (int, optional): Level of zlib compression. Defaults to 6.
+        pack_size (int, optional): Size of pack in bytes after which the next pack is started. Defaults to 256 MB.
+    """
+
+    def __init__(self, root: str, compress_level=_DEFAULT_COMPRESS_LEVEL, pack_size=_DEFAULT_PACK_SIZE):
+        self._root = root
+        self._compress_level = int(compress_level)
+        self._pack_size = int(pack_size)
+        self._lock = threading.Lock()
+        self._index = None
+        self._pack = None
+        self._pack_name = None
+        os.makedirs(os.path.join(root, _PACKS_FOLDER), exist_ok=True)
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @classmethod
+    def from_config(cls, config):
+        """Create store by `app.blob_store` of config.
+
+        Returns:
+            BlobStore: The store or None if it is not configured. Readers of all folders share one store
+                of a directory, so their files are appended to the same pack.
+        """
+
+        cfg = config("app.blob_store")
+        if not isinstance(cfg, dict) or not cfg.get("path"):
+            return None
+
+        with _shared_lock:
+            if cfg["path"] not in _shared_stores:
+                _shared_stores[cfg["path"]] = cls(cfg["path"], cfg.get("compress_level") or _DEFAULT_COMPRESS_LEVEL,
+                                                  cfg.get("pack_size") or _DEFAULT_PACK_SIZE)
+
+            return _shared_stores[cfg["path"]]
+
+    @staticmethod
+    def get_key(data: bytes) -> str:
+        """Hex SHA-256 of file. It is the key of files stored one per file by older versions"""
+
+        return hashlib.sha256(data).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        """Path to pack of the key or to file of a key of older versions"""
+
+        if _KEY_SEPARATOR in key:
+            return os.path.join(self._root, _PACKS_FOLDER, key.split(_KEY_SEPARATOR, 1)[0] + _PACK_SUFFIX)
+
+        return os.path.join(self._root, key[:2], key[2:4], key + _BLOB_SUFFIX)
+
+    def has(self, key: str) -> bool:
+        path = self.get_path(key)
+        if _KEY_SEPARATOR not in key:
+            return os.path.exists(path)
+
+        _, offset, length = key.split(_KEY_SEPARATOR)
+        return os.path.exists(path) and os.path.getsize(path) >= int(offset) + int(length)
+
+    def put(self, data: bytes) -> str:
+        """Store file. The same content is stored only once.
+
+        Args:
+            data (bytes): Raw file data.
+
+        Returns:
+            str: Key of stored file.
+        """
+
+        digest = hashlib.sha256(data).digest()
+        value = zlib.compress(data, self._compress_level)
+
+        with self._lock:
+            index = self._get_index()
+            row = index.execute("SELECT key FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is not None:
+                return row[0]
+
+            pack = self._get_pack()
+            offset = pack.tell()
+            pack.write(value)
+            # the file is readable by other processes, e.g. by workers of reparsing, before the pack is closed
+            pack.flush()
+
+            key = _KEY_SEPARATOR.join((self._pack_name, str(offset), str(len(value))))
+            index.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, key))
+
+        return key
+
+    def get(self, key: str) -> bytes:
+        """Get stored file.
+
+        Raises:
+            FileNotFoundError: There is no file with the key.
+        """
+
+        path = self.get_path(key)
+        if _KEY_SEPARATOR not in key:
+            with open(path, "rb") as f:
+                return zlib.decompress(f.read())
+
+        _, offset, length = key.split(_KEY_SEPARATOR)
+        with open(path, "rb") as f:
+            f.seek(int(offset))
+            value = f.read(int(length))
+
+        if len(value) != int(length):
+            raise FileNotFoundError(f"File {key} is beyond the end of its pack")
+
+        return zlib.decompress(value)
+
+    def close(self):
+        """Close the current pack and the index"""
+
+        with self._lock:
+            self._close_pack()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = sqlite3.connect(os.path.join(self._root, _INDEX_FILE), check_same_thread=False,
+                                          isolation_level=None, timeout=60)
+            self._index.execute("PRAGMA journal_mode=WAL")
+            self._index.executescript(_SCHEMA)
+
+        return self._index
+
+    def _get_pack(self):
+        if self._pack is not None and self._pack.tell() >= self._pack_size:
+            self._close_pack()
+
+        if self._pack is None:
+            # a pack is written by one store only, so processes which share the root do not mix their files
+            self._pack_name = f"{time.time_ns():x}-{os.getpid()}"
+            self._pack = open(os.path.join(self._root, _PACKS_FOLDER, self._pack_name + _PACK_SUFFIX), "ab")
+
+        return self._pack
+
+    def _close_pack(self):
+        if self._pack is None:
+            return
+
+        self._pack.flush()
+        os.fsync(self._pack.fileno())
+        self._pack.close()
+        self._pack = None
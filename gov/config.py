@@ -1,14 +1,15 @@
 
 # -*- coding: utf-8 -*-
 
-"""Config module"""
+"""Config module.
+
+Nothing is read during import. Config is loaded on the first call of `conf` or explicitly by `load_config`.
+An explicit `Config` object can be passed to classes or installed by `set_config`.
+"""
 
 
 import os
-import argparse
-import yaml
 from .errors import LostConfigError
-from .filters import parse_filter, get_help as filters_help
 
 
 _ENV_FILE_CONFIG_NAME = "APP_CONFIG_FILE"
@@ -23,19 +24,50 @@ _ARG_SERVER_MODE = "mode"
 _AVAILABLE_MODES = ("dev", "prod")
 _DEFAULT_APP_MODE = "dev"
 _DEFAULT_LAW_NUMBER = "44"
-_AVAILABLE_FOLDERS = ("protocols", "notifications")
+_ARG_TARGETS = "targets"
 _DEFAULT_LOG_LEVEL = "INFO"
 _DEFAULT_DB_ECHO = False
 _ARG_FILTER = "filters"
 
 
-_cached_config = {}
+_config = None
+
+
+class Config():
+    """Config container. Config object is callable with the same arguments as `conf`.
+
+    Args:
+        data (dict): Config data.
+    """
+
+    def __init__(self, data: dict):
+        self._data = data
 
+    def __call__(self, key=None):
+        if key is None:
+            return self._data
 
-def _load_conf():
-    """Load data from config file. Append extra parameters"""
+        return _get_conf_by_key(self._data, key)
 
-    args = _read_args()
+    def is_production(self) -> bool:
+        """Is it production mode or no"""
+
+        return self("app.mode") == "prod"
+
+
+def load_config(argv=None) -> Config:
+    """Load data from config file. Append extra parameters.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to None, `sys.argv` is used.
+
+    Returns:
+        Config: Loaded config.
+    """
+
+    import yaml
+
+    args = _read_args(argv)
 
     if _ENV_FILE_CONFIG_NAME in os.environ:
         cfg_file = os.environ[_ENV_FILE_CONFIG_NAME]
@@ -49,53 +81,55 @@ def _load_conf():
     if not os.path.exists(cfg_file):
         raise FileNotFoundError(cfg_file)
 
-    global _cached_config
     with open(cfg_file, "rt") as f:
-        _cached_config = yaml.load(f, Loader=yaml.BaseLoader)
+        cfg = yaml.load(f, Loader=yaml.BaseLoader)
 
-    _fill_extra_pros(args)
+    _fill_extra_pros(cfg, args)
 
-    return True
+    return Config(cfg)
 
 
-def _fill_extra_pros(args):
+def _fill_extra_pros(cfg: dict, args):
     """Add aditional keys to config"""
 
-    if args[_ARG_SERVER_FOLDER_NAME] not in _AVAILABLE_FOLDERS:
-        raise ValueError(f"{_ARG_SERVER_FOLDER_NAME} has to be in {[folder for folder in _AVAILABLE_FOLDERS]}")
-    _cached_config["app"][_ARG_SERVER_FOLDER_NAME] = args[_ARG_SERVER_FOLDER_NAME]
+    from .filters import parse_filter
+
+    # set law number
+    if args.get(_ARG_LAW_NUMBER) is not None:
+        cfg["app"][_ARG_LAW_NUMBER] = args[_ARG_LAW_NUMBER]
+    else:
+        cfg["app"][_ARG_LAW_NUMBER] = _DEFAULT_LAW_NUMBER
+
+    # set folders. The first one is kept in the old keys
+    targets = _parse_targets(args[_ARG_SERVER_FOLDER_NAME], cfg["app"][_ARG_LAW_NUMBER])
+    cfg["app"][_ARG_TARGETS] = targets
+    cfg["app"][_ARG_LAW_NUMBER], cfg["app"][_ARG_SERVER_FOLDER_NAME] = targets[0]
 
     # set work mode
-    _cached_config["app"][_ARG_SERVER_MODE] = _DEFAULT_APP_MODE
+    cfg["app"][_ARG_SERVER_MODE] = _DEFAULT_APP_MODE
 
     if _ENV_SERVER_MODE in os.environ and os.environ[_ENV_SERVER_MODE] in _AVAILABLE_MODES:
-        _cached_config["app"][_ARG_SERVER_MODE] = os.environ[_ENV_SERVER_MODE]
+        cfg["app"][_ARG_SERVER_MODE] = os.environ[_ENV_SERVER_MODE]
     elif _ARG_SERVER_MODE in args and args[_ARG_SERVER_MODE] in _AVAILABLE_MODES:
-        _cached_config["app"][_ARG_SERVER_MODE] = args[_ARG_SERVER_MODE]
+        cfg["app"][_ARG_SERVER_MODE] = args[_ARG_SERVER_MODE]
 
     # set limit archives
     if _ARG_LIMIT_ARCHIVES_NAME in args and type(
             args[_ARG_LIMIT_ARCHIVES_NAME]) is int and args[_ARG_LIMIT_ARCHIVES_NAME] > 0:
-        _cached_config["app"][_ARG_LIMIT_ARCHIVES_NAME] = args[_ARG_LIMIT_ARCHIVES_NAME]
-    else:
-        _cached_config["app"][_ARG_LIMIT_ARCHIVES_NAME] = 0
-
-    # set law number
-    if _ARG_LAW_NUMBER in args:
-        _cached_config["app"][_ARG_LAW_NUMBER] = args[_ARG_LAW_NUMBER]
+        cfg["app"][_ARG_LIMIT_ARCHIVES_NAME] = args[_ARG_LIMIT_ARCHIVES_NAME]
     else:
-        _cached_config["app"][_ARG_LAW_NUMBER] = _DEFAULT_LAW_NUMBER
+        cfg["app"][_ARG_LIMIT_ARCHIVES_NAME] = 0
 
     # set log parameters
-    if _cached_config["app"]["log"]["level"] is None:
-        _cached_config["app"]["log"]["level"] = _DEFAULT_LOG_LEVEL
+    if cfg["app"]["log"]["level"] is None:
+        cfg["app"]["log"]["level"] = _DEFAULT_LOG_LEVEL
 
     if _ENV_LOG_LEVEL in os.environ:
-        _cached_config["app"]["log"]["level"] = os.environ[_ENV_LOG_LEVEL]
+        cfg["app"]["log"]["level"] = os.environ[_ENV_LOG_LEVEL]
 
     # set DB echo mode
-    if _cached_config["db"]["echo"] is None or _cached_config["db"]["echo"] is not bool:
-        _cached_config["db"]["echo"] = _DEFAULT_DB_ECHO
+    if cfg["db"]["echo"] is None or cfg["db"]["echo"] is not bool:
+        cfg["db"]["echo"] = _DEFAULT_DB_ECHO
 
     # add filter
     if _ENV_FILTER in os.environ or _ARG_FILTER in args:
@@ -106,12 +140,50 @@ def _fill_extra_pros(args):
     if filter_str is None:
         filter_str = "[]"
 
-    _cached_config["app"]["filters"] = parse_filter(filter_str)
+    cfg["app"]["filters"] = parse_filter(filter_str)
 
 
-def _read_args() -> dict:
+def _parse_targets(value: str, default_law_number: str) -> list:
+    """Parse folders from command line.
+
+    Args:
+        value (str): Comma separated folders. Every folder can be given with law number, e.g. "223:purchaseNotice".
+        default_law_number (str): Law number of folders without law number.
+
+    Returns:
+        list: Pairs [law number, folder name].
+    """
+
+    from .law.readers import get_available_folders
+
+    targets = []
+    for item in str(value).split(","):
+        item = item.strip()
+        if item == "":
+            continue
+
+        law_number, _, folder_name = item.rpartition(":")
+        law_number = law_number or default_law_number
+        available_folders = get_available_folders(law_number)
+        if folder_name not in available_folders:
+            raise ValueError(f"{_ARG_SERVER_FOLDER_NAME} of law {law_number} has to be in {list(available_folders)}")
+
+        target = [law_number, folder_name]
+        if target not in targets:
+            targets.append(target)
+
+    if len(targets) == 0:
+        raise ValueError(f"{_ARG_SERVER_FOLDER_NAME} cannot be empty")
+
+    return targets
+
+
+def _read_args(argv=None) -> dict:
     """Read arguments from command line"""
 
+    import argparse
+    from .filters import get_help as filters_help
+
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-c", f"--{_ARG_FILE_CONFIG_NAME}", type=str, help="Config file")
@@ -121,9 +193,11 @@ def _read_args() -> dict:
     parser.add_argument("-F", f"--{_ARG_FILTER}", type=str, help=filters_help())
     requiredNamed = parser.add_argument_group('required named arguments')
     requiredNamed.add_argument("-f", f"--{_ARG_SERVER_FOLDER_NAME}", type=str,
-                               help=f"Name of folder on server", required=True)
+                               help="Name of folder on server. Several folders can be given separated by comma. "
+                               "A folder of another law is given as 'law:folder', e.g. '223:purchaseNotice'",
+                               required=True)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     return {
         _ARG_FILE_CONFIG_NAME: args.config_file,
@@ -135,14 +209,14 @@ def _read_args() -> dict:
     }
 
 
-def _get_conf_by_key(key):
+def _get_conf_by_key(cfg: dict, key):
     """Get config data by separated key"""
 
     splitted_keys = str(key).split(".")
     if len(splitted_keys) == 1:
-        return _get_conf(key)
+        return cfg.get(key)
 
-    first_item = _get_conf(splitted_keys[0])
+    first_item = cfg.get(splitted_keys[0])
     if first_item is None or not isinstance(first_item, dict):
         return None
 
@@ -166,11 +240,26 @@ def _get_conf_by_key(key):
     return returned_value
 
 
-def _get_conf(key: str):
-    if key in _cached_config:
-        return _cached_config[key]
+def set_config(config: Config):
+    """Install config which is returned by `conf`"""
+
+    global _config
+    _config = config
+
+
+def get_config() -> Config:
+    """Get installed config. Load it from command line arguments if it has not been loaded yet"""
+
+    if _config is None:
+        set_config(load_config())
 
-    return None
+    return _config
+
+
+def is_loaded() -> bool:
+    """Has config been loaded or installed"""
+
+    return _config is not None
 
 
 def conf(key=None):
@@ -185,16 +274,10 @@ def conf(key=None):
     If value for key was not found, `None` will be returned.
     """
 
-    if not _cached_config:
-        _load_conf()
-
-    if key is None:
-        return _cached_config
-
-    return _get_conf_by_key(key)
+    return get_config()(key)
 
 
 def is_production() -> bool:
     """Is it production mode or no"""
 
-    return conf("app.mode") == "prod"
+    return get_config().is_production()
@@ -5,4 +5,5 @@
 """
 
 from ._ffl import FortyFourthLawDB
+from ._ttl import TwoHundredTwentyThirdLawDB
 from ._db import DBClient, FileStatus
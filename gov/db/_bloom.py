@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""Bloom filter of parsed archives.
+
+The filter keeps `(name, size)` of archives which have been parsed, so most archives of a listing,
+historic ones, are checked in memory. An archive which is not in the filter has definitely not been parsed
+(or has been parsed by another crawler after the filter was synced, which only costs its download).
+An archive in the filter has probably been parsed, that is confirmed by DB unless the filter is trusted.
+
+The filter is kept in a file: a line of JSON with its parameters and the time of the last sync with DB,
+then bits of the filter.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+
+
+_FORMAT_VERSION = 1
+_DIGEST_SIZE = 16
+
+
+def _get_key(name: str, size: int) -> bytes:
+    return f"{name}\0{size}".encode("utf-8")
+
+
+class BloomFilter():
+    """Bloom filter of `(name, size)` pairs.
+
+    Positions of bits are given by double hashing of one BLAKE2 digest.
+
+    Args:
+        capacity (int): Expected count of items.
+        error_rate (float, optional): Rate of false positives at the expected count. Defaults to 0.01.
+    """
+
+    def __init__(self, capacity: int, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = float(error_rate)
+        self.bits_count = max(int(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2), 8)
+        self.hashes_count = max(int(round(self.bits_count / self.capacity * math.log(2))), 1)
+        self.count = 0
+        # time of the last sync with DB, see `DBClient.sync_parsed_filter`
+        self.synced_on = None
+        self._bits = bytearray((self.bits_count + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _get_positions(self, name: str, size: int):
+        digest = hashlib.blake2b(_get_key(name, size), digest_size=_DIGEST_SIZE).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.bits_count for i in range(self.hashes_count)]
+
+    def add(self, name: str, size: int):
+        positions = self._get_positions(name, size)
+        with self._lock:
+            bits = self._bits
+            is_new = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not bits[position >> 3] & mask:
+                    bits[position >> 3] |= mask
+                    is_new = True
+            # an item whose bits are all set already is not counted, so the same item is counted once
+            if is_new:
+                self.count += 1
+
+    def contains(self, name: str, size: int) -> bool:
+        """False if the pair has definitely not been added, True if it has probably been added"""
+
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._get_positions(name, size))
+
+    @property
+    def is_overfilled(self) -> bool:
+        """Count of items is above the capacity, so false positives are more often than the error rate"""
+
+        return self.count > self.capacity
+
+    def save(self, path: str):
+        """Write the filter to file. The file is replaced atomically"""
+
+        with self._lock:
+            header = {
+                "version": _FORMAT_VERSION,
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "count": self.count,
+                "synced_on": self.synced_on,
+            }
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(self._bits)
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Read the filter from file.
+
+        Returns:
+            BloomFilter: The filter or None if there is no file or it has been written by another version.
+        """
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != _FORMAT_VERSION:
+                return None
+
+            bloom = cls(header["capacity"], header["error_rate"])
+            bits = f.read()
+
+        if len(bits) != len(bloom._bits):
+            return None
+
+        bloom._bits[:] = bits
+        bloom.count = header["count"]
+        bloom.synced_on = header["synced_on"]
+
+        return bloom
+
+
+_shared_filters = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_filter(path: str, create):
+    """Filter of file which is shared by all DB clients of process.
+    The application checks archives by its client, readers mark them as parsed by their own clients.
+
+    Args:
+        path (str): Path to file of filter.
+        create (callable): It creates the filter if it has not been created yet.
+
+    Returns:
+        BloomFilter: The filter.
+    """
+
+    with _shared_lock:
+        if path not in _shared_filters:
+            _shared_filters[path] = create()
+
+        return _shared_filters[path]
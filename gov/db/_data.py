@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+from datetime import datetime as dt
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import distinct_on
+from ._db import DBClient
+from .models import Archive, ArchiveFile
+from ._partitions import AVAILABLE_PARTITION_KEYS, get_partition_ddl, get_partition_table
+
+
+# key of `Session.info` with partitions which have been created by the transaction of session
+_CREATED_PARTITIONS_KEY = "created_partitions"
+
+
+class DataDBClient(DBClient):
+    """A base class for working with data tables of a law.
+    Data tables of the law are listed in `_DATA_TABLES`.
+    """
+
+    _DATA_TABLES = ()
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self._partition_by = self._get_partition_by()
+        self._partitions = set()
+
+    def _get_partition_by(self):
+        partition_by = self._conf("db.partition_by")
+        if partition_by is None or partition_by == "none":
+            return None
+
+        if partition_by not in AVAILABLE_PARTITION_KEYS:
+            raise ValueError(f"db.partition_by has to be in {list(AVAILABLE_PARTITION_KEYS)}")
+
+        return partition_by
+
+    def bulk_insert_data(self, table, rows: list, session=None):
+        """Insert rows into a data table.
+        If tables are partitioned, rows are grouped by partition key and inserted straight into partitions.
+        Missing partitions are created. Rows without value of partition key go to the default partition.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            rows (list): Dicts with values of columns.
+            session (sessionmaker, optional): DB session. Defaults to None.
+        """
+
+        sess = session if session is not None else self._session()
+
+        if self._partition_by is None:
+            sess.execute(table.__table__.insert(), rows)
+        else:
+            partitions = {}
+            for row in rows:
+                partitions.setdefault(row.get(self._partition_by), []).append(row)
+
+            for value, partition_rows in partitions.items():
+                if value is None:
+                    sess.execute(table.__table__.insert(), partition_rows)
+                    continue
+
+                self._create_partition(table.__table__, value, session)
+                partition = get_partition_table(table.__table__, self._partition_by, value)
+                sess.execute(partition.insert(), partition_rows)
+
+        if session is None:
+            sess.commit()
+            sess.close()
+
+    def prepare_partition(self, table, fields: dict):
+        """Create partition of a data table for fields of archive by its own short transaction.
+        Partition key of archive is fixed, so readers create its partition before the transaction of archive
+        and the partitioned table is not locked by DDL while the archive is written.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            fields (dict): Fields of archive, `region` and `archive_date`.
+        """
+
+        if self._partition_by is None or fields.get(self._partition_by) is None:
+            return
+
+        self._create_partition(table.__table__, fields[self._partition_by])
+
+    def _create_partition(self, table, value, session=None):
+        """Create partition for value of partition key if it has not been created yet.
+        If session is given, the partition is created by its transaction: the transaction can already hold
+        a lock on the partitioned table, so DDL from another connection would wait for it forever.
+        Partitions of archives are created before by `prepare_partition`, so it is left for other rows.
+        """
+
+        key = (table.name, value)
+        if key in self._partitions:
+            return
+
+        sess = session if session is not None else self._session()
+        created = sess.info.setdefault(_CREATED_PARTITIONS_KEY, set())
+        if key in created:
+            return
+
+        self.log.debug("Create partition of %s for %s", table.name, value)
+        sess.execute(get_partition_ddl(table, self._partition_by, value))
+        created.add(key)
+        self._on_commit(sess, lambda: self._partitions.add(key))
+        if session is None:
+            sess.commit()
+            sess.close()
+
+    @contextmanager
+    def savepoint(self, session):
+        # partitions created inside of rolled back SAVEPOINT do not exist anymore
+        created = session.info.setdefault(_CREATED_PARTITIONS_KEY, set())
+        created_before = set(created)
+        try:
+            with super().savepoint(session):
+                yield
+        except BaseException:
+            created.intersection_update(created_before)
+            raise
+
+    def get_data_batch(self, table, last_id: int, limit: int) -> list:
+        """Get a batch of stored rows ordered by ID with info about their files and archives.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            last_id (int): Rows with ID greater than this one are returned.
+            limit (int): Size of batch.
+
+        Returns:
+            list: Tuples (ID, data, XML type, archive name).
+        """
+
+        sess = self._session()
+        rows = sess.query(table.id, table.data, ArchiveFile.xml_type, Archive.name) \
+            .join(ArchiveFile, ArchiveFile.id == table.archive_file_id) \
+            .join(Archive, Archive.id == ArchiveFile.archive_id) \
+            .filter(table.id > last_id) \
+            .order_by(table.id) \
+            .limit(limit) \
+            .all()
+        sess.close()
+
+        return rows
+
+    def get_export_batch(self, table, last_key: tuple, limit: int) -> list:
+        """Get a batch of stored rows ordered by file ID and ID.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            last_key (tuple): (file ID, ID) of the last row of previous batch. Rows after it are returned.
+            limit (int): Size of batch.
+
+        Returns:
+            list: Dicts with columns of rows and XML type of their files.
+        """
+
+        sess = self._session()
+        rows = sess.query(table.id, table.archive_file_id, table.data, ArchiveFile.xml_type, table.purchase_number,
+                          table.customer_inn, table.region, table.max_price, table.publish_date, table.archive_date) \
+            .join(ArchiveFile, ArchiveFile.id == table.archive_file_id) \
+            .filter(sa.tuple_(table.archive_file_id, table.id) > sa.tuple_(*last_key)) \
+            .order_by(table.archive_file_id, table.id) \
+            .limit(limit) \
+            .all()
+        sess.close()
+
+        return [row._asdict() for row in rows]
+
+    def get_archive_fields(self, table, archive_ids: list) -> dict:
+        """Get fields of archives, `region` and `archive_date`, from their stored rows.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            archive_ids (list): IDs of archives.
+
+        Returns:
+            dict: Fields by archive ID. Archives without rows are absent.
+        """
+
+        sess = self._session()
+        rows = sess.query(ArchiveFile.archive_id, table.region, table.archive_date) \
+            .join(ArchiveFile, ArchiveFile.id == table.archive_file_id) \
+            .filter(ArchiveFile.archive_id.in_(archive_ids)) \
+            .ext(distinct_on(ArchiveFile.archive_id)) \
+            .all()
+        sess.close()
+
+        return {archive_id: {"region": region, "archive_date": archive_date}
+                for archive_id, region, archive_date in rows}
+
+    def update_projected_fields(self, table, rows: list):
+        """Update projected fields of already stored rows.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            rows (list): Dicts with `id` and values of projected fields.
+        """
+
+        sess = self._session()
+        sess.bulk_update_mappings(table, rows)
+        sess.commit()
+        sess.close()
+
+    def replace_files_data(self, table, files: list, rows: list, quarantined=None):
+        """Replace data of files by one transaction. Old rows of files are deleted,
+        new rows are inserted and files are marked as parsed.
+
+        Args:
+            table: Table model, one of `_DATA_TABLES`.
+            files (list): Dicts with `id`, `xml_type` and `reason` of files.
+            rows (list): Dicts with values of columns of new rows.
+            quarantined (list, optional): Tuples (file ID, name of exceeded limit, reason) of files above limits.
+                Their old rows are deleted and they are kept in quarantine. Defaults to None.
+        """
+
+        quarantined = quarantined or []
+        file_ids = [file["id"] for file in files]
+        parsed_on = dt.utcnow()
+        sess = self._session()
+        sess.query(table).filter(table.archive_file_id.in_(file_ids + [file_id for file_id, _, _ in quarantined])) \
+            .delete(synchronize_session=False)
+        if len(rows) > 0:
+            self.bulk_insert_data(table, rows, sess)
+        sess.bulk_update_mappings(ArchiveFile, [dict(file, has_parsed=True, parsed_on=parsed_on) for file in files])
+        for file_id, limit, reason in quarantined:
+            self.quarantine_archive_file(file_id, limit, reason, session=sess)
+        sess.commit()
+        sess.close()
+
+        if self._state is not None:
+            for file_id in file_ids:
+                self._state.update_archive_file(file_id, has_parsed=True)
+
+    def delete_file_data(self, file_id: int, session=None):
+        """Delete all rows related with file_id from all data tables of the law
+
+        Args:
+            file_id (int): ID of XML file.
+            session (Session, optional): DB session. Defaults to None, the change is committed at once.
+        """
+
+        sess = session if session is not None else self._session()
+        for table in self._DATA_TABLES:
+            sess.query(table).filter(table.archive_file_id == file_id).delete()
+        if session is None:
+            sess.commit()
+            sess.close()
@@ -4,13 +4,56 @@
 """A wrapper over database.
 """
 
+import json
+import re
+import time
+from contextlib import contextmanager
+from decimal import Decimal
 from enum import Enum
+from datetime import timedelta
 import sqlalchemy as sa
 from sqlalchemy.orm import sessionmaker, aliased
+from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime as dt
-from .models import Archive, ArchiveFile
+from .models import Archive, ArchiveFile, Folder, QuarantinedFile
+from ._state import LocalStateStore
+from ._bloom import BloomFilter, get_shared_filter
 from ..log import get_logger
-from ..config import conf, is_production
+from ..config import get_config
+
+
+_DEFAULT_STATE_SYNC_INTERVAL = 600
+_STATE_SYNC_BATCH_SIZE = 10000
+# changes made a bit earlier than the last sync are read again, because time of app and DB can differ
+_STATE_SYNC_OVERLAP = timedelta(minutes=5)
+_STATE_DT_TEMPLATE = "%Y-%m-%d %H:%M:%S.%f"
+# LIST gives modification time without seconds, MLSD gives it with seconds.
+# The archive is considered modified only if its time has moved further
+_MODIFICATION_TOLERANCE = timedelta(minutes=1)
+_DEFAULT_PARSED_FILTER_CAPACITY = 10000000
+_DEFAULT_PARSED_FILTER_ERROR_RATE = 0.01
+# key of `Session.info` with callbacks which wait for commit of the outermost transaction
+_ON_COMMIT_KEY = "on_commit"
+# decimals of XML data are marked by NUL, which cannot be in XML, and then written as JSON numbers
+_DECIMAL_MARK = "\0decimal:"
+_DECIMAL_PATTERN = re.compile(r'"\\u0000decimal:([^"]+)"')
+
+
+def _mark_decimal(value):
+    if isinstance(value, Decimal) and value.is_finite():
+        return _DECIMAL_MARK + format(value, "f")
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps_json(value) -> str:
+    """Serialize XML data for JSONB columns. Decimals are written as numbers with all their digits"""
+
+    text = json.dumps(value, default=_mark_decimal)
+    if "\\u0000decimal:" not in text:
+        return text
+
+    return _DECIMAL_PATTERN.sub(r"\1", text)
 
 
 class FileStatus(Enum):
@@ -21,6 +64,24 @@ class FileStatus(Enum):
     FILE_DOES_NOT_EXIST = 2
     FILE_EXISTS_BUT_NOT_PARSED = 3
     FILE_EXISTS_BUT_SIZE_DIFFERENT = 4
+    FILE_EXISTS_BUT_MODIFIED = 5
+
+
+def _run_on_commit(session):
+    # the event is fired for SAVEPOINTs too, the callbacks wait for the outermost transaction
+    if session.in_nested_transaction():
+        return
+
+    callbacks = session.info[_ON_COMMIT_KEY]
+    pending = list(callbacks)
+    callbacks.clear()
+    for callback in pending:
+        callback()
+
+
+def _drop_on_commit(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info[_ON_COMMIT_KEY].clear()
 
 
 class DBClient():
@@ -29,43 +90,236 @@ class DBClient():
         The class contains methods for manipulate archive and archive's file information.
     """
 
-    def __init__(self):
+    def __init__(self, config=None):
+        """
+        Args:
+            config (Config, optional): Config. Defaults to None, the installed config is used.
+        """
+
         self.log = get_logger(__name__)
-        self._connect()
+        self._conf = config if config is not None else get_config()
+        self._session_maker = None
+        self._state = self._get_state_store()
+        self._state_synced_at = None
+        # the filter is loaded on the first use, it needs DB
+        self._parsed_filter = None
+        self._is_parsed_filter_trusted = False
 
     def _connect(self):
+        """Create engine. Connection is established on the first query"""
+
         conn_str = self._get_connection_string()
         engine_echo = self._get_engine_echo()
-        engine = sa.create_engine(conn_str, echo=engine_echo)
+        engine = sa.create_engine(conn_str, echo=engine_echo, json_serializer=_dumps_json)
+
+        self._session_maker = sessionmaker(bind=engine)
+
+    def _session(self):
+        if self._session_maker is None:
+            self._connect()
 
-        self._session = sessionmaker(bind=engine)
-        self._check_connection()
+        return self._session_maker()
 
     def _get_connection_string(self):
-        cfg = conf("db")
+        cfg = self._conf("db")
         conn_str = f"postgresql://{cfg['user']}:{cfg['password']}@{cfg['host']}:{cfg['port']}/{cfg['name']}"
 
         return conn_str
 
     def _get_engine_echo(self):
-        cfg = conf("db")
-        engine_echo = not is_production()
+        cfg = self._conf("db")
+        engine_echo = not self._conf.is_production()
         if cfg["echo"] is not None:
             engine_echo = cfg["echo"] == True
 
         return engine_echo
 
-    def _check_connection(self):
+    def _get_state_store(self):
+        """Local store of bookkeeping if `db.state_file` is set in config"""
+
+        state_file = self._conf("db.state_file")
+        if not state_file:
+            return None
+
+        self.log.info("Use local state store %s", state_file)
+        return LocalStateStore(state_file)
+
+    def _get_state_sync_interval(self) -> int:
+        interval = self._conf("db.state_sync_interval")
+        return int(interval) if interval is not None else _DEFAULT_STATE_SYNC_INTERVAL
+
+    def _get_parsed_filter_settings(self):
+        cfg = self._conf("db.parsed_filter")
+        if not isinstance(cfg, dict) or not cfg.get("path"):
+            return None
+
+        return cfg
+
+    def _get_parsed_filter(self):
+        """Bloom filter of parsed archives if `db.parsed_filter.path` is set in config.
+        It is loaded from file and synced with DB once per process.
+        """
+
+        if self._parsed_filter is None:
+            cfg = self._get_parsed_filter_settings()
+            if cfg is None:
+                return None
+            self._parsed_filter = get_shared_filter(cfg["path"], lambda: self._load_parsed_filter(cfg))
+            # probable hits are skipped without DB. Archives modified on server are not found then
+            self._is_parsed_filter_trusted = str(cfg.get("trust")).lower() == "true"
+
+        return self._parsed_filter
+
+    def _load_parsed_filter(self, cfg: dict) -> BloomFilter:
+        capacity = int(cfg.get("capacity") or _DEFAULT_PARSED_FILTER_CAPACITY)
+        error_rate = float(cfg.get("error_rate") or _DEFAULT_PARSED_FILTER_ERROR_RATE)
+
+        bloom = BloomFilter.load(cfg["path"])
+        if bloom is not None and (bloom.is_overfilled or bloom.capacity < capacity or
+                                  bloom.error_rate != error_rate):
+            # the filter is built again with the new size
+            capacity = max(capacity, bloom.count * 2)
+            bloom = None
+        if bloom is None:
+            self.log.info("Build filter of parsed archives %s for %s archives", cfg["path"], capacity)
+            bloom = BloomFilter(capacity, error_rate)
+
+        self.sync_parsed_filter(bloom)
+        bloom.save(cfg["path"])
+
+        return bloom
+
+    def sync_parsed_filter(self, bloom: BloomFilter):
+        """Add archives which have been parsed since the last sync to the filter.
+        All parsed archives are added if the filter has not been synced yet.
+        """
+
+        started_on = dt.utcnow()
         sess = self._session()
-        sess.execute("SELECT TRUE")
+        query = sess.query(Archive.name, Archive.size).filter(Archive.has_parsed == True)
+        if bloom.synced_on is not None:
+            since = dt.strptime(bloom.synced_on, _STATE_DT_TEMPLATE) - _STATE_SYNC_OVERLAP
+            query = query.filter(Archive.parsed_on >= since)
+
+        for name, size in query.yield_per(_STATE_SYNC_BATCH_SIZE):
+            bloom.add(name, size)
         sess.close()
 
-    def _compare_fdata_and_return(self, db_file, fsize: int) -> FileStatus:
+        bloom.synced_on = started_on.strftime(_STATE_DT_TEMPLATE)
+        self.log.info("Filter of parsed archives has %s archive(s)", bloom.count)
+
+    def save_parsed_filter(self):
+        """Write the filter of parsed archives to its file, so archives parsed by this run are kept"""
+
+        bloom = self._get_parsed_filter()
+        if bloom is not None:
+            bloom.save(self._get_parsed_filter_settings()["path"])
+
+    def sync_state(self):
+        """Copy changes of archives and archive files from DB to the local state store"""
+
+        if self._state is None:
+            return
+
+        started_on = dt.utcnow()
+        synced_on = self._state.get_meta("synced_on")
+        since = dt.strptime(synced_on, _STATE_DT_TEMPLATE) - _STATE_SYNC_OVERLAP if synced_on is not None else None
+        last_archive_id = int(self._state.get_meta("last_archive_id") or 0)
+        last_file_id = int(self._state.get_meta("last_archive_file_id") or 0)
+        self.log.info("Sync local state store with DB; changes since %s", since)
+
+        sess = self._session()
+        archives = sess.query(Archive.id, Archive.law_number, Archive.folder_name,
+                              Archive.name, Archive.size, Archive.has_parsed, Archive.modified_on)
+        files = sess.query(ArchiveFile.id, ArchiveFile.archive_id, ArchiveFile.name,
+                           ArchiveFile.size, ArchiveFile.has_parsed)
+        if since is not None:
+            archives = archives.filter(sa.or_(Archive.id > last_archive_id,
+                                              Archive.parsed_on >= since, Archive.updated_on >= since))
+            files = files.filter(sa.or_(ArchiveFile.id > last_file_id, ArchiveFile.parsed_on >= since))
+
+        last_archive_id = self._copy_to_state(archives, self._state.put_archives, last_archive_id)
+        last_file_id = self._copy_to_state(files, self._state.put_archive_files, last_file_id)
+        sess.close()
+
+        self._state.set_meta("synced_on", started_on.strftime(_STATE_DT_TEMPLATE))
+        self._state.set_meta("last_archive_id", str(last_archive_id))
+        self._state.set_meta("last_archive_file_id", str(last_file_id))
+        self._state_synced_at = time.monotonic()
+
+    def _copy_to_state(self, query, put, last_id: int) -> int:
+        batch = []
+        for row in query.yield_per(_STATE_SYNC_BATCH_SIZE):
+            batch.append(tuple(row))
+            last_id = max(last_id, row[0])
+            if len(batch) >= _STATE_SYNC_BATCH_SIZE:
+                put(batch)
+                batch = []
+
+        if len(batch) > 0:
+            put(batch)
+
+        return last_id
+
+    def _sync_state_if_needed(self):
+        if self._state_synced_at is None or \
+                time.monotonic() - self._state_synced_at >= self._get_state_sync_interval():
+            self.sync_state()
+
+    def _on_commit(self, session, callback):
+        """Call `callback` after the outermost transaction of session is committed.
+        Callbacks of rolled back transaction or SAVEPOINT (see `savepoint`) are not called.
+        """
+
+        callbacks = session.info.get(_ON_COMMIT_KEY)
+        if callbacks is None:
+            callbacks = session.info[_ON_COMMIT_KEY] = []
+            sa.event.listen(session, "after_commit", _run_on_commit)
+            sa.event.listen(session, "after_soft_rollback", _drop_on_commit)
+
+        callbacks.append(callback)
+
+    def _update_state_on_commit(self, session, method: str, *args, **kwargs):
+        """Change the local state store by its method when changes of session are committed"""
+
+        if self._state is not None:
+            self._on_commit(session, lambda: getattr(self._state, method)(*args, **kwargs))
+
+    @contextmanager
+    def savepoint(self, session):
+        """SAVEPOINT inside transaction of session. If the block raises an exception,
+        its changes are rolled back and the exception is raised again, the transaction goes on.
+
+        Args:
+            session (Session): DB session, see `get_session`.
+        """
+
+        count = len(session.info.get(_ON_COMMIT_KEY, ()))
+        nested = session.begin_nested()
+        try:
+            yield
+        except BaseException:
+            nested.rollback()
+            del session.info.get(_ON_COMMIT_KEY, [])[count:]
+            raise
+
+        nested.commit()
+
+    def check_connection(self):
+        """Check connection to DB. Raises an exception if DB is unavailable"""
+
+        sess = self._session()
+        sess.execute(sa.text("SELECT TRUE"))
+        sess.close()
+
+    def _compare_fdata_and_return(self, db_file, fsize: int, modified_on=None) -> FileStatus:
         """Check information about file(or archive) in DB and return result.
+        Modification times are compared only if both of them are known, otherwise only size is compared.
 
         Args:
             db_file (_Archive|_ArchiveFile): File.
             fsize (int): File size from server.
+            modified_on (datetime, optional): Modification time from server. Defaults to None.
 
         Returns:
             FileStatus
@@ -76,31 +330,59 @@ class DBClient():
             return FileStatus.FILE_EXISTS_BUT_SIZE_DIFFERENT
         elif db_file.has_parsed == False:
             return FileStatus.FILE_EXISTS_BUT_NOT_PARSED
+        elif self._is_modified(getattr(db_file, "modified_on", None), modified_on):
+            return FileStatus.FILE_EXISTS_BUT_MODIFIED
         else:
             return FileStatus.FILE_EXISTS
 
-    def get_archive_status(self, fname: str, fsize: int) -> FileStatus:
+    @staticmethod
+    def _is_modified(stored_on, modified_on) -> bool:
+        return stored_on is not None and modified_on is not None and \
+            modified_on > stored_on + _MODIFICATION_TOLERANCE
+
+    def get_archive_status(self, fname: str, fsize: int, law_number=None, folder_name=None,
+                           modified_on=None) -> FileStatus:
         """Check, is there already in DB a parsed file or no.
+        If the local state store is used and law number and folder name are given, the store is checked.
 
         Args:
             fname (str): File name.
             fsize (int): File size.
+            law_number (str, optional): Law number. Defaults to None.
+            folder_name (str, optional): Folder name. Defaults to None.
+            modified_on (datetime, optional): Modification time on server. Defaults to None.
 
         Returns:
             FileStatus: Result.
         """
 
-        self.log.debug(f"Check, is there parsed file {fname} or no")
+        self.log.debug("Check, is there parsed file %s or no", fname)
+        parsed_filter = self._get_parsed_filter()
+        if parsed_filter is not None:
+            # the archive has not been parsed. If it exists in DB, it is found by `add_archive` and its files
+            # are checked one by one as for a not parsed archive
+            if not parsed_filter.contains(fname, fsize):
+                return FileStatus.FILE_DOES_NOT_EXIST
+            elif self._is_parsed_filter_trusted:
+                return FileStatus.FILE_EXISTS
+
+        if self._state is not None and law_number is not None and folder_name is not None:
+            self._sync_state_if_needed()
+            archive = self._state.get_archive(law_number, folder_name, fname, fsize)
+            return self._compare_fdata_and_return(archive, fsize, modified_on)
+
         sess = self._session()
         arch = aliased(Archive, name="arch")
-        query = sess.query(arch)
+
+        # only columns from the covering index are requested
+        query = sess.query(arch.size, arch.has_parsed, arch.modified_on)
 
         archive = query.filter(arch.name == fname,
                                arch.size == fsize).one_or_none()
 
         sess.close()
 
-        return self._compare_fdata_and_return(archive, fsize)
+        return self._compare_fdata_and_return(archive, fsize, modified_on)
 
     def get_archive(self, fname: str, fsize: int) -> Archive:
         """Get archive information from DB.s
@@ -121,7 +403,7 @@ class DBClient():
 
         return archive
 
-    def add_archive(self, fname: str, fsize: int, law_number: str, folder_name: str) -> int:
+    def add_archive(self, fname: str, fsize: int, law_number: str, folder_name: str, modified_on=None) -> int:
         """Add information about archive to DB. Return ID of new record.
 
         Args:
@@ -129,82 +411,125 @@ class DBClient():
             fsize (int): File size.
             law_number (str): Law number
             folder_name (str): Folder name.
+            modified_on (datetime, optional): Modification time on server. Defaults to None.
 
         Returns:
             int: new archive ID.
         """
 
-        self.log.debug(f"Add info about a new archive {fname} to database")
+        self.log.debug("Add info about a new archive %s to database", fname)
         sess = self._session()
-        archive = Archive(name=fname, size=fsize, law_number=law_number, folder_name=folder_name)
-        sess.add(archive)
-        sess.commit()
 
-        archive_id = archive.id
+        # another crawler could add the same archive. In this case ID of existing archive is returned
+        stmt = insert(Archive).values(name=fname, size=fsize, law_number=law_number, folder_name=folder_name,
+                                      modified_on=modified_on)
+        stmt = stmt.on_conflict_do_update(index_elements=[Archive.name, Archive.size],
+                                          set_={"name": stmt.excluded.name}).returning(Archive.id)
+        archive_id = sess.execute(stmt).scalar()
+        sess.commit()
         sess.close()
 
+        if self._state is not None:
+            self._state.put_archives([(archive_id, law_number, folder_name, fname, fsize, False, modified_on)])
+
         return archive_id
 
-    def mark_archive_as_parsed(self, archive_id: int, reason="OK"):
+    def mark_archive_as_parsed(self, archive_id: int, reason="OK", session=None):
         """Mark archive as parsed with reason. Default reason is `OK`.
         Reason 'OK' means that everything is good, all archive files were parsed and load successfully.
 
         Args:
             archive_id (int): Archive ID
             reason (str, optional): Reason of marking. Defaults to "OK".
+            session (Session, optional): DB session. Defaults to None, the change is committed at once.
         """
 
-        self.log.debug(f"Mark archive with ID {archive_id} as parsed")
-        sess = self._session()
+        self.log.debug("Mark archive with ID %s as parsed", archive_id)
+        sess = session if session is not None else self._session()
 
         archive = sess.query(Archive).filter_by(id=archive_id).first()
         archive.has_parsed = True
         archive.parsed_on = dt.utcnow()
         archive.reason = reason
-        sess.commit()
-        sess.close()
+        self._update_state_on_commit(sess, "update_archive", archive_id, has_parsed=True)
+        parsed_filter = self._get_parsed_filter()
+        if parsed_filter is not None:
+            self._on_commit(sess, lambda name=archive.name, size=archive.size: parsed_filter.add(name, size))
+        if session is None:
+            sess.commit()
+            sess.close()
 
-    def update_archive(self, archive_id: int, **kwargs):
+    def update_archive(self, archive_id: int, session=None, **kwargs):
         """Update archive info.
 
         Args:
             archive_id (int): Archive ID
+            session (Session, optional): DB session. Defaults to None, the change is committed at once.
         """
 
-        self.log.debug(f"Update archive with ID {archive_id}")
-        sess = self._session()
+        self.log.debug("Update archive with ID %s", archive_id)
+        sess = session if session is not None else self._session()
         sess.query(Archive).filter_by(id=archive_id).update(kwargs)
-        sess.commit()
-        sess.close()
+        self._update_state_on_commit(sess, "update_archive", archive_id, **kwargs)
+        if session is None:
+            sess.commit()
+            sess.close()
 
-    def add_archive_file(self, archive_id: int, fname: str, fsize: int) -> int:
+    def add_archive_file(self, archive_id: int, fname: str, fsize: int, blob_key=None, session=None) -> int:
         """Add information about archive's file to DB.
 
         Args:
             archive_id (int): Archive ID.
             fname (str): File name.
             fsize (int): File size.
+            blob_key (str, optional): Key of raw file in blob store. Defaults to None.
+            session (Session, optional): DB session. Defaults to None, the file is committed at once.
 
         Returns:
             int: ID of a new file.
         """
 
-        self.log.debug(f"Add info to database about a new file {fname} inside archive")
-        sess = self._session()
-
-        file = ArchiveFile(archive_id=archive_id, name=fname, size=fsize)
-        sess.add(file)
-        sess.commit()
+        self.log.debug("Add info to database about a new file %s inside archive", fname)
+        sess = session if session is not None else self._session()
 
-        file_id = file.id
-        sess.close()
+        stmt = insert(ArchiveFile).values(archive_id=archive_id, name=fname, size=fsize, blob_key=blob_key)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ArchiveFile.archive_id, ArchiveFile.name, ArchiveFile.size],
+            set_={"blob_key": sa.func.coalesce(stmt.excluded.blob_key, ArchiveFile.blob_key)}
+        ).returning(ArchiveFile.id)
+        file_id = sess.execute(stmt).scalar()
+        self._update_state_on_commit(sess, "put_archive_files", [(file_id, archive_id, fname, fsize, False)])
+        if session is None:
+            sess.commit()
+            sess.close()
 
         return file_id
 
+    def update_archive_file(self, file_id: int, session=None, **kwargs):
+        """Update archive file info.
+
+        Args:
+            file_id (int): File ID
+            session (Session, optional): DB session. Defaults to None, the change is committed at once.
+        """
+
+        self.log.debug("Update archive file with ID %s", file_id)
+        sess = session if session is not None else self._session()
+        sess.query(ArchiveFile).filter_by(id=file_id).update(kwargs)
+        self._update_state_on_commit(sess, "update_archive_file", file_id, **kwargs)
+        if session is None:
+            sess.commit()
+            sess.close()
+
     def get_archive_file_status(self, archive_id: int, fname: str, fsize: int) -> FileStatus:
-        self.log.debug(f"Check, is there parsed file {fname} or no")
+        self.log.debug("Check, is there parsed file %s or no", fname)
+        if self._state is not None:
+            self._sync_state_if_needed()
+            file = self._state.get_archive_file(archive_id, fname, fsize)
+            return self._compare_fdata_and_return(file, fsize)
+
         sess = self._session()
-        query = sess.query(ArchiveFile)
+        query = sess.query(ArchiveFile.size, ArchiveFile.has_parsed)
         file = query.filter(ArchiveFile.name == fname,
                             ArchiveFile.archive_id == archive_id,
                             ArchiveFile.size == fsize).one_or_none()
@@ -212,14 +537,15 @@ class DBClient():
         sess.close()
         return self._compare_fdata_and_return(file, fsize)
 
-    def get_archive_file(self, archive_id: int, fname: str, fsize: int) -> ArchiveFile:
-        sess = self._session()
+    def get_archive_file(self, archive_id: int, fname: str, fsize: int, session=None) -> ArchiveFile:
+        sess = session if session is not None else self._session()
         query = sess.query(ArchiveFile)
         file = query.filter(ArchiveFile.name == fname,
                             ArchiveFile.archive_id == archive_id,
                             ArchiveFile.size == fsize).first()
 
-        sess.close()
+        if session is None:
+            sess.close()
         return file
 
     def mark_archive_file_as_parsed(self, file_id: int, xml_type: str, session=None, reason=None):
@@ -237,10 +563,57 @@ class DBClient():
         file.parsed_on = dt.utcnow()
         file.reason = reason
         file.xml_type = xml_type
+        # the local store has to be changed only if the outer transaction is committed
+        self._update_state_on_commit(sess, "update_archive_file", file_id, has_parsed=True)
         if session is None:
             sess.commit()
             sess.close()
 
+    def quarantine_archive_file(self, file_id: int, limit: str, reason: str, session=None):
+        """Keep archive file in quarantine and mark it as parsed, so it is not parsed again.
+
+        Args:
+            file_id (int): File ID.
+            limit (str): Name of exceeded limit.
+            reason (str): Reason of quarantine.
+            session (Session, optional): DB session. Defaults to None, the change is committed at once.
+        """
+
+        sess = session if session is not None else self._session()
+        stmt = insert(QuarantinedFile).values(archive_file_id=file_id, limit=limit, reason=reason)
+        stmt = stmt.on_conflict_do_update(index_elements=[QuarantinedFile.archive_file_id],
+                                          set_={"limit": stmt.excluded.limit, "reason": stmt.excluded.reason})
+        sess.execute(stmt)
+        self.mark_archive_file_as_parsed(file_id, xml_type=None, session=sess, reason=f"Quarantined: {limit}")
+        if session is None:
+            sess.commit()
+            sess.close()
+
+    def get_stored_files_batch(self, law_number: str, folder_name: str, last_id: int, limit: int) -> list:
+        """Get a batch of files of the folder which are kept in blob store, ordered by ID.
+
+        Args:
+            law_number (str): Law number.
+            folder_name (str): Folder name.
+            last_id (int): Files with ID greater than this one are returned.
+            limit (int): Size of batch.
+
+        Returns:
+            list: Tuples (file ID, blob key, archive ID, archive name).
+        """
+
+        sess = self._session()
+        rows = sess.query(ArchiveFile.id, ArchiveFile.blob_key, Archive.id, Archive.name) \
+            .join(Archive, Archive.id == ArchiveFile.archive_id) \
+            .filter(Archive.law_number == law_number, Archive.folder_name == folder_name,
+                    ArchiveFile.blob_key.isnot(None), ArchiveFile.id > last_id) \
+            .order_by(ArchiveFile.id) \
+            .limit(limit) \
+            .all()
+        sess.close()
+
+        return [tuple(row) for row in rows]
+
     def delete_archive_files(self, archive_id: int):
         """Delete files of an archive by archive ID.
 
@@ -252,5 +625,47 @@ class DBClient():
         sess.commit()
         sess.close()
 
+        if self._state is not None:
+            self._state.delete_archive_files(archive_id)
+
+    def get_folders(self, law_number: str) -> dict:
+        """Get directories of the law which have been read completely.
+
+        Args:
+            law_number (str): Law number.
+
+        Returns:
+            dict: Modification times of directories and times of their last check by their paths.
+        """
+
+        sess = self._session()
+        rows = sess.query(Folder.path, Folder.modified_on, Folder.checked_on) \
+            .filter(Folder.law_number == law_number).all()
+        sess.close()
+
+        return {path: (modified_on, checked_on) for path, modified_on, checked_on in rows}
+
+    def set_folders(self, law_number: str, folders: dict):
+        """Save directories which have been read completely.
+
+        Args:
+            law_number (str): Law number.
+            folders (dict): Modification times of directories by their paths.
+        """
+
+        if len(folders) == 0:
+            return
+
+        self.log.debug("Save %s completely read folder(s)", len(folders))
+        sess = self._session()
+        stmt = insert(Folder).values([{"law_number": law_number, "path": path, "modified_on": modified_on}
+                                      for path, modified_on in folders.items()])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Folder.law_number, Folder.path],
+            set_={"modified_on": stmt.excluded.modified_on, "checked_on": sa.func.timezone("utc", sa.func.now())})
+        sess.execute(stmt)
+        sess.commit()
+        sess.close()
+
     def get_session(self):
         return self._session()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Declarative partitioning of data tables.
+
+Data tables can be partitioned either by month of archive date (`RANGE`) or by region (`LIST`).
+Tables are converted by `sql/partitioning_by_archive_date.sql` or `sql/partitioning_by_region.sql`,
+partitions for new keys are created on demand before the first insert.
+"""
+
+import re
+from datetime import date
+import sqlalchemy as sa
+
+
+PARTITION_BY_ARCHIVE_DATE = "archive_date"
+PARTITION_BY_REGION = "region"
+AVAILABLE_PARTITION_KEYS = (PARTITION_BY_ARCHIVE_DATE, PARTITION_BY_REGION)
+
+_NAME_PATTERN = re.compile(r"[^a-z0-9_]")
+
+
+def get_partition_name(table_name: str, partition_by: str, value) -> str:
+    """Name of partition which contains rows with the value of partition key.
+
+    Args:
+        table_name (str): Name of partitioned table.
+        partition_by (str): Partition key.
+        value (datetime.date|str): Value of partition key.
+
+    Returns:
+        str: Name of partition.
+    """
+    if partition_by == PARTITION_BY_ARCHIVE_DATE:
+        return f"{table_name}_y{value.year:04d}m{value.month:02d}"
+    elif partition_by == PARTITION_BY_REGION:
+        return f"{table_name}_{_NAME_PATTERN.sub('_', value.lower())}"
+
+    raise ValueError(f"Unknown partition key {partition_by}")
+
+
+def get_partition_ddl(table, partition_by: str, value) -> sa.sql.elements.TextClause:
+    """DDL for creation of partition.
+
+    Args:
+        table (sa.Table): Partitioned table.
+        partition_by (str): Partition key.
+        value (datetime.date|str): Value of partition key.
+
+    Returns:
+        TextClause: DDL.
+    """
+    name = get_partition_name(table.name, partition_by, value)
+    full_name = f"{table.schema}.{name}" if table.schema else name
+    parent = f"{table.schema}.{table.name}" if table.schema else table.name
+
+    if partition_by == PARTITION_BY_ARCHIVE_DATE:
+        start = date(value.year, value.month, 1)
+        end = date(value.year + 1, 1, 1) if value.month == 12 else date(value.year, value.month + 1, 1)
+        bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    else:
+        # partition bounds cannot be bound parameters, so the literal is escaped here
+        escaped_value = str(value).replace("'", "''")
+        bounds = f"IN ('{escaped_value}')"
+
+    return sa.text(f"CREATE TABLE IF NOT EXISTS {full_name} PARTITION OF {parent} FOR VALUES {bounds}")
+
+
+def get_partition_table(table, partition_by: str, value):
+    """Lightweight table of partition which can be used for inserts.
+
+    Args:
+        table (sa.Table): Partitioned table.
+        partition_by (str): Partition key.
+        value (datetime.date|str): Value of partition key.
+
+    Returns:
+        sa.sql.TableClause: Partition.
+    """
+    name = get_partition_name(table.name, partition_by, value)
+    columns = [sa.column(column.name, column.type) for column in table.columns if column.name != "id"]
+
+    return sa.table(name, *columns, schema=table.schema)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""Local store of crawl bookkeeping.
+
+The store keeps a copy of `archives` and `archive_files` statuses in a local SQLite file in WAL mode,
+so checks of existing archives and files do not go to PostgreSQL. PostgreSQL stays the source of truth:
+all changes are written there first and the store is synced with it periodically.
+"""
+
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime as dt
+
+
+FileRow = namedtuple("FileRow", ("size", "has_parsed", "modified_on"), defaults=(None,))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY,
+    law TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    has_parsed INTEGER NOT NULL DEFAULT 0,
+    modified_on TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS archives_key ON archives (law, folder, name, size);
+
+CREATE TABLE IF NOT EXISTS archive_files (
+    id INTEGER PRIMARY KEY,
+    archive_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    has_parsed INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS archive_files_key ON archive_files (archive_id, name, size);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _format_time(value):
+    return value.isoformat(" ") if value is not None else None
+
+
+class LocalStateStore():
+    """Local store of archives and archive files statuses.
+
+    Args:
+        path (str): Path to SQLite file. `:memory:` can be used for tests.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns which are missing in stores created by older versions"""
+
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(archives)")]
+        if "modified_on" not in columns:
+            self._conn.execute("ALTER TABLE archives ADD modified_on TEXT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_archive(self, law_number: str, folder_name: str, fname: str, fsize: int):
+        """Get status of archive.
+
+        Args:
+            law_number (str): Law number.
+            folder_name (str): Folder name.
+            fname (str): File name.
+            fsize (int): File size.
+
+        Returns:
+            FileRow: Archive row or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, has_parsed, modified_on FROM archives "
+                "WHERE law = ? AND folder = ? AND name = ? AND size = ?",
+                (law_number, folder_name, fname, fsize)).fetchone()
+
+        if row is None:
+            return None
+
+        return FileRow(row[0], bool(row[1]), dt.fromisoformat(row[2]) if row[2] is not None else None)
+
+    def get_archive_file(self, archive_id: int, fname: str, fsize: int):
+        """Get status of archive's file.
+
+        Args:
+            archive_id (int): Archive ID.
+            fname (str): File name.
+            fsize (int): File size.
+
+        Returns:
+            FileRow: File row or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, has_parsed FROM archive_files WHERE archive_id = ? AND name = ? AND size = ?",
+                (archive_id, fname, fsize)).fetchone()
+
+        return FileRow(row[0], bool(row[1])) if row is not None else None
+
+    def put_archives(self, rows):
+        """Insert or replace archives.
+
+        Args:
+            rows (iterable): Tuples (ID, law number, folder name, name, size, has parsed, modification time).
+        """
+        rows = [tuple(row[:6]) + (_format_time(row[6]),) for row in rows]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO archives VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def put_archive_files(self, rows):
+        """Insert or replace archive files.
+
+        Args:
+            rows (iterable): Tuples (ID, archive ID, name, size, has parsed).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO archive_files VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def update_archive(self, archive_id: int, **kwargs):
+        """Update `size`, `has_parsed` and(or) `modified_on` of archive. Other keys are ignored."""
+        if "modified_on" in kwargs:
+            kwargs["modified_on"] = _format_time(kwargs["modified_on"])
+        self._update("archives", archive_id, kwargs, ("size", "has_parsed", "modified_on"))
+
+    def update_archive_file(self, file_id: int, **kwargs):
+        """Update `size` and(or) `has_parsed` of archive file. Other keys are ignored."""
+        self._update("archive_files", file_id, kwargs, ("size", "has_parsed"))
+
+    def _update(self, table: str, row_id: int, values: dict, allowed_columns: tuple):
+        columns = [column for column in allowed_columns if column in values]
+        if len(columns) == 0:
+            return
+
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock:
+            self._conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?",
+                               [values[column] for column in columns] + [row_id])
+
+    def delete_archive_files(self, archive_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM archive_files WHERE archive_id = ?", (archive_id,))
+
+    def get_meta(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
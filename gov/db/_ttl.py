@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from ._data import DataDBClient
+from .models import TTLPurchaseNoticesData, TTLPurchaseProtocolsData
+
+
+class TwoHundredTwentyThirdLawDB(DataDBClient):
+    """Class for working with DB for 223rd law
+    """
+
+    _DATA_TABLES = (TTLPurchaseNoticesData, TTLPurchaseProtocolsData)
+
+    def insert_notice_data(self, file_id: int, data: dict, session=None, fields=None):
+        row = dict(fields or {}, archive_file_id=file_id, data=data)
+        self.bulk_insert_data(TTLPurchaseNoticesData, [row], session)
+
+    def insert_protocol_data(self, file_id: int, data: dict, session=None, fields=None):
+        row = dict(fields or {}, archive_file_id=file_id, data=data)
+        self.bulk_insert_data(TTLPurchaseProtocolsData, [row], session)
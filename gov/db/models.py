@@ -14,6 +14,9 @@ class Archive(Base):
     """Table `archives`
     """
     __tablename__ = "archives"
+    __table_args__ = (
+        sa.UniqueConstraint("name", "size", name="archives_name_size_key"),
+    )
 
     id = sa.Column(sa.Integer, primary_key=True)
     name = sa.Column(sa.String, nullable=False)
@@ -25,12 +28,31 @@ class Archive(Base):
     law_number = sa.Column(ENUM("44", "223", name="law"), nullable=False, default="44")
     folder_name = sa.Column(sa.String(100), nullable=False)
     reason = sa.Column(sa.String(250), nullable=True)
+    modified_on = sa.Column(sa.DateTime, nullable=True)
+
+
+class Folder(Base):
+    """Table `folders`, directories of FTP server which have been read completely
+    """
+    __tablename__ = "folders"
+    __table_args__ = (
+        sa.UniqueConstraint("law_number", "path", name="folders_law_number_path_key"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    law_number = sa.Column(ENUM("44", "223", name="law"), nullable=False)
+    path = sa.Column(sa.String(500), nullable=False)
+    modified_on = sa.Column(sa.DateTime, nullable=False)
+    checked_on = sa.Column(sa.DateTime, nullable=False, server_default=sa.text("NOW() AT TIME ZONE 'utc'"))
 
 
 class ArchiveFile(Base):
     """Table `archive_files`
     """
     __tablename__ = "archive_files"
+    __table_args__ = (
+        sa.UniqueConstraint("archive_id", "name", "size", name="archive_files_archive_id_name_size_key"),
+    )
 
     id = sa.Column(sa.Integer, primary_key=True)
     archive_id = sa.Column(sa.Integer, sa.ForeignKey("archives.id"))
@@ -40,10 +62,23 @@ class ArchiveFile(Base):
     parsed_on = sa.Column(sa.DateTime, nullable=True)
     has_parsed = sa.Column(sa.Boolean, nullable=False, default=False)
     reason = sa.Column(sa.String(250), nullable=True)
+    blob_key = sa.Column(sa.String(64), nullable=True)
 
     archives = relationship("Archive")
 
 
+class QuarantinedFile(Base):
+    """Table `quarantined_files`, XML files above limits which have not been parsed
+    """
+    __tablename__ = "quarantined_files"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    archive_file_id = sa.Column(sa.Integer, sa.ForeignKey("archive_files.id"), nullable=False, unique=True)
+    limit = sa.Column(sa.String(20), nullable=False)
+    reason = sa.Column(sa.String(250), nullable=True)
+    created_on = sa.Column(sa.DateTime, nullable=False, server_default=sa.text("NOW() AT TIME ZONE 'utc'"))
+
+
 class FFLProtocolsData(Base):
     """Table `forty_fourth_law.protocols_data`
     """
@@ -54,6 +89,16 @@ class FFLProtocolsData(Base):
     archive_file_id = sa.Column(sa.Integer, sa.ForeignKey(ArchiveFile.id))
     data = sa.Column(JSONB, nullable=True)
 
+    # projected fields. See `gov.law.util.project_fields`
+    purchase_number = sa.Column(sa.String(50), nullable=True)
+    customer_inn = sa.Column(sa.String(12), nullable=True)
+    region = sa.Column(sa.String(100), nullable=True)
+    max_price = sa.Column(sa.Numeric, nullable=True)
+    publish_date = sa.Column(sa.DateTime, nullable=True)
+
+    # partition keys. See `gov.db._partitions`
+    archive_date = sa.Column(sa.Date, nullable=True)
+
 
 class FFLNotificationsData(Base):
     """Table `forty_fourth_law.notifications_data`
@@ -64,3 +109,55 @@ class FFLNotificationsData(Base):
     id = sa.Column(sa.Integer, primary_key=True)
     archive_file_id = sa.Column(sa.Integer, sa.ForeignKey(ArchiveFile.id))
     data = sa.Column(JSONB, nullable=True)
+
+    # projected fields. See `gov.law.util.project_fields`
+    purchase_number = sa.Column(sa.String(50), nullable=True)
+    customer_inn = sa.Column(sa.String(12), nullable=True)
+    region = sa.Column(sa.String(100), nullable=True)
+    max_price = sa.Column(sa.Numeric, nullable=True)
+    publish_date = sa.Column(sa.DateTime, nullable=True)
+
+    # partition keys. See `gov.db._partitions`
+    archive_date = sa.Column(sa.Date, nullable=True)
+
+
+class TTLPurchaseNoticesData(Base):
+    """Table `two_hundred_twenty_third_law.purchase_notices_data`
+    """
+    __tablename__ = "purchase_notices_data"
+    __table_args__ = ({"schema": "two_hundred_twenty_third_law"})
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    archive_file_id = sa.Column(sa.Integer, sa.ForeignKey(ArchiveFile.id))
+    data = sa.Column(JSONB, nullable=True)
+
+    # projected fields. See `gov.law.util.project_fields`
+    purchase_number = sa.Column(sa.String(50), nullable=True)
+    customer_inn = sa.Column(sa.String(12), nullable=True)
+    region = sa.Column(sa.String(100), nullable=True)
+    max_price = sa.Column(sa.Numeric, nullable=True)
+    publish_date = sa.Column(sa.DateTime, nullable=True)
+
+    # partition keys. See `gov.db._partitions`
+    archive_date = sa.Column(sa.Date, nullable=True)
+
+
+class TTLPurchaseProtocolsData(Base):
+    """Table `two_hundred_twenty_third_law.purchase_protocols_data`
+    """
+    __tablename__ = "purchase_protocols_data"
+    __table_args__ = ({"schema": "two_hundred_twenty_third_law"})
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    archive_file_id = sa.Column(sa.Integer, sa.ForeignKey(ArchiveFile.id))
+    data = sa.Column(JSONB, nullable=True)
+
+    # projected fields. See `gov.law.util.project_fields`
+    purchase_number = sa.Column(sa.String(50), nullable=True)
+    customer_inn = sa.Column(sa.String(12), nullable=True)
+    region = sa.Column(sa.String(100), nullable=True)
+    max_price = sa.Column(sa.Numeric, nullable=True)
+    publish_date = sa.Column(sa.DateTime, nullable=True)
+
+    # partition keys. See `gov.db._partitions`
+    archive_date = sa.Column(sa.Date, nullable=True)
@@ -67,3 +67,25 @@ class WrongFilterFieldError(Error):
 class EmptyValueError(Error):
     def __init__(self, message):
         self.message = message
+
+
+class XMLLimitError(Error):
+    """XML file is above a limit of size, depth or count of elements.
+
+    Args:
+        limit (str): Name of limit, `size`, `depth` or `elements`.
+        max_value (int): Value of limit.
+        value (int): Reached value.
+
+    Attributes:
+        message (str): Error message.
+    """
+
+    def __init__(self, limit, max_value, value):
+        self.message = f"XML file is above the limit of {limit}: {value} > {max_value}"
+        self.limit = limit
+        self.max_value = max_value
+        self.value = value
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+"""Export of data tables to Parquet files.
+
+Rows are read from a data table by batches ordered by `archive_file_id` and written into files partitioned
+by region and month of archive, e.g. `<path>/44/notifications/region=Moskva/month=2019-01/part-0-1.parquet`.
+Projected columns are exported as they are, other fields are taken from XML data by paths from config.
+
+Export is incremental: the key `(archive_file_id, id)` of the last exported row is kept in `_watermark.json`
+of the folder's directory and the next export starts after it.
+The watermark is moved only after all files have been written.
+
+`pyarrow` is an optional dependency, install it by `pip install gov-purchases-crawler[parquet]`.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from .log import get_logger, configure_logging
+from .config import get_config, set_config
+from .law.readers import get_reader_class
+from .law.util import get_value_by_path
+
+
+_BATCH_SIZE = 5000
+_ROW_GROUP_SIZE = 50000
+_MAX_OPEN_FILES = 64
+_WATERMARK_FILE = "_watermark.json"
+_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# watermarks of older versions have only file ID, all rows of the file have been exported
+_LAST_ROW_ID = 2 ** 63 - 1
+# prices are money of XML schemas with 2 fraction digits, values which do not fit are not rounded but rejected
+_PRICE_PRECISION = 38
+_PRICE_SCALE = 2
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("pyarrow is required for export, "
+                          "install it by 'pip install gov-purchases-crawler[parquet]'") from e
+
+    return pyarrow
+
+
+def _get_schema(pa, fields):
+    columns = [
+        ("id", pa.int64()),
+        ("archive_file_id", pa.int64()),
+        ("xml_type", pa.string()),
+        ("purchase_number", pa.string()),
+        ("customer_inn", pa.string()),
+        ("region", pa.string()),
+        ("max_price", pa.decimal128(_PRICE_PRECISION, _PRICE_SCALE)),
+        ("publish_date", pa.timestamp("us")),
+        ("archive_date", pa.date32()),
+    ]
+    columns += [(name, pa.string()) for name in fields]
+
+    return pa.schema(columns)
+
+
+def _flatten_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    elif isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    return str(value)
+
+
+def read_watermark(folder: str) -> tuple:
+    """Get key `(archive_file_id, id)` of the last exported row of the export directory.
+    (0, 0) if nothing has been exported.
+    """
+
+    path = os.path.join(folder, _WATERMARK_FILE)
+    if not os.path.exists(path):
+        return 0, 0
+
+    with open(path, "rt") as f:
+        watermark = json.load(f)
+
+    return int(watermark["archive_file_id"]), int(watermark.get("id", _LAST_ROW_ID))
+
+
+def write_watermark(folder: str, last_key: tuple):
+    path = os.path.join(folder, _WATERMARK_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wt") as f:
+        json.dump({"archive_file_id": last_key[0], "id": last_key[1]}, f)
+    os.replace(tmp_path, path)
+
+
+class ParquetExporter():
+    """Writer of rows into Parquet files partitioned by region and month.
+
+    Rows of a partition are buffered and written by row groups, so memory is bounded by count of
+    open files and size of row group. If there are too many open files, the least recently used one
+    is closed and a new file is started for the partition later.
+    Files are written with `.tmp` suffix and renamed by `close`.
+
+    Args:
+        root (str): Root directory.
+        fields (dict, optional): Flattened fields {column: (tags path inside document)}. Defaults to None.
+        file_prefix (str, optional): Prefix of names of files. Defaults to "part".
+        row_group_size (int, optional): Rows per row group. Defaults to 50000.
+        max_open_files (int, optional): Limit of open files. Defaults to 64.
+    """
+
+    def __init__(self, root: str, fields=None, file_prefix="part", row_group_size=_ROW_GROUP_SIZE,
+                 max_open_files=_MAX_OPEN_FILES):
+        self._pa = _import_pyarrow()
+        self._root = root
+        self._fields = fields or {}
+        self._schema = _get_schema(self._pa, self._fields)
+        self._file_prefix = file_prefix
+        self._row_group_size = row_group_size
+        self._max_open_files = max_open_files
+        self._buffers = {}
+        self._writers = OrderedDict()
+        self._tmp_files = []
+        self._counter = 0
+
+    @staticmethod
+    def get_partition(row: dict) -> tuple:
+        """Region and month of row. Month is taken from date of archive or date of publishing"""
+
+        date = row.get("archive_date") or row.get("publish_date")
+        month = date.strftime("%Y-%m") if date is not None else _DEFAULT_PARTITION
+
+        return row.get("region") or _DEFAULT_PARTITION, month
+
+    def write(self, rows: list, document_getter=None):
+        """Write rows.
+
+        Args:
+            rows (list): Dicts with values of columns and XML data in `data`.
+            document_getter (callable, optional): Gets document by XML type and XML data.
+                Paths of flattened fields are relative to the document. Defaults to None, XML data is used.
+        """
+
+        for row in rows:
+            record = {column: row.get(column) for column in self._schema.names if column not in self._fields}
+
+            if len(self._fields) > 0:
+                data = row.get("data")
+                document = document_getter(row.get("xml_type"), data) if document_getter is not None else data
+                for column, path in self._fields.items():
+                    record[column] = _flatten_value(get_value_by_path(document, path)) if document else None
+
+            partition = self.get_partition(row)
+            buffer = self._buffers.setdefault(partition, [])
+            buffer.append(record)
+            if len(buffer) >= self._row_group_size:
+                self._flush(partition)
+
+    def _flush(self, partition: tuple):
+        buffer = self._buffers.pop(partition, None)
+        if not buffer:
+            return
+
+        writer = self._writers.pop(partition, None)
+        if writer is None:
+            writer = self._open_writer(partition)
+        self._writers[partition] = writer
+
+        writer.write_table(self._pa.Table.from_pylist(buffer, schema=self._schema))
+
+    def _open_writer(self, partition: tuple):
+        while len(self._writers) >= self._max_open_files:
+            _, writer = self._writers.popitem(last=False)
+            writer.close()
+
+        region, month = partition
+        folder = os.path.join(self._root, f"region={region}", f"month={month}")
+        os.makedirs(folder, exist_ok=True)
+
+        self._counter += 1
+        path = os.path.join(folder, f"{self._file_prefix}-{self._counter}.parquet.tmp")
+        self._tmp_files.append(path)
+
+        return self._pa.parquet.ParquetWriter(path, self._schema)
+
+    def close(self):
+        """Write buffered rows, close files and give them final names"""
+
+        for partition in list(self._buffers):
+            self._flush(partition)
+
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+        for path in self._tmp_files:
+            os.replace(path, path[:-len(".tmp")])
+        self._tmp_files = []
+
+    def abort(self):
+        """Close files and remove them"""
+
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self._buffers.clear()
+
+        for path in self._tmp_files:
+            if os.path.exists(path):
+                os.remove(path)
+        self._tmp_files = []
+
+
+def _get_fields(cfg: dict) -> dict:
+    """Flattened fields from config, {column: "tag.tag"}"""
+
+    fields = cfg.get("fields") or {}
+    return {column: tuple(path.split(".")) for column, path in fields.items()}
+
+
+def export(law_number: str, folder_name: str, config) -> int:
+    """Export new rows of the folder's data table.
+
+    Args:
+        law_number (str): Law number.
+        folder_name (str): Folder name.
+        config (Config): Config.
+
+    Returns:
+        int: Count of exported rows.
+    """
+
+    log = get_logger(__name__)
+    cfg = config("app.export") or {}
+    if not cfg.get("path"):
+        raise ValueError("app.export.path has to be set in config to export data")
+
+    reader_class = get_reader_class(law_number, folder_name)
+    db = reader_class._DB_CLASS(config)
+    root = os.path.join(cfg["path"], law_number, folder_name)
+    batch_size = int(cfg.get("batch_size") or _BATCH_SIZE)
+    last_key = read_watermark(root)
+    log.info("Export rows of %s/%s after file %s, row %s", law_number, folder_name, *last_key)
+
+    exporter = ParquetExporter(
+        root, _get_fields(cfg), file_prefix=f"part-{last_key[0]}-{last_key[1]}",
+        row_group_size=int(cfg.get("row_group_size") or _ROW_GROUP_SIZE),
+        max_open_files=int(cfg.get("max_open_files") or _MAX_OPEN_FILES))
+    count = 0
+
+    try:
+        while True:
+            rows = db.get_export_batch(reader_class._DATA_TABLE, last_key, batch_size)
+            if len(rows) == 0:
+                break
+
+            exporter.write(rows, reader_class._get_document)
+            last_key = (rows[-1]["archive_file_id"], rows[-1]["id"])
+            count += len(rows)
+            log.info("Exported %s row(s), last file ID is %s", count, last_key[0])
+    except BaseException:
+        exporter.abort()
+        raise
+
+    exporter.close()
+    if count > 0:
+        write_watermark(root, last_key)
+
+    return count
+
+
+def run(config=None):
+    config = config if config is not None else get_config()
+    set_config(config)
+    configure_logging(config)
+    log = get_logger(__name__)
+
+    for law_number, folder_name in config("app.targets"):
+        count = export(law_number, folder_name, config)
+        log.info("Total were exported: %s row(s) of folder '%s' of law %s", count, folder_name, law_number)
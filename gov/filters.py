@@ -279,6 +279,9 @@ class _Filters():
     def __init__(self, prepared_filters: dict):
         self._date_filter = prepared_filters.get("date")
         self._region_filter = prepared_filters.get("region")
+        # results of region filter by region. There are few regions and every archive of
+        # a region has the same interned string, so the filter is invoked once per region
+        self._region_results = {}
 
     @property
     def has_date_filter(self):
@@ -317,7 +320,11 @@ class _Filters():
         if not self.has_region_filter:
             return False
 
-        return self._invoke_filter(region, self._region_filter)
+        result = self._region_results.get(region)
+        if result is None:
+            result = self._region_results[region] = self._invoke_filter(region, self._region_filter)
+
+        return result
 
     def _invoke_filter(self, filtered_value, filter_dict):
         op_func = _OPERATORS[filter_dict["match"]]
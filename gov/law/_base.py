@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+
+import os
+import zlib
+from contextlib import closing
+from zipfile import ZipFile
+from ..db import FileStatus as DBFileStatus
+from ..log import get_logger
+from ..config import get_config
+from ..blobs import BlobStore
+from ..errors import XMLLimitError
+from ..parse_cache import ParseCache
+from ..progress import Progress
+from ..util import get_archive_date
+from . import util
+from ._reasons import Reason, ReasonCode, get_reason_by_code
+from ._zip import MmapZipFile, inflate_ahead
+
+
+_ZIP_READER_MMAP = "mmap"
+_ZIP_READER_STDLIB = "zipfile"
+_DEFAULT_INFLATE_THREADS = 4
+
+
+NO_XML_DATA_REASON = "There is no valid XML data in the file"
+
+
+class BaseReader():
+    """The base class for readers of archives. Readers of laws inherit from this one.
+
+    A reader of a folder sets DB client class of its law in `_DB_CLASS`, its data table in `_DATA_TABLE`,
+    handlers of XML tags and projected fields, and implements `_insert_data`.
+    `_PARSER_VERSION` has to be increased when results of parsing are changed in a way
+    which is not seen from skipped tags and names of handlers, e.g. a handler is changed.
+    """
+
+    _DB_CLASS = None
+    _DATA_TABLE = None
+    _XML_TYPE_FROM_ROOT = False
+
+    _TAG_HANDLERS = {}
+    _SKIP_TAGS = ()
+    _PROJECTED_FIELDS = {}
+    _PARSER_VERSION = 1
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config (Config, optional): Config. Defaults to None, the installed config is used.
+        """
+
+        self.log = get_logger(__name__)
+        self._conf = config if config is not None else get_config()
+        self.db = self._DB_CLASS(self._conf)
+        self._files = {}
+        self._db_namespace = None
+        self._projected_columns = self.get_projected_columns(self._conf)
+        self._blobs = BlobStore.from_config(self._conf)
+        self._parse_cache = ParseCache.from_config(self._conf)
+        self._inflate_threads = self._get_inflate_threads()
+        self._xml_limits = self.get_xml_limits(self._conf)
+        self._progress = Progress()
+
+    @classmethod
+    def get_projected_columns(cls, config):
+        """Columns which should be filled from XML data. All known by default.
+        The list can be restricted by `app.projected_fields` in config.
+        """
+
+        columns = config("app.projected_fields")
+        if columns is None:
+            return None
+
+        return frozenset(columns)
+
+    @classmethod
+    def get_xml_limits(cls, config) -> util.XMLLimits:
+        """Limits of XML files from `app.xml_limits` of config. Files above them are quarantined.
+
+        Raises:
+            ValueError: A limit is not positive.
+        """
+
+        cfg = config("app.xml_limits") or {}
+        limits = util.XMLLimits(*(default if cfg.get(name) is None else int(cfg[name])
+                                  for name, default in util.DEFAULT_XML_LIMITS._asdict().items()))
+        for name, value in limits._asdict().items():
+            if value <= 0:
+                raise ValueError(f"app.xml_limits.{name} has to be positive")
+
+        return limits
+
+    @classmethod
+    def parse(cls, xml: bytes, columns=None, limits=None):
+        """Parse raw XML file and extract projected fields.
+
+        Args:
+            xml (bytes): Raw XML file data.
+            columns (iterable, optional): Columns which should be projected. Defaults to all.
+            limits (XMLLimits, optional): Limits of XML file. Defaults to `util.DEFAULT_XML_LIMITS`.
+
+        Raises:
+            XMLLimitError: The file is above a limit.
+
+        Returns:
+            tuple: XML type, parsed XML data and values of projected columns.
+        """
+
+        xml_type, file_data = cls.parse_xml(xml, limits)
+
+        return xml_type, file_data, cls._project_parsed(xml_type, file_data, columns)
+
+    @classmethod
+    def parse_xml(cls, xml: bytes, limits=None) -> tuple:
+        """Parse raw XML file by skipped tags and handlers of tags of the reader.
+
+        Returns:
+            tuple: XML type and parsed XML data.
+        """
+
+        return util.get_xml_data(xml, cls._SKIP_TAGS, cls._TAG_HANDLERS, cls._XML_TYPE_FROM_ROOT, limits)
+
+    @classmethod
+    def _project_parsed(cls, xml_type: str, file_data: dict, columns=None) -> dict:
+        if len(file_data) == 0:
+            return {}
+
+        return cls.project(xml_type, file_data, columns)
+
+    @classmethod
+    def get_parser_version(cls) -> str:
+        """Version of parser of the reader for the parse cache.
+        It is changed with the reader class, `_PARSER_VERSION`, skipped tags and handlers of tags.
+        """
+
+        handlers = sorted(f"{tag}={getattr(handler, '__qualname__', repr(handler))}"
+                          for tag, handler in cls._TAG_HANDLERS.items())
+        description = repr((sorted(cls._SKIP_TAGS), handlers, cls._XML_TYPE_FROM_ROOT))
+
+        return f"{cls.__module__}.{cls.__qualname__}:{cls._PARSER_VERSION}:{zlib.crc32(description.encode()):08x}"
+
+    @classmethod
+    def project(cls, xml_type: str, file_data: dict, columns=None) -> dict:
+        """Extract projected fields from parsed XML data.
+
+        Args:
+            xml_type (str): Name of root XML element.
+            file_data (dict): Parsed XML data.
+            columns (iterable, optional): Columns which should be projected. Defaults to all.
+
+        Returns:
+            dict: Values of columns.
+        """
+
+        return util.project_fields(cls._get_document(xml_type, file_data), cls._PROJECTED_FIELDS, columns)
+
+    @classmethod
+    def _get_document(cls, xml_type: str, file_data: dict):
+        """Element of parsed XML data which paths of projected fields are relative to"""
+
+        if cls._XML_TYPE_FROM_ROOT:
+            return file_data
+
+        return file_data.get(xml_type) if isinstance(file_data, dict) else None
+
+    def set_killer(self, killer):
+        self.killer = killer
+
+    def set_progress(self, progress: Progress):
+        self._progress = progress
+
+    def _has_archive_file(self, archive_id: int, fname: str, fsize: int) -> bool:
+        file_status = self.db.get_archive_file_status(archive_id, fname, fsize)
+
+        if file_status == DBFileStatus.FILE_DOES_NOT_EXIST:
+            return False
+        elif file_status == DBFileStatus.FILE_EXISTS:
+            return True
+        elif file_status == DBFileStatus.FILE_EXISTS_BUT_NOT_PARSED:
+            self._files[fname] = ReasonCode.FILE_EXISTS_BUT_NOT_PARSED
+            return True
+        elif file_status == DBFileStatus.FILE_EXISTS_BUT_SIZE_DIFFERENT:
+            self._files[fname] = ReasonCode.FILE_EXISTS_BUT_SIZE_DIFFERENT
+            return True
+
+        return False
+
+    def _need_to_update_file(self, fname: str) -> bool:
+        if fname not in self._files:
+            return False
+
+        return True
+
+    def _get_inflate_threads(self) -> int:
+        """Count of threads which inflate next files of archive while the current one is parsed"""
+
+        threads = self._conf("app.inflate_threads")
+        if threads is not None:
+            return int(threads)
+
+        return min(_DEFAULT_INFLATE_THREADS, os.cpu_count() or 1)
+
+    def _open_archive(self, archive: str):
+        """Open archive by reader from `app.zip_reader` of config, `mmap` by default.
+        Archives with members which cannot be read through memory mapping are opened by `ZipFile`.
+
+        Raises:
+            ValueError: Unknown reader of archives.
+        """
+
+        zip_reader = self._conf("app.zip_reader") or _ZIP_READER_MMAP
+        if zip_reader not in (_ZIP_READER_MMAP, _ZIP_READER_STDLIB):
+            raise ValueError(f"Unknown zip_reader {zip_reader}; available are {_ZIP_READER_MMAP}, {_ZIP_READER_STDLIB}")
+
+        if zip_reader == _ZIP_READER_MMAP:
+            zip_file = MmapZipFile(archive)
+            if zip_file.is_supported():
+                return zip_file
+            zip_file.close()
+
+        return ZipFile(archive, "r")
+
+    def handle_archive(self, archive: str, archive_id: int, region=None):
+        """Handling of archive. Read, parse and write to DB.
+
+        The archive is written by one transaction which is committed at the end. Every file is written
+        inside its own SAVEPOINT, so a broken file is rolled back alone and the rest of archive is kept.
+        If the archive is interrupted by an error, nothing of it is kept and it is read again next time.
+
+        Args:
+            archive (str): Name of archive file.
+            archive_id (int): ID of archive in DB.
+            region (str, optional): Region of archive on FTP server. Defaults to None.
+
+        Returns:
+            bool: False if one or more files have not been parsed,
+                None if reading of archive has been interrupted by signal.
+        """
+
+        has_wrong_files = False
+        has_killed = False
+        failed_files = []
+        archive_date, error = get_archive_date(os.path.basename(archive))
+        if error is not None:
+            self.log.warning("Cannot get date of archive %s: %s", archive, error)
+        partition_fields = {
+            "region": region,
+            "archive_date": archive_date.date() if archive_date is not None else None
+        }
+        # DDL of partition locks the partitioned table, so it is not run by the long transaction of archive
+        self.db.prepare_partition(self._DATA_TABLE, partition_fields)
+        session = self.db.get_session()
+        try:
+            with self._open_archive(archive) as zip_file:
+                files_counter = sum(1 for entry in zip_file.infolist() if entry.filename.endswith(".xml"))
+                files_to_parse = self._iter_files_to_parse(zip_file, archive_id, session, failed_files)
+                files = inflate_ahead(zip_file, files_to_parse, self._inflate_threads)
+
+                # files have to be inflated before the archive is closed
+                with closing(files):
+                    for entry, need_to_update, xml in files:
+                        if self.killer.kill_now:
+                            has_killed = True
+                            break
+
+                        if not self._handle_file(archive_id, entry, need_to_update, xml, partition_fields, session):
+                            has_wrong_files = True
+
+            has_wrong_files = has_wrong_files or len(failed_files) > 0
+            result = self._finish_archive(archive_id, files_counter, has_wrong_files, has_killed, session)
+            session.commit()
+        finally:
+            session.close()
+
+        return result
+
+    def _finish_archive(self, archive_id: int, files_counter: int, has_wrong_files: bool, has_killed: bool,
+                        session) -> bool:
+        """Mark archive by results of its files in the transaction of archive.
+
+        Returns:
+            bool: False if one or more files have not been parsed, None if the archive has been interrupted.
+        """
+
+        if has_killed:
+            # parsed files are kept, the rest of archive is read next time
+            self.log.info("Gracefully stop reading archive because of signal")
+            return None
+        elif has_wrong_files:
+            self.log.warning("One or more file(s) of archive %s weren't parsed. Archive is not marked as parsed",
+                             archive_id)
+            self.db.update_archive(archive_id, reason="One or more file(s) of archive weren't parsed",
+                                   session=session)
+            return False
+        elif files_counter == 0:
+            self.log.info("There is not one XML file in the archive")
+            self.db.update_archive(archive_id, reason="Archive is empty", session=session)
+            self.db.mark_archive_as_parsed(archive_id, session=session)
+            return True
+        else:
+            self.db.mark_archive_as_parsed(archive_id, session=session)
+            return True
+
+    def _iter_files_to_parse(self, zip_file, archive_id: int, session, failed_files: list):
+        """XML files of archive which have not been parsed yet.
+        Files above the size limit are quarantined instead, names of ones which have failed are added
+        to `failed_files`.
+
+        Yields:
+            tuple: Entry of file and flag, if the file exists in DB and has to be updated.
+        """
+
+        for entry in zip_file.infolist():
+            if not entry.filename.endswith(".xml"):
+                continue
+
+            # check existing of file
+            need_to_update = False
+            if self._has_archive_file(archive_id, entry.filename, entry.file_size):
+                # we already have this parsed file. Just skip it.
+                if not self._need_to_update_file(entry.filename):
+                    self.log.debug("The file %s had been parsed early. Skip it.", entry.filename,
+                                   extra={"stage": "skip_file"})
+                    continue
+
+                need_to_update = True
+
+            # a too large file is not even inflated
+            if entry.file_size > self._xml_limits.max_size:
+                if not self._quarantine_large_file(archive_id, entry, need_to_update, session):
+                    failed_files.append(entry.filename)
+                continue
+
+            yield entry, need_to_update
+
+    def _quarantine_large_file(self, archive_id: int, entry, need_to_update: bool, session) -> bool:
+        """Register file above the size limit and quarantine it inside a SAVEPOINT of the archive's transaction.
+
+        Returns:
+            bool: False if the file has not been written to DB.
+        """
+
+        error = XMLLimitError("size", self._xml_limits.max_size, entry.file_size)
+        try:
+            with self.db.savepoint(session):
+                file_id = self._register_file(archive_id, entry, need_to_update, session)
+                self._quarantine_file(file_id, entry, error, session)
+        except Exception as e:
+            self.log.error("Got exception during quarantine file %s: %s", entry.filename, e)
+            self._progress.add(files_failed=1)
+            return False
+
+        return True
+
+    def _register_file(self, archive_id: int, entry, need_to_update: bool, session, blob_key=None) -> int:
+        """Add file to DB or prepare existing one to be parsed again.
+
+        Returns:
+            int: ID of file.
+        """
+
+        fname = entry.filename
+        fsize = entry.file_size
+
+        if not need_to_update:
+            return self.db.add_archive_file(archive_id, fname, fsize, blob_key, session=session)
+
+        file = self.db.get_archive_file(archive_id, fname, fsize, session=session)
+        if self._files[fname] == ReasonCode.FILE_EXISTS_BUT_SIZE_DIFFERENT:
+            self.db.delete_file_data(file.id, session=session)
+        if blob_key is not None and file.blob_key != blob_key:
+            self.db.update_archive_file(file.id, blob_key=blob_key, session=session)
+
+        return file.id
+
+    def _quarantine_file(self, file_id: int, entry, error: XMLLimitError, session):
+        """Keep file above limits in quarantine instead of parsing. The file is not parsed again"""
+
+        # every quarantined file is logged, the stage is not sampled like parse_file
+        self.log.warning("Quarantine file %s: %s", entry.filename, error.message, extra={"stage": "quarantine"})
+        self.db.quarantine_archive_file(file_id, error.limit, error.message, session=session)
+        self._progress.add(files_quarantined=1)
+        self._files.pop(entry.filename, None)
+
+    def _handle_file(self, archive_id: int, entry, need_to_update: bool, xml: bytes, partition_fields: dict,
+                     session) -> bool:
+        """Register file in DB, parse it and upload its data inside a SAVEPOINT of the archive's transaction.
+
+        Returns:
+            bool: False if the file has not been parsed.
+        """
+
+        fname = entry.filename
+        reason = get_reason_by_code(self._files[fname]) if need_to_update else None
+        result = True
+
+        # keep raw file for audits and reparsing
+        blob_key = self._blobs.put(xml) if self._blobs is not None else None
+
+        self.log.info("Parse XML file %s", fname, extra={"stage": "parse_file"})
+        try:
+            with self.db.savepoint(session):
+                file_id = self._register_file(archive_id, entry, need_to_update, session, blob_key)
+                try:
+                    self._parse_and_upload_xml(xml, file_id, reason, partition_fields, entry, session)
+                except XMLLimitError as e:
+                    # limits are met by parsing, before data of the file are written
+                    self._quarantine_file(file_id, entry, e, session)
+        except Exception as e:
+            self.log.error("Got exception during parse file %s: %s", fname, e)
+            self._progress.add(files_failed=1)
+            result = False
+
+        if fname in self._files:
+            del self._files[fname]
+
+        return result
+
+    def _parse_and_upload_xml(self, xml: bytes, file_id: int, reason=None, archive_fields=None, entry=None,
+                              session=None):
+        """Parse XML file. Upload its data to DB.
+
+        Args:
+            xml (bytes): Raw XML file data.
+            file_id (int): ID of row with file info from DB.
+            reason (str, optional): Defaults to None. Field 'reason' for saving in DB.
+            archive_fields (dict, optional): Defaults to None. Fields which come from archive, `region` and `archive_date`.
+            entry (ZipEntry or ZipInfo, optional): Entry of file in archive. Defaults to None.
+                Results of parsing are cached by its CRC-32 and size.
+            session (Session, optional): DB session of archive. Defaults to None, data of the file are
+                committed by its own transaction.
+        """
+
+        xml_type, file_data = self._get_xml_data(xml, entry)
+        fields = self._project_parsed(xml_type, file_data, self._projected_columns)
+        reason = reason if reason is not None else "OK"
+
+        if len(file_data) == 0:
+            self.log.warn(reason)
+            self.db.mark_archive_file_as_parsed(file_id, xml_type=xml_type,
+                                                reason=NO_XML_DATA_REASON, session=session)
+            self._progress.add(files_parsed=1)
+            return
+
+        # we should save all changes by one transaction.
+        fields.update(archive_fields or {})
+
+        sess = session if session is not None else self.db.get_session()
+        self._insert_data(file_id, file_data, sess, fields)
+        self.db.mark_archive_file_as_parsed(file_id, xml_type, reason=reason, session=sess)
+        if session is None:
+            sess.commit()
+            sess.close()
+        self._progress.add(files_parsed=1, rows_inserted=1)
+
+    def _get_xml_data(self, xml: bytes, entry=None) -> tuple:
+        """XML type and parsed XML data. They are taken from the parse cache if the file has been parsed early"""
+
+        if self._parse_cache is None or entry is None:
+            return self.parse_xml(xml, self._xml_limits)
+
+        # a file above limits has to be quarantined, so results of parsing are kept per limits
+        version = "{}:{}".format(self.get_parser_version(), ",".join(str(limit) for limit in self._xml_limits))
+        result = self._parse_cache.get(entry.CRC, entry.file_size, version, xml)
+        if result is not None:
+            self.log.debug("Take parsed file %s from cache", entry.filename, extra={"stage": "parse_file"})
+            return result
+
+        result = self.parse_xml(xml, self._xml_limits)
+        self._parse_cache.put(entry.CRC, entry.file_size, version, xml, result)
+
+        return result
+
+    def _insert_data(self, *args):
+        raise NotImplementedError(f"It has to be implemeted in {self.__class__.__name__}")
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from ..db import TwoHundredTwentyThirdLawDB
+from ..db.models import TTLPurchaseNoticesData, TTLPurchaseProtocolsData
+from . import util
+from ._base import BaseReader
+
+
+# handlers of leaf tags which are common for all 223rd law documents
+_COMMON_TAG_HANDLERS = {
+    "initialSum": util.number_replace,
+    "publicationDateTime": util.date_replace,
+    "createDateTime": util.date_replace,
+    "modificationDate": util.date_replace,
+}
+
+# fields which are extracted from XML data into columns of data tables.
+# Format is {column: (paths inside root XML element, converter)}
+_NOTICES_PROJECTED_FIELDS = {
+    "purchase_number": ((("body", "item", "purchaseNoticeData", "registrationNumber"),), util.to_str),
+    "customer_inn": ((("body", "item", "purchaseNoticeData", "customer", "mainInfo", "inn"),), util.to_str),
+    "max_price": ((("body", "item", "purchaseNoticeData", "lots", "lot", "lotData", "initialSum"),),
+                  util.to_decimal),
+    "publish_date": ((("body", "item", "purchaseNoticeData", "publicationDateTime"),), util.to_datetime),
+}
+_PROTOCOLS_PROJECTED_FIELDS = {
+    "purchase_number": ((("body", "item", "purchaseProtocolData", "purchaseInfo", "purchaseNoticeNumber"),),
+                        util.to_str),
+    "customer_inn": ((("body", "item", "purchaseProtocolData", "customer", "mainInfo", "inn"),), util.to_str),
+    "publish_date": ((("body", "item", "purchaseProtocolData", "publicationDateTime"),), util.to_datetime),
+}
+
+
+class _TwoHundredTwentyThirdLawBase(BaseReader):
+    """The base class for 223rd law readers.
+    Documents of 223rd law have no wrapping `export` element, so the root element is the type of XML.
+    """
+
+    _DB_CLASS = TwoHundredTwentyThirdLawDB
+    _XML_TYPE_FROM_ROOT = True
+
+
+class TwoHundredTwentyThirdLawNotices(_TwoHundredTwentyThirdLawBase):
+    """Handler of `purchaseNotice` folder of 223rd law"""
+
+    _TAG_HANDLERS = util.compile_tag_handlers(_COMMON_TAG_HANDLERS)
+    _SKIP_TAGS = ("signature",)
+    _PROJECTED_FIELDS = _NOTICES_PROJECTED_FIELDS
+    _DATA_TABLE = TTLPurchaseNoticesData
+
+    def _insert_data(self, *args):
+        self.db.insert_notice_data(*args)
+
+
+class TwoHundredTwentyThirdLawProtocols(_TwoHundredTwentyThirdLawBase):
+    """Handler of `purchaseProtocol` folder of 223rd law"""
+
+    _TAG_HANDLERS = util.compile_tag_handlers(_COMMON_TAG_HANDLERS)
+    _SKIP_TAGS = ("signature",)
+    _PROJECTED_FIELDS = _PROTOCOLS_PROJECTED_FIELDS
+    _DATA_TABLE = TTLPurchaseProtocolsData
+
+    def _insert_data(self, *args):
+        self.db.insert_protocol_data(*args)
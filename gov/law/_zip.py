@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""Reader of zip archives through a memory mapping.
+
+The archive is mapped once. The central directory is parsed straight from the mapping and data of members
+is given to the decompressor as slices of the mapping, without reads into intermediate buffers.
+Only stored and deflated members are supported, encrypted members are not. ZIP64 archives are supported.
+
+`inflate_ahead` reads next members by a pool of threads while the current one is handled. zlib releases the GIL
+and the mapping is shared by threads, so members are inflated in parallel.
+"""
+
+import mmap
+import struct
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import BadZipFile, ZIP_STORED, ZIP_DEFLATED
+
+
+ZipEntry = namedtuple("ZipEntry", ("filename", "file_size", "compress_size", "compress_type", "CRC",
+                                   "header_offset", "flag_bits"))
+
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_ZIP64_EXTRA_ID = 0x0001
+_MAX_COMMENT_SIZE = 0xFFFF
+_FLAG_ENCRYPTED = 0x1
+_FLAG_UTF8 = 0x800
+
+
+class MmapZipFile():
+    """Zip archive opened through a memory mapping. Only reading is supported.
+
+    Args:
+        path (str): Path to archive.
+
+    Raises:
+        BadZipFile: The file is not a zip archive.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self._file.close()
+            raise BadZipFile(f"File is not a zip file: {path}")
+
+        try:
+            self._entries = self._read_central_directory()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._file.close()
+
+    def infolist(self) -> list:
+        return list(self._entries)
+
+    def namelist(self) -> list:
+        return [entry.filename for entry in self._entries]
+
+    def is_supported(self) -> bool:
+        """Can all members be read. Otherwise `zipfile.ZipFile` has to be used"""
+
+        return all(entry.compress_type in (ZIP_STORED, ZIP_DEFLATED) and not entry.flag_bits & _FLAG_ENCRYPTED
+                   for entry in self._entries)
+
+    def getinfo(self, name: str) -> ZipEntry:
+        for entry in self._entries:
+            if entry.filename == name:
+                return entry
+
+        raise KeyError(f"There is no item named {name!r} in the archive")
+
+    def _find_eocd(self) -> int:
+        size = len(self._mmap)
+        start = max(0, size - _EOCD.size - _MAX_COMMENT_SIZE)
+        offset = self._mmap.rfind(_EOCD_SIGNATURE, start)
+        if offset < 0 or offset + _EOCD.size > size:
+            raise BadZipFile("File is not a zip file")
+
+        return offset
+
+    def _read_central_directory(self) -> list:
+        eocd_offset = self._find_eocd()
+        _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(self._mmap, eocd_offset)
+
+        locator_offset = eocd_offset - _ZIP64_LOCATOR.size
+        if locator_offset >= 0 and self._mmap[locator_offset:locator_offset + 4] == _ZIP64_LOCATOR_SIGNATURE:
+            _, _, zip64_offset, _ = _ZIP64_LOCATOR.unpack_from(self._mmap, locator_offset)
+            record = _ZIP64_EOCD.unpack_from(self._mmap, zip64_offset)
+            if record[0] != _ZIP64_EOCD_SIGNATURE:
+                raise BadZipFile("Bad ZIP64 end of central directory")
+            count, cd_size, cd_offset = record[7], record[8], record[9]
+
+        entries = []
+        offset = cd_offset
+        for _ in range(count):
+            header = _CENTRAL_HEADER.unpack_from(self._mmap, offset)
+            if header[0] != _CENTRAL_HEADER_SIGNATURE:
+                raise BadZipFile("Bad magic number of central directory")
+
+            flag_bits, compress_type, crc = header[5], header[6], header[9]
+            compress_size, file_size, header_offset = header[10], header[11], header[18]
+            name_len, extra_len, comment_len = header[12], header[13], header[14]
+
+            name_start = offset + _CENTRAL_HEADER.size
+            raw_name = self._mmap[name_start:name_start + name_len]
+            filename = raw_name.decode("utf-8" if flag_bits & _FLAG_UTF8 else "cp437")
+
+            if 0xFFFFFFFF in (compress_size, file_size, header_offset):
+                file_size, compress_size, header_offset = self._read_zip64_extra(
+                    name_start + name_len, extra_len, file_size, compress_size, header_offset)
+
+            entries.append(ZipEntry(filename, file_size, compress_size, compress_type, crc, header_offset, flag_bits))
+            offset = name_start + name_len + extra_len + comment_len
+
+        return entries
+
+    def _read_zip64_extra(self, offset: int, length: int, file_size: int, compress_size: int, header_offset: int):
+        """Take 64-bit values of fields which are 0xFFFFFFFF in the central directory"""
+
+        end = offset + length
+        while offset + 4 <= end:
+            extra_id, size = struct.unpack_from("<2H", self._mmap, offset)
+            if extra_id == _ZIP64_EXTRA_ID:
+                position = offset + 4
+                values = []
+                for value in (file_size, compress_size, header_offset):
+                    if value == 0xFFFFFFFF:
+                        values.append(struct.unpack_from("<Q", self._mmap, position)[0])
+                        position += 8
+                    else:
+                        values.append(value)
+                return tuple(values)
+            offset += 4 + size
+
+        raise BadZipFile("Lost ZIP64 extra field")
+
+    def read(self, entry) -> bytes:
+        """Read and decompress data of member.
+
+        Args:
+            entry (ZipEntry or str): Member or its name.
+
+        Returns:
+            bytes: Data of member.
+
+        Raises:
+            BadZipFile: Data of member is corrupted.
+            NotImplementedError: Compression method or encryption is not supported.
+        """
+
+        if isinstance(entry, str):
+            entry = self.getinfo(entry)
+
+        if entry.flag_bits & _FLAG_ENCRYPTED:
+            raise NotImplementedError(f"Encrypted member {entry.filename} is not supported")
+
+        header = _LOCAL_HEADER.unpack_from(self._mmap, entry.header_offset)
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise BadZipFile(f"Bad magic number of member {entry.filename}")
+
+        start = entry.header_offset + _LOCAL_HEADER.size + header[10] + header[11]
+        with memoryview(self._mmap) as view:
+            compressed = view[start:start + entry.compress_size]
+            try:
+                if entry.compress_type == ZIP_STORED:
+                    data = bytes(compressed)
+                elif entry.compress_type == ZIP_DEFLATED:
+                    # output is bounded by the declared size, so a member cannot inflate without limit
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    data = decompressor.decompress(compressed, entry.file_size + 1)
+                    if decompressor.unconsumed_tail:
+                        raise BadZipFile(f"Member {entry.filename} is larger than its declared size")
+                else:
+                    raise NotImplementedError(
+                        f"Compression method {entry.compress_type} of member {entry.filename} is not supported")
+            finally:
+                compressed.release()
+
+        if len(data) != entry.file_size:
+            raise BadZipFile(f"Size of member {entry.filename} differs from its declared size")
+
+        if zlib.crc32(data) != entry.CRC:
+            raise BadZipFile(f"Bad CRC-32 of member {entry.filename}")
+
+        return data
+
+
+def inflate_ahead(zip_file, items, threads: int, depth=None):
+    """Read members of archive by a pool of threads ahead of the consumer.
+
+    Members are yielded in the order of `items`. At most `depth` members are read or kept ahead,
+    so memory is bounded by `depth` members. The generator has to be closed before the archive.
+
+    Args:
+        zip_file (MmapZipFile or ZipFile): Opened archive.
+        items (iterable): Tuples, the first element of tuple is entry of member.
+        threads (int): Count of threads. Members are read in the current thread if it is less than 2.
+        depth (int, optional): Count of members ahead. Defaults to twice count of threads.
+
+    Yields:
+        tuple: The item with data of member appended.
+    """
+
+    if threads < 2:
+        for item in items:
+            yield item + (zip_file.read(item[0]),)
+        return
+
+    depth = depth or threads * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="inflate") as executor:
+        try:
+            for item in items:
+                pending.append((item, executor.submit(zip_file.read, item[0])))
+                if len(pending) >= depth:
+                    ready_item, future = pending.popleft()
+                    yield ready_item + (future.result(),)
+
+            while len(pending) > 0:
+                ready_item, future = pending.popleft()
+                yield ready_item + (future.result(),)
+        finally:
+            for _, future in pending:
+                future.cancel()
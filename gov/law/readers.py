@@ -1,18 +1,101 @@
-
 # -*- coding: utf-8 -*-
 
 """A module for working with purchases over different laws.
+
+Readers are registered by law number and folder name on FTP server. Modules of readers are imported
+and readers are created only when they are requested, so unused readers cost nothing.
 """
 
 
-from . import _ffl_readers
+import importlib
+
+
+# (law number, folder name) -> (module, class name) or class
+_REGISTRY = {
+    ("44", "notifications"): ("._ffl_readers", "FortyFourthLawNotifications"),
+    ("44", "protocols"): ("._ffl_readers", "FortyFourthLawProtocols"),
+    ("223", "purchaseNotice"): ("._ttl_readers", "TwoHundredTwentyThirdLawNotices"),
+    ("223", "purchaseProtocol"): ("._ttl_readers", "TwoHundredTwentyThirdLawProtocols"),
+}
+
+
+def register_reader(law_number: str, folder_name: str, reader_class):
+    """Register a reader of folder.
+
+    Args:
+        law_number (str): Law number.
+        folder_name (str): Folder name on FTP server.
+        reader_class (type): Class of reader, a subclass of `gov.law._base.BaseReader`.
+    """
+
+    _REGISTRY[(str(law_number), folder_name)] = reader_class
+
+
+def get_reader_class(law_number: str, folder_name: str):
+    """Get class of reader of folder.
+
+    Raises:
+        WrongReaderLawError: There is no reader for the law and folder.
+    """
+
+    key = (str(law_number), folder_name)
+    if key not in _REGISTRY:
+        from ..errors import WrongReaderLawError
+        raise WrongReaderLawError(f"{law_number}/{folder_name}")
+
+    reader_class = _REGISTRY[key]
+    if isinstance(reader_class, tuple):
+        module_name, class_name = reader_class
+        reader_class = getattr(importlib.import_module(module_name, __package__), class_name)
+        _REGISTRY[key] = reader_class
+
+    return reader_class
+
+
+def get_available_laws() -> tuple:
+    return tuple(sorted({law for law, _ in _REGISTRY}))
+
+
+def get_available_folders(law_number: str) -> tuple:
+    return tuple(folder for law, folder in _REGISTRY if law == str(law_number))
+
+
+class Readers():
+    """Lazy container of readers.
+
+    Args:
+        killer (_GracefulKiller): Handler of external signals.
+        config (Config, optional): Config. Defaults to None, the installed config is used.
+        progress (Progress, optional): Progress of run which readers count files in. Defaults to None.
+    """
+
+    def __init__(self, killer, config=None, progress=None):
+        self._killer = killer
+        self._config = config
+        self._progress = progress
+        self._readers = {}
+
+    def get(self, law_number: str, folder_name: str):
+        """Get reader of folder. The reader and its DB client are created on the first call."""
+
+        key = (str(law_number), folder_name)
+        if key not in self._readers:
+            reader = get_reader_class(*key)(self._config)
+            reader.set_killer(self._killer)
+            if self._progress is not None:
+                reader.set_progress(self._progress)
+            self._readers[key] = reader
+
+        return self._readers[key]
+
 
+class FFLReaders(Readers):
+    """Entry point for readers of 44th law"""
 
-class FFLReaders():
-    """Entry point for readers"""
+    @property
+    def notifications(self):
+        return self.get("44", "notifications")
 
-    def __init__(self, killer):
-        self.notifications = _ffl_readers.FortyFourthLawNotifications()
-        self.notifications.set_killer(killer)
-        self.protocols = _ffl_readers.FortyFourthLawProtocols()
-        self.protocols.set_killer(killer)
+    @property
+    def protocols(self):
+        return self.get("44", "protocols")
@@ -1,7 +1,25 @@
 
 # -*- coding: utf-8 -*-
 
+import re
+from collections import namedtuple
+from datetime import datetime as dt, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from io import BytesIO
 from lxml import etree
+from ..errors import XMLLimitError
+
+
+_NUMBER_PATTERN = re.compile(r"^-?\d+(\.\d+)?$")
+_DATE_PATTERN = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})"
+    r"(?:T(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6})\d*)?)?)?"
+    r"(Z|[+-]\d{2}:\d{2})?$")
+_DATE_WITH_ZONE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[+-]\d{2}:\d{2}$")
+
+# limits of XML file which is parsed in memory. A file above any of them is not parsed
+XMLLimits = namedtuple("XMLLimits", ("max_size", "max_depth", "max_elements"))
+DEFAULT_XML_LIMITS = XMLLimits(max_size=128 * 1024 * 1024, max_depth=200, max_elements=2000000)
 
 
 def get_tag(tag):
@@ -33,13 +51,100 @@ def bool_replace(text):
         return text
 
 
+def number_replace(text):
+    """Convert text with a number to int or Decimal, so prices keep all their digits.
+    If text is not a number, it will be returned as is.
+
+    Args:
+        text (str): Incoming text.
+
+    Returns:
+        int|Decimal|str: Converted value.
+    """
+    match = _NUMBER_PATTERN.match(text)
+    if match is None:
+        return text
+
+    if match.group(1) is None:
+        return int(text)
+
+    return Decimal(text)
+
+
+def date_replace(text):
+    """Normalize ISO 8601 date or datetime.
+
+    Datetime with time zone is converted to UTC, e.g. '2019-03-12T10:30:00.5+03:00'
+    becomes '2019-03-12T07:30:00.500000+00:00'. Date without time keeps its time zone,
+    the day is not moved by it, e.g. '2019-03-12Z' becomes '2019-03-12+00:00'.
+    Such values are sortable as strings and castable to `timestamptz` in PostgreSQL.
+    If text is not a date, it will be returned as is.
+
+    Args:
+        text (str): Incoming text.
+
+    Returns:
+        str: Normalized date.
+    """
+    match = _DATE_PATTERN.match(text)
+    if match is None:
+        return text
+
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+    if hour is None:
+        if tz is None:
+            return f"{year}-{month}-{day}"
+        return f"{year}-{month}-{day}{'+00:00' if tz == 'Z' else tz}"
+
+    microsecond = int(fraction.ljust(6, "0")) if fraction is not None else 0
+    try:
+        date = dt(int(year), int(month), int(day), int(hour), int(minute),
+                  int(second or 0), microsecond)
+    except ValueError:
+        return text
+
+    if tz is None:
+        return date.isoformat()
+
+    if tz != "Z":
+        sign = -1 if tz[0] == "-" else 1
+        offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[4:6])) * sign
+        date -= offset
+
+    return date.replace(tzinfo=timezone.utc).isoformat()
+
+
+def compile_tag_handlers(*registries):
+    """Merge registries of tag handlers into one dict.
+    Registries are keyed by local name of tag (without namespace). Later registries override earlier ones.
+    Handlers are checked once here, so they are not checked for every element during parse.
+
+    Args:
+        registries (dict): Registries of handlers.
+
+    Raises:
+        TypeError: A handler is not callable.
+
+    Returns:
+        dict: Compiled handlers.
+    """
+    handlers = {}
+    for registry in registries:
+        for tag, handler in registry.items():
+            if not callable(handler):
+                raise TypeError(f"Handler of tag {tag} must be callable")
+            handlers[tag] = handler
+
+    return handlers
+
+
 def recursive_read_dict(element, skip_tags=(), tag_handlers={}):
     """Convert XML element to dict or text.
 
     Args:
         elem (etree.Element): Element of XML.
         skip_tags (tuple): List of tags that should be skipped.
-        tag_handlers (dict): Handler for several tags.
+        tag_handlers (dict): Handler for several tags. See `compile_tag_handlers`.
 
     Returns:
         tuple: Tag and element structure in dict or text.
@@ -51,10 +156,7 @@ def recursive_read_dict(element, skip_tags=(), tag_handlers={}):
     element_data = None
 
     if len(elements) == 0:
-        if tag in tag_handlers and callable(tag_handlers[tag]):
-            handler = tag_handlers[tag]
-        else:
-            handler = bool_replace
+        handler = tag_handlers.get(tag, bool_replace)
         element_data = handler(element.text) if element.text else None
     else:
         local_dict = {}
@@ -78,21 +180,212 @@ def recursive_read_dict(element, skip_tags=(), tag_handlers={}):
     return tag, element_data
 
 
-def get_xml_data(raw_xml: bytes, skip_tags=(), tag_handlers={}):
+def get_value_by_path(data: dict, path: tuple):
+    """Get value from parsed XML data by path of tags.
+    If there is a list of elements on the path, the first element is taken.
+
+    Args:
+        data (dict): Parsed XML data.
+        path (tuple): Tags, e.g. ("lot", "maxPrice").
+
+    Returns:
+        Found value or None.
+    """
+    value = data
+    for key in path:
+        if isinstance(value, list):
+            value = value[0] if len(value) > 0 else None
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+
+    if isinstance(value, list):
+        value = value[0] if len(value) > 0 else None
+
+    return value
+
+
+def to_decimal(value):
+    """Convert parsed value to Decimal. Returns None if it is impossible."""
+    if value is None or isinstance(value, (bool, dict, list)):
+        return None
+
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+def to_datetime(value):
+    """Convert date normalized by `date_replace` to naive datetime in UTC. Returns None if it is impossible."""
+    if not isinstance(value, str):
+        return None
+
+    value = date_replace(value)
+    # date without time is the same day in any time zone
+    if value.endswith("+00:00") or _DATE_WITH_ZONE_PATTERN.match(value) is not None:
+        value = value[:-6]
+
+    for template in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return dt.strptime(value, template)
+        except ValueError:
+            continue
+
+    return None
+
+
+def to_str(value):
+    """Convert parsed value to str. Returns None for nested elements."""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+
+    return str(value)
+
+
+def project_fields(document: dict, fields: dict, columns=None) -> dict:
+    """Extract values of projected fields from parsed XML data.
+
+    Args:
+        document (dict): Parsed XML document, paths of fields are relative to it.
+        fields (dict): Projected fields as {column: (paths, converter)}. The first found path is used.
+        columns (iterable, optional): Columns which should be projected. Defaults to all.
+
+    Returns:
+        dict: Values of columns.
+    """
+    projected = {}
+
+    for column, (paths, converter) in fields.items():
+        if columns is not None and column not in columns:
+            continue
+
+        value = None
+        for path in paths:
+            value = get_value_by_path(document, path)
+            if value is not None:
+                break
+        projected[column] = converter(value)
+
+    return projected
+
+
+def iterative_read_dict(raw_xml: bytes, skip_tags=(), tag_handlers={}, limits=DEFAULT_XML_LIMITS):
+    """Convert XML file to dict or text without recursion and without a tree of the whole file.
+
+    The file is read by events of `etree.iterparse`, every element is converted and freed at its end,
+    so memory is taken by the result, not by the tree. Skipped elements are not converted at all.
+    The result is the same as of `recursive_read_dict` for the root element, but repeated leaf
+    elements are combined into a list too.
+
+    Args:
+        raw_xml (bytes): Raw XML data in bytes.
+        skip_tags (tuple): List of tags that should be skipped.
+        tag_handlers (dict): Handler for several tags. See `compile_tag_handlers`.
+        limits (XMLLimits, optional): Limits of file. Defaults to `DEFAULT_XML_LIMITS`.
+
+    Raises:
+        XMLLimitError: The file is above a limit.
+
+    Returns:
+        tuple: Tags of the root element and of its first child (or None) and data of the root element.
+    """
+
+    if len(raw_xml) > limits.max_size:
+        raise XMLLimitError("size", limits.max_size, len(raw_xml))
+
+    # frames of open elements: [tag, children data, has children, is skipped]
+    stack = []
+    local_names = {}
+    first_child_tag = None
+    elements_count = 0
+    root_tag = root_data = None
+
+    for event, element in etree.iterparse(BytesIO(raw_xml), events=("start", "end"), remove_comments=True,
+                                          remove_pis=True):
+        if event == "start":
+            elements_count += 1
+            if elements_count > limits.max_elements:
+                raise XMLLimitError("elements", limits.max_elements, elements_count)
+            if len(stack) >= limits.max_depth:
+                raise XMLLimitError("depth", limits.max_depth, len(stack) + 1)
+
+            tag = local_names.get(element.tag)
+            if tag is None:
+                tag = local_names[element.tag] = get_tag(element.tag)
+
+            if len(stack) > 0:
+                parent = stack[-1]
+                parent[2] = True
+                is_skipped = parent[3] or tag in skip_tags
+                if len(stack) == 1 and first_child_tag is None:
+                    first_child_tag = tag
+            else:
+                is_skipped = False
+            stack.append([tag, None, False, is_skipped])
+            continue
+
+        tag, children, has_children, is_skipped = stack.pop()
+        if is_skipped:
+            element.clear()
+            continue
+
+        if has_children:
+            value = children if children is not None else {}
+        else:
+            text = element.text
+            value = tag_handlers.get(tag, bool_replace)(text) if text else None
+
+        # the converted element and its converted siblings are not needed anymore
+        element.clear()
+        previous = element.getprevious()
+        while previous is not None:
+            del element.getparent()[0]
+            previous = element.getprevious()
+
+        if len(stack) == 0:
+            root_tag, root_data = tag, value
+            break
+
+        parent = stack[-1]
+        if parent[1] is None:
+            parent[1] = {}
+        siblings = parent[1]
+        if tag not in siblings:
+            siblings[tag] = value
+        elif isinstance(siblings[tag], list):
+            siblings[tag].append(value)
+        else:
+            # we can have two or more subelements with the same name. Combine these elements into array
+            siblings[tag] = [siblings[tag], value]
+
+    return root_tag, first_child_tag, root_data
+
+
+def get_xml_data(raw_xml: bytes, skip_tags=(), tag_handlers={}, type_from_root=False, limits=None):
     """Read XML data, convert it to needle format and return these data.
 
     Args:
         raw_xml (bytes): Raw XML data in bytes.
         skip_tags (tuple, optional): Tags of XML that should be skipped. Defaults to ().
         tag_handlers (dict, optional): Special handlers for XML tags. Defaults to {}.
+        type_from_root (bool, optional): Type of XML is the root element itself, not its first child.
+            Defaults to False.
+        limits (XMLLimits, optional): Limits of file. Defaults to None, `DEFAULT_XML_LIMITS` are used.
+
+    Raises:
+        XMLLimitError: The file is above a limit.
+        ValueError: There is no document in the root element.
 
     Returns:
         tuple(str, dict): Name of root XML element and parsed XML data as dictionary.
     """
-    root = etree.fromstring(raw_xml)
-    root_element = list(root)[0]
-    xml_type = get_tag(root_element)
+    root_tag, first_child_tag, file_data = iterative_read_dict(
+        raw_xml, skip_tags, tag_handlers, limits if limits is not None else DEFAULT_XML_LIMITS)
 
-    _, file_data = recursive_read_dict(root, skip_tags, tag_handlers)
+    if type_from_root:
+        return root_tag, file_data
+    elif first_child_tag is None:
+        raise ValueError(f"There is no document inside root element {root_tag}")
 
-    return xml_type, file_data
+    return first_child_tag, file_data
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""Parsers of directory listings of FTP server.
+
+`MLSD` gives machine-readable facts, it is used when the server supports it. Otherwise lines of `LIST`
+are parsed by precompiled regular expressions of Unix (`ls -l`) and DOS (IIS) layouts.
+Names may contain spaces. Modification times are in UTC for `MLSD` and in the server's time for `LIST`,
+so times of `LIST` are converted to UTC by the time zone of server.
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime as dt, timedelta, timezone
+
+
+ListItem = namedtuple("ListItem", ("name", "is_dir", "size", "modified_on"))
+
+_UNIX_LINE = re.compile(
+    r"^(?P<type>[-dlbcps])[-rwxsStTl]{9}\S*"
+    # count of links, owner and group. Some servers do not give group
+    r"\s+(?:\S+\s+){1,3}?"
+    r"(?P<size>\d+)\s+"
+    r"(?P<month>[A-Za-z]{3})\s+(?P<day>\d{1,2})\s+(?:(?P<hour>\d{1,2}):(?P<minute>\d{2})|(?P<year>\d{4}))"
+    r" (?P<name>.+)$")
+_DOS_LINE = re.compile(
+    r"^(?P<month>\d{2})-(?P<day>\d{2})-(?P<year>\d{2,4})\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?P<ampm>[AP]M)"
+    r"\s+(?:(?P<dir><DIR>)|(?P<size>\d+))\s+(?P<name>.+)$", re.IGNORECASE)
+_MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+_LINK_ARROW = " -> "
+_CLOCK_SKEW = timedelta(days=1)
+_MLSD_SKIPPED_TYPES = frozenset(("cdir", "pdir"))
+
+
+def get_server_now(tz=None) -> dt:
+    """Current naive time of server in its time zone. The current UTC time if the zone is not given"""
+
+    return dt.now(tz).replace(tzinfo=None) if tz is not None else dt.utcnow()
+
+
+def parse_list_line(line: str, now=None, tz=None):
+    """Parse a line of `LIST` reply.
+
+    Lines without a year have the date of the last half of year, so the year is taken from `now`.
+    Lines with a year have no time of day. Such a time cannot be compared with times of `MLSD` and `MDTM`,
+    which can be given for the same item another time, so it is not given.
+
+    Args:
+        line (str): Line of listing.
+        now (datetime, optional): Current time of server in its time zone. Defaults to None,
+            the current time in `tz`.
+        tz (tzinfo, optional): Time zone of server. Times are converted from it to UTC. Defaults to None,
+            the server's time is UTC.
+
+    Returns:
+        ListItem: Item or None if the line is not an item, e.g. "total 8", or the layout is unknown.
+    """
+
+    match = _UNIX_LINE.match(line)
+    if match is not None:
+        item = _get_unix_item(match, now or get_server_now(tz))
+    else:
+        match = _DOS_LINE.match(line)
+        if match is None:
+            return None
+        item = _get_dos_item(match)
+
+    if tz is None or item.modified_on is None:
+        return item
+
+    modified_on = item.modified_on.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+    return item._replace(modified_on=modified_on)
+
+
+def _get_unix_item(match, now: dt) -> ListItem:
+    item_type, size, month_name, day, hour, minute, year, name = match.groups()
+    if item_type == "l" and _LINK_ARROW in name:
+        name = name.split(_LINK_ARROW, 1)[0]
+
+    month = _MONTHS.get(month_name.lower())
+    modified_on = None
+    # a date with year has no time of day
+    if month is not None and year is None:
+        try:
+            modified_on = dt(now.year, month, int(day), int(hour), int(minute))
+            # the date without year is within the last half of year, so it cannot be in future
+            if modified_on > now + _CLOCK_SKEW:
+                modified_on = modified_on.replace(year=now.year - 1)
+        except ValueError:
+            # e.g. Feb 29 of not leap year
+            modified_on = None
+
+    return ListItem(name, item_type == "d", int(size), modified_on)
+
+
+def _get_dos_item(match) -> ListItem:
+    year = int(match.group("year"))
+    if year < 100:
+        year += 2000 if year < 70 else 1900
+
+    hour = int(match.group("hour")) % 12
+    if match.group("ampm").upper() == "PM":
+        hour += 12
+
+    try:
+        modified_on = dt(year, int(match.group("month")), int(match.group("day")), hour, int(match.group("minute")))
+    except ValueError:
+        modified_on = None
+
+    is_dir = match.group("dir") is not None
+    return ListItem(match.group("name"), is_dir, 0 if is_dir else int(match.group("size")), modified_on)
+
+
+def parse_mlsd_line(line: str):
+    """Parse a line of `MLSD` reply, e.g. "type=file;size=1024;modify=20190101120000; name.zip".
+
+    Returns:
+        ListItem: Item or None if the line is the directory itself or its parent or the line is broken.
+    """
+
+    facts, separator, name = line.partition(" ")
+    if not separator or not name:
+        return None
+
+    values = {}
+    for fact in facts.split(";"):
+        key, _, value = fact.partition("=")
+        if key:
+            values[key.lower()] = value
+
+    item_type = values.get("type", "").lower()
+    if item_type in _MLSD_SKIPPED_TYPES:
+        return None
+
+    is_dir = item_type == "dir"
+    size = values.get("size") or values.get("sizd")
+    return ListItem(name, is_dir, int(size) if size and size.isdigit() else 0, parse_mlsd_time(values.get("modify")))
+
+
+def parse_mlsd_time(value):
+    """Time of `MLSD` fact or `MDTM` reply, "YYYYMMDDHHMMSS[.sss]" in UTC. None if the value is broken"""
+
+    if not value or len(value) < 14 or not value[:14].isdigit():
+        return None
+
+    # it is parsed for every item of listing, fromisoformat is much faster than strptime
+    try:
+        return dt.fromisoformat(value[:8] + "T" + value[8:14])
+    except ValueError:
+        return None
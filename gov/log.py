@@ -1,19 +1,162 @@
-
 # -*- coding: utf-8 -*-
 
+"""Logging.
+
+Logging is configured once by `configure_logging`. In `queue` mode records are put into a queue and
+written to stderr by a separate thread, so the crawling loop does not wait for log I/O.
+Messages are formatted in that thread too, that is why messages should be given with %-style arguments.
+
+Records from hot loops can be sampled by stage. A record belongs to a stage if it has been logged with
+`extra={"stage": "<stage>"}`, and only every N-th record of the stage is written when `app.log.sample.<stage>`
+is N in config.
+"""
+
+import atexit
+import json
 import logging
-from .config import conf
+import logging.handlers
+import queue
+import threading
+from .config import conf, is_loaded
 
 
 _DEFAULT_LOGGER_NAME = "Crawler"
+_DEFAULT_LOG_LEVEL = "INFO"
 _LOG_FORMAT = "%(asctime)s | %(levelname)s | %(process)d | " \
     "%(filename)s:%(lineno)s | %(message)s"
+_LOG_MODE_SYNC = "sync"
+_LOG_MODE_QUEUE = "queue"
+_LOG_FORMAT_JSON = "json"
+
+_lock = threading.Lock()
+_is_configured = False
+_listener = None
+
+
+class _JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "process": record.process,
+            "logger": record.name,
+            "file": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if getattr(record, "stage", None) is not None:
+            data["stage"] = record.stage
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, ensure_ascii=False)
+
+
+class _SamplingFilter(logging.Filter):
+    """Passes only every N-th record of a stage.
+
+    Args:
+        rates (dict): N for stages, e.g. {"parse_file": 100}.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self._rates = rates
+        self._counters = {}
+
+    def filter(self, record):
+        stage = getattr(record, "stage", None)
+        rate = self._rates.get(stage)
+        if rate is None or rate <= 1:
+            return True
+
+        counter = self._counters.get(stage, 0)
+        self._counters[stage] = counter + 1
+
+        return counter % rate == 0
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Puts records into the queue as is. Unlike `QueueHandler`, the message is not formatted here,
+    it is done by the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _get_sample_rates(sample) -> dict:
+    if not isinstance(sample, dict):
+        return {}
+
+    return {stage: int(rate) for stage, rate in sample.items()}
+
+
+def configure_logging(config=None):
+    """Configure root logger by config. Repeated calls do nothing.
+
+    Args:
+        config (Config, optional): Config. Defaults to None, the installed config is used if it is loaded.
+    """
+
+    global _is_configured, _listener
+
+    with _lock:
+        if _is_configured:
+            return
+
+        if config is None and is_loaded():
+            config = conf
+
+        cfg = (config("app.log") if config is not None else None) or {}
+        level = cfg.get("level") or _DEFAULT_LOG_LEVEL
+
+        handler = logging.StreamHandler()
+        if cfg.get("format") == _LOG_FORMAT_JSON:
+            handler.setFormatter(_JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+
+        sample_rates = _get_sample_rates(cfg.get("sample"))
+        if cfg.get("mode") == _LOG_MODE_QUEUE:
+            records = queue.Queue(-1)
+            queue_handler = _LazyQueueHandler(records)
+            if sample_rates:
+                queue_handler.addFilter(_SamplingFilter(sample_rates))
+            root.addHandler(queue_handler)
+
+            _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_stop_listener)
+        else:
+            if sample_rates:
+                handler.addFilter(_SamplingFilter(sample_rates))
+            root.addHandler(handler)
+
+        _is_configured = True
+
+
+def _stop_listener():
+    """Write records left in the queue"""
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def get_logger(name=_DEFAULT_LOGGER_NAME, use_async=False):
-    """Logger object"""
+    """Logger object.
+    Logging is configured on the first call if it has not been configured by `configure_logging`.
+    Until config is loaded, the default level is used.
+    """
 
     logger_name = "asyncio" if use_async else name
-    logging.basicConfig(format=_LOG_FORMAT, level=conf("app.log.level"))
+    if not _is_configured:
+        configure_logging()
 
     return logging.getLogger(logger_name)
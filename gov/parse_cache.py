@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent cache of results of XML parsing.
+
+Results are kept in a local SQLite file by CRC-32 and size of archive member, which are known from
+the archive's directory, and by version of parser with limits of XML. The same files are met in several archives
+(e.g. archives of the current and the previous month) and in archives which are read again after a crash,
+so they are not parsed again. A short BLAKE2 digest of file is kept with the result and checked on read,
+so a collision of CRC-32 gives a miss instead of data of another file.
+
+The least recently used results are evicted when the total size of results is above the limit.
+"""
+
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+
+_DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# eviction frees a bit more than needed, so it does not run on every put
+_EVICTION_RATIO = 0.9
+_DIGEST_SIZE = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    crc INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    value BLOB NOT NULL,
+    used_on REAL NOT NULL,
+    PRIMARY KEY (crc, size, version)
+);
+CREATE INDEX IF NOT EXISTS results_used_on ON results (used_on);
+"""
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+class ParseCache():
+    """Local cache of parsed XML files.
+
+    Args:
+        path (str): Path to SQLite file. `:memory:` can be used for tests.
+        max_bytes (int, optional): Limit of total size of compressed results. Defaults to 1 GB.
+    """
+
+    def __init__(self, path: str, max_bytes=_DEFAULT_MAX_BYTES):
+        self._max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results").fetchone()[0]
+        self.hits = self.misses = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Create cache by `app.parse_cache` of config.
+
+        Returns:
+            ParseCache: The cache or None if it is not configured. Readers of all folders share one cache
+                of a file, so size of the file is kept under the limit.
+        """
+
+        cfg = config("app.parse_cache")
+        if not isinstance(cfg, dict) or not cfg.get("path"):
+            return None
+
+        with _shared_lock:
+            if cfg["path"] not in _shared_caches:
+                _shared_caches[cfg["path"]] = cls(cfg["path"], cfg.get("max_bytes") or _DEFAULT_MAX_BYTES)
+
+            return _shared_caches[cfg["path"]]
+
+    @property
+    def size(self) -> int:
+        """Total size of compressed results in bytes"""
+
+        return self._bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _get_digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=_DIGEST_SIZE).digest()
+
+    def get(self, crc: int, size: int, version: str, data: bytes):
+        """Get result of parsing of file.
+
+        Args:
+            crc (int): CRC-32 of file.
+            size (int): Size of file.
+            version (str): Version of parser.
+            data (bytes): File data. Its digest has to be the same as the digest of the cached file.
+
+        Returns:
+            Result of parsing or None if there is no result.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, value FROM results WHERE crc = ? AND size = ? AND version = ?",
+                (crc, size, version)).fetchone()
+            if row is None or row[0] != self._get_digest(data):
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE results SET used_on = ? WHERE crc = ? AND size = ? AND version = ?",
+                               (time.time(), crc, size, version))
+            self.hits += 1
+
+        return pickle.loads(zlib.decompress(row[1]))
+
+    def put(self, crc: int, size: int, version: str, data: bytes, result):
+        """Keep result of parsing of file.
+
+        Args:
+            crc (int): CRC-32 of file.
+            size (int): Size of file.
+            version (str): Version of parser.
+            data (bytes): File data.
+            result: Result of parsing. It has to be picklable.
+        """
+
+        value = zlib.compress(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        if len(value) > self._max_bytes:
+            return
+
+        with self._lock:
+            old = self._conn.execute("SELECT LENGTH(value) FROM results WHERE crc = ? AND size = ? AND version = ?",
+                                     (crc, size, version)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                               (crc, size, version, self._get_digest(data), value, time.time()))
+            self._bytes += len(value) - (old[0] if old is not None else 0)
+
+            if self._bytes > self._max_bytes:
+                self._evict(self._max_bytes * _EVICTION_RATIO)
+
+    def _evict(self, target: float):
+        """Delete the least recently used results until their total size is not above the target"""
+
+        freed = 0
+        last_used_on = None
+        for length, used_on in self._conn.execute("SELECT LENGTH(value), used_on FROM results ORDER BY used_on"):
+            if self._bytes - freed <= target:
+                break
+            freed += length
+            last_used_on = used_on
+
+        if last_used_on is not None:
+            self._conn.execute("DELETE FROM results WHERE used_on <= ?", (last_used_on,))
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results").fetchone()[0]
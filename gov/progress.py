@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""Progress of a run of the crawler.
+
+`Progress` keeps counters of archives, files, downloaded bytes and inserted rows. They are updated by
+the main thread, the thread of downloads and readers. `ProgressReporter` writes a line of progress to log
+every `app.progress.interval` seconds, `StatusServer` gives the same data as JSON by HTTP
+on `app.progress.http_port`, so monitoring can scrape it.
+
+ETA is derived from the listing: archives are listed lazily region by region, so the size of archives
+of the whole walk is extrapolated from the regions which have been listed completely.
+"""
+
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .log import get_logger
+
+
+_DEFAULT_INTERVAL = 60
+_DEFAULT_HTTP_HOST = "127.0.0.1"
+_MB = 1024 * 1024
+
+COUNTERS = (
+    # archives which have to be handled and their total size
+    "archives_listed", "bytes_listed",
+    # archives which have been parsed early or skipped by filters
+    "archives_skipped",
+    # handled archives and their total size, failed ones are counted in bytes_done too
+    "archives_done", "archives_failed", "bytes_done", "bytes_downloaded",
+    "files_parsed", "files_failed", "files_quarantined", "rows_inserted",
+)
+
+
+class Progress():
+    """Thread-safe counters of a run.
+
+    Args:
+        clock (callable, optional): Source of time in seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._queues = {}
+        self._listing = None
+        self.started_on = clock()
+
+    def add(self, **counters):
+        """Add values to counters, e.g. `add(archives_done=1, bytes_done=size)`"""
+
+        with self._lock:
+            for name, value in counters.items():
+                self._counters[name] += value
+
+    def set_queue(self, name: str, get_depth):
+        """Report depth of a queue. `get_depth` is called on every snapshot, None removes the queue"""
+
+        with self._lock:
+            if get_depth is None:
+                self._queues.pop(name, None)
+            else:
+                self._queues[name] = get_depth
+
+    def set_listing(self, get_regions):
+        """Set source of progress of listing.
+
+        Args:
+            get_regions (callable): It returns count of completely listed regions and count of all regions.
+        """
+
+        with self._lock:
+            self._listing = get_regions
+
+    def snapshot(self) -> dict:
+        """Counters, rates per second since start, depths of queues and ETA in seconds (None if it is unknown)"""
+
+        with self._lock:
+            counters = dict(self._counters)
+            queues = dict(self._queues)
+            listing = self._listing
+
+        elapsed = max(self._clock() - self.started_on, 1e-9)
+        regions_listed, regions_count = listing() if listing is not None else (0, 0)
+
+        return {
+            "elapsed": round(elapsed, 1),
+            "counters": counters,
+            "rates": {
+                "archives": counters["archives_done"] / elapsed,
+                "docs": counters["files_parsed"] / elapsed,
+                "rows": counters["rows_inserted"] / elapsed,
+                "bytes": counters["bytes_done"] / elapsed,
+            },
+            "queues": {name: get_depth() for name, get_depth in queues.items()},
+            "listing": {"regions_listed": regions_listed, "regions_count": regions_count},
+            "eta": self._get_eta(counters, elapsed, regions_listed, regions_count),
+        }
+
+    @staticmethod
+    def _get_eta(counters: dict, elapsed: float, regions_listed: int, regions_count: int):
+        bytes_listed = counters["bytes_listed"]
+        bytes_done = counters["bytes_done"]
+        if bytes_done <= 0:
+            return None
+
+        if regions_count > 0 and regions_listed < regions_count:
+            if regions_listed == 0:
+                return None
+            bytes_listed = bytes_listed * regions_count / regions_listed
+
+        return max(bytes_listed - bytes_done, 0) / (bytes_done / elapsed)
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """One line of progress for log"""
+
+    counters = snapshot["counters"]
+    rates = snapshot["rates"]
+    queues = ", ".join(f"{name}={depth}" for name, depth in sorted(snapshot["queues"].items())) or "-"
+    eta = snapshot["eta"]
+
+    return (
+        f"archives {counters['archives_done'] + counters['archives_failed']}/{counters['archives_listed']} "
+        f"({counters['archives_failed']} failed, {counters['archives_skipped']} skipped); "
+        f"files {counters['files_parsed']} ({counters['files_failed']} failed, "
+        f"{counters['files_quarantined']} quarantined); "
+        f"{counters['bytes_downloaded'] / _MB:.1f} MB downloaded; "
+        f"{rates['docs']:.1f} docs/s; {rates['rows']:.1f} rows/s; "
+        f"regions {snapshot['listing']['regions_listed']}/{snapshot['listing']['regions_count']}; "
+        f"queues {queues}; "
+        f"ETA {timedelta(seconds=round(eta)) if eta is not None else 'unknown'}")
+
+
+class ProgressReporter():
+    """Writes progress to log from a background thread.
+
+    Args:
+        progress (Progress): Progress of run.
+        interval (float): Seconds between lines.
+    """
+
+    def __init__(self, progress: Progress, interval: float):
+        self.log = get_logger(__name__)
+        self._progress = progress
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.report()
+
+    def report(self):
+        self.log.info("Progress: %s", format_snapshot(self._progress.snapshot()), extra={"stage": "progress"})
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/status"):
+            self.send_error(404)
+            return
+
+        body = json.dumps(self.server.progress.snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        get_logger(__name__).debug("Status request: " + format, *args)
+
+
+class StatusServer():
+    """Local HTTP server which gives snapshot of progress as JSON on `/` and `/status`.
+
+    Args:
+        progress (Progress): Progress of run.
+        port (int): Port. 0 takes a free port, see `port` attribute.
+        host (str, optional): Address. Defaults to 127.0.0.1.
+    """
+
+    def __init__(self, progress: Progress, port: int, host=_DEFAULT_HTTP_HOST):
+        self._server = ThreadingHTTPServer((host, port), _StatusHandler)
+        self._server.daemon_threads = True
+        self._server.progress = progress
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="status", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+
+def start_monitoring(progress: Progress, config) -> list:
+    """Start reporter and status server by `app.progress` of config.
+
+    Returns:
+        list: Started services. They have to be stopped by `stop`.
+    """
+
+    cfg = config("app.progress") or {}
+    services = []
+
+    # 0 disables the reporter, so it is not replaced by the default
+    interval = float(cfg["interval"]) if cfg.get("interval") is not None else _DEFAULT_INTERVAL
+    if interval > 0:
+        services.append(ProgressReporter(progress, interval))
+
+    if cfg.get("http_port") is not None:
+        services.append(StatusServer(progress, int(cfg["http_port"]), cfg.get("http_host") or _DEFAULT_HTTP_HOST))
+
+    for service in services:
+        service.start()
+
+    return services
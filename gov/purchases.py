@@ -1,61 +1,517 @@
 
 # -*- coding: utf-8 -*-
 
-from ftplib import FTP
+import socket
+import sys
+import threading
+import time
+from ftplib import FTP, error_temp, error_perm
+from zoneinfo import ZoneInfo
 from .log import get_logger
 from .errors import EmptyDownloadDirError
+from .listing import ListItem, get_server_now, parse_list_line, parse_mlsd_line, parse_mlsd_time
 
 
 _FTP_LOGIN = "free"
 _FTP_PASSWORD = "free"
 _FTP_ROOT_DIR = "/fcs_regions"
+_DEFAULT_LAW_NUMBER = "44"
+
+# root directory, login and password on FTP server for every law
+_LAW_SETTINGS = {
+    "44": (_FTP_ROOT_DIR, _FTP_LOGIN, _FTP_PASSWORD),
+    "223": ("/out/published", "fz223free", "fz223free"),
+}
 
 # a folder in a region directory. A region data will be downloaded from this folder.
 _DEFAULT_LOOK_FOLDER = "notifications"
 
+# errors after which the server is considered overloaded and the connection is made again:
+# 421 and other 4xx replies, timeouts and dropped connections
+_CONNECTION_ERRORS = (error_temp, socket.timeout, ConnectionError, EOFError)
+_KEEPALIVE_INTERVAL = 60.0
+# seconds to wait for connection, replies and data of the server, so a stalled connection is made again
+DEFAULT_TIMEOUT = 60.0
+# LIST gives times of the server's time zone, MLSD and MDTM give them in UTC
+DEFAULT_SERVER_TZ = "Europe/Moscow"
+_RECONNECT_ATTEMPTS = 3
+_RECONNECT_DELAY = 5.0
+_DEFAULT_MAX_SESSIONS = 2
+_AIMD_WINDOW = 10.0
+_AIMD_DECREASE_FACTOR = 0.5
+# throughput has to grow by this part to add a session
+_AIMD_GROWTH_THRESHOLD = 0.05
+_REPORT_INTERVAL = 5.0
+
+# ways of reading of directories. "auto" uses MLSD if the server supports it and LIST otherwise
+LISTING_AUTO = "auto"
+LISTING_MLSD = "mlsd"
+LISTING_LIST = "list"
+_LISTING_MODES = (LISTING_AUTO, LISTING_MLSD, LISTING_LIST)
+
+
+class ArchiveEntry():
+    """Archive file found on FTP server.
+
+    Listings of the whole tree keep hundreds of thousands of entries, so the entry has no `__dict__`.
+    Directory, region and folder are interned: they are shared by all archives of a directory.
+
+    Args:
+        directory (str): Absolute path of directory of archive.
+        fname (str): Name of archive.
+        fsize (int): Size of archive in bytes.
+        region (str): Region of archive.
+        folder (str): Folder in the region directory which the archive belongs to.
+        modified_on (datetime, optional): Time of modification on the server. Defaults to None.
+    """
+
+    __slots__ = ("directory", "fname", "fsize", "region", "folder", "modified_on", "id", "status")
+
+    def __init__(self, directory: str, fname: str, fsize: int, region: str, folder: str, modified_on=None):
+        self.directory = sys.intern(directory)
+        self.fname = fname
+        self.fsize = fsize
+        self.region = sys.intern(region)
+        self.folder = sys.intern(folder)
+        self.modified_on = modified_on
+        # ID of archive in DB and status of archive in DB, they are set by application
+        self.id = None
+        self.status = None
+
+    @property
+    def full_name(self) -> str:
+        return self.directory + "/" + self.fname
+
+    def __repr__(self):
+        return f"ArchiveEntry({self.full_name!r}, {self.fsize}, region={self.region!r}, folder={self.folder!r})"
+
+
+class TokenBucket():
+    """Token bucket limiter of bytes per second shared by all connections.
+
+    Args:
+        rate (float): Bytes per second. 0 means no limit.
+        capacity (float, optional): Size of bucket, the largest burst. Defaults to `rate`.
+        clock (callable, optional): Monotonic clock. Defaults to `time.monotonic`.
+        sleep (callable, optional): Sleep function. Defaults to `time.sleep`.
+    """
+
+    def __init__(self, rate: float, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self._rate = float(rate)
+        self._capacity = float(capacity) if capacity is not None else self._rate
+        self._tokens = self._capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_on = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Create limiter by `app.ftp.rate_limit` of config, bytes per second"""
+
+        return cls(float(config("app.ftp.rate_limit") or 0))
+
+    def consume(self, amount: int):
+        """Take tokens. Waits until there are enough tokens. The debt of a block larger than the bucket
+        is paid by waiting before the next block.
+        """
+
+        if self._rate <= 0:
+            return
 
-class Client():
-    """Class for working with FTP server"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_on) * self._rate)
+            self._updated_on = now
+            self._tokens -= amount
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            self._sleep(wait)
+
+
+class AIMDController():
+    """Controller of count of concurrent FTP sessions.
+
+    The limit of sessions grows by one while total throughput grows (additive increase)
+    and is cut by half after an error which means that the server throttles us (multiplicative decrease).
+
+    Args:
+        max_sessions (int): The highest limit of sessions.
+        min_sessions (int, optional): The lowest limit of sessions. Defaults to 1.
+        window (float, optional): Seconds of a measurement of throughput. Defaults to 10.
+        clock (callable, optional): Monotonic clock. Defaults to `time.monotonic`.
+    """
+
+    def __init__(self, max_sessions: int, min_sessions=1, window=_AIMD_WINDOW, clock=time.monotonic):
+        self.log = get_logger(__name__)
+        self._max_sessions = max(int(max_sessions), 1)
+        self._min_sessions = min(max(int(min_sessions), 1), self._max_sessions)
+        self._limit = self._min_sessions
+        self._active = 0
+        self._window = window
+        self._clock = clock
+        self._window_started_on = clock()
+        self._window_bytes = 0
+        self._last_rate = 0.0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config):
+        """Create controller by `app.ftp.max_sessions` and `app.ftp.min_sessions` of config"""
+
+        return cls(int(config("app.ftp.max_sessions") or _DEFAULT_MAX_SESSIONS),
+                   int(config("app.ftp.min_sessions") or 1))
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def max_sessions(self) -> int:
+        return self._max_sessions
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def acquire(self, timeout=None) -> bool:
+        """Take a session slot. Waits while all slots are busy.
+
+        Returns:
+            bool: False if the slot has not been taken during timeout.
+        """
+
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._active < self._limit, timeout):
+                return False
+            self._active += 1
+
+        return True
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def add_bytes(self, amount: int):
+        """Account transferred bytes. At the end of window the limit is increased if throughput has grown"""
+
+        with self._cond:
+            self._window_bytes += amount
+            now = self._clock()
+            elapsed = now - self._window_started_on
+            if elapsed < self._window:
+                return
+
+            rate = self._window_bytes / elapsed
+            if rate > self._last_rate * (1 + _AIMD_GROWTH_THRESHOLD) and self._limit < self._max_sessions:
+                self._limit += 1
+                self.log.info("Throughput is %.1f KB/s; limit of FTP sessions is raised to %s",
+                              rate / 1024, self._limit)
+                self._cond.notify()
+
+            self._last_rate = rate
+            self._window_started_on = now
+            self._window_bytes = 0
+
+    def on_failure(self):
+        """The server throttles us. Cut the limit of sessions"""
+
+        with self._cond:
+            self._limit = max(self._min_sessions, int(self._limit * _AIMD_DECREASE_FACTOR))
+            self._last_rate = 0.0
+            self._window_started_on = self._clock()
+            self._window_bytes = 0
+            self.log.warning("FTP server throttles connections; limit of FTP sessions is cut to %s", self._limit)
+
+
+class _TransferMeter():
+    """Counter of bytes of one transfer. Reports speed of the connection periodically"""
+
+    def __init__(self, log, fname: str, clock=time.monotonic):
+        self.log = log
+        self.fname = fname
+        self.size = 0
+        self._clock = clock
+        self.started_on = self._reported_on = clock()
+
+    def add(self, amount: int):
+        self.size += amount
+        now = self._clock()
+        if now - self._reported_on >= _REPORT_INTERVAL:
+            self._reported_on = now
+            self.log.info("Downloading %s: %s bytes, %.1f KB/s", self.fname, self.size, self.rate / 1024,
+                          extra={"stage": "download"})
+
+    @property
+    def rate(self) -> float:
+        return self.size / max(self._clock() - self.started_on, 1e-6)
 
-    def __init__(self, server_address, download_dir=None, looking_folder=_DEFAULT_LOOK_FOLDER):
+
+class Client():
+    """Class for working with FTP server.
+
+    The control connection is kept alive by NOOP commands from a background thread while the client is idle,
+    e.g. during parsing of a large archive. If the connection is lost anyway, a command is repeated
+    after reconnect. Directories are read by absolute paths, so reading of folders goes on after reconnect
+    and a download is resumed from the downloaded part of file.
+
+    Args:
+        server_address (str): Address of FTP server.
+        download_dir (str, optional): Directory for downloaded archives. Defaults to None.
+        looking_folder (str or iterable, optional): Folder or folders in region directories.
+            Every region is listed once for all of them. Defaults to "notifications".
+        law_number (str, optional): Law number. Defaults to "44".
+        rate_limiter (TokenBucket, optional): Limiter of download speed. Defaults to None.
+        controller (AIMDController, optional): Controller of concurrent sessions, it is shared by all clients.
+            Defaults to None.
+        keepalive_interval (float, optional): Seconds of idle connection before NOOP. 0 disables keepalive.
+            Defaults to 60.
+        listing (str, optional): Way of reading of directories: "auto", "mlsd" or "list". Defaults to "auto".
+        skip_directory (callable, optional): Called with path and modification time of a subdirectory.
+            If it returns True, the directory is not read. Defaults to None.
+        timeout (float, optional): Seconds to wait for connection and socket operations. Defaults to 60.
+        server_tz (str, optional): Time zone of times of LIST, they are converted to UTC.
+            Defaults to "Europe/Moscow".
+
+    Raises:
+        ValueError: Unknown way of reading of directories.
+    """
+
+    def __init__(self, server_address, download_dir=None, looking_folder=_DEFAULT_LOOK_FOLDER,
+                 law_number=_DEFAULT_LAW_NUMBER, rate_limiter=None, controller=None,
+                 keepalive_interval=_KEEPALIVE_INTERVAL, listing=LISTING_AUTO, skip_directory=None,
+                 timeout=DEFAULT_TIMEOUT, server_tz=DEFAULT_SERVER_TZ):
+        if listing not in _LISTING_MODES:
+            raise ValueError(f"Unknown listing {listing}; available are {', '.join(_LISTING_MODES)}")
+
+        self._listing = listing
+        self._skip_directory = skip_directory
+        # directories without subdirectories which have been read to the end:
+        # path -> (modification time, count of archives)
+        self.completed_directories = {}
+        # regions whose folders have been listed completely, for estimation of the rest of walk
+        self.regions_listed = 0
         self._server = server_address
+        self._timeout = timeout
+        self._server_tz = ZoneInfo(server_tz)
+        self._rate_limiter = rate_limiter
+        self._controller = controller
+        self.bytes_per_second = 0.0
+        self._root_dir, self._login, self._password = _LAW_SETTINGS[str(law_number)]
         self.log = get_logger(__name__)
         self._is_connected = False
         self._root_folders = []
         self._skipped_region = None
         self._download_dir = download_dir
-        self._looking_folder = looking_folder
+        self._looking_folders = (looking_folder,) if isinstance(looking_folder, str) else tuple(looking_folder)
+        self._lock = threading.RLock()
+        self._last_command_on = time.monotonic()
+        self._keepalive_stop = threading.Event()
+        self._keepalive = None
         self._connect()
 
+        if keepalive_interval > 0:
+            self._keepalive = threading.Thread(target=self._keep_alive, args=(keepalive_interval,),
+                                               name="ftp-keepalive", daemon=True)
+            self._keepalive.start()
+
     def _connect(self):
         """Connect and auth on the FTP server"""
 
-        self.ftp = FTP(self._server)
-        self.ftp.login(_FTP_LOGIN, _FTP_PASSWORD)
+        self.ftp = FTP(self._server, timeout=self._timeout)
+        self.ftp.login(self._login, self._password)
         self._is_connected = True
+        self._last_command_on = time.monotonic()
 
     def reconnect(self):
         """Trying to reconnect to the server"""
 
-        self._is_connected = False
-        self._connect()
+        with self._lock:
+            self._is_connected = False
+            try:
+                self.ftp.close()
+            except Exception:
+                pass
+            self._connect()
 
         return self._is_connected
 
+    def close(self):
+        """Stop keepalive and close connection"""
+
+        self._keepalive_stop.set()
+        if self._keepalive is not None:
+            self._keepalive.join()
+
+        with self._lock:
+            try:
+                self.ftp.quit()
+            except Exception:
+                self.ftp.close()
+            self._is_connected = False
+
+    def _keep_alive(self, interval: float):
+        """Send NOOP if the connection has been idle for `interval` seconds. Busy connection is not touched"""
+
+        while not self._keepalive_stop.wait(min(interval, 1.0)):
+            if time.monotonic() - self._last_command_on < interval:
+                continue
+
+            if not self._lock.acquire(blocking=False):
+                continue
+
+            try:
+                if self._is_connected:
+                    self.ftp.voidcmd("NOOP")
+                    self._last_command_on = time.monotonic()
+            except _CONNECTION_ERRORS as e:
+                # the next command reconnects
+                self.log.warning("Keepalive of FTP connection failed: %s", e)
+                self._is_connected = False
+            finally:
+                self._lock.release()
+
+    def _call(self, func):
+        """Call `func(ftp)`. If connection is lost, reconnect and call it again.
+
+        Args:
+            func (callable): Function of FTP object. It is called again from the beginning after reconnect.
+
+        Returns:
+            Result of `func`.
+        """
+
+        attempt = 0
+        while True:
+            try:
+                with self._lock:
+                    if not self._is_connected:
+                        self.reconnect()
+                    result = func(self.ftp)
+                    self._last_command_on = time.monotonic()
+                    return result
+            except _CONNECTION_ERRORS as e:
+                self._is_connected = False
+                attempt += 1
+                if attempt > _RECONNECT_ATTEMPTS:
+                    raise
+
+                self.log.warning("Lost connection to FTP server: %s; reconnect, attempt %s", e, attempt)
+                time.sleep(_RECONNECT_DELAY * attempt)
+
+    def _list(self, folder: str) -> list:
+        """Items of directory by absolute path.
+
+        MLSD is tried first in "auto" mode. If the server does not support it, LIST is used from now on.
+        If no line of LIST can be parsed, names are read by NLST and sizes and times by SIZE and MDTM.
+
+        Returns:
+            list: `ListItem` objects.
+        """
+
+        if self._listing != LISTING_LIST:
+            items = self._call(lambda ftp: self._list_by_mlsd(ftp, folder))
+            if items is not None:
+                return items
+
+            self.log.info("Server does not support MLSD, LIST is used", extra={"stage": "listing"})
+            self._listing = LISTING_LIST
+
+        def list_folder(ftp):
+            lines = []
+            ftp.cwd(folder)
+            ftp.retrlines("LIST", lines.append)
+            return lines
+
+        lines = self._call(list_folder)
+        now = get_server_now(self._server_tz)
+        items = []
+        unknown_lines = []
+        for line in lines:
+            item = parse_list_line(line, now, self._server_tz)
+            if item is not None:
+                items.append(item)
+            elif not line.startswith("total"):
+                unknown_lines.append(line)
+
+        if len(unknown_lines) > 0:
+            if len(items) == 0:
+                self.log.warning("Unknown layout of LIST of %s, NLST is used", folder, extra={"stage": "listing"})
+                return self._call(lambda ftp: self._list_by_nlst(ftp, folder))
+
+            self.log.warning("Skip %s unknown line(s) of LIST of %s, e.g. %r",
+                             len(unknown_lines), folder, unknown_lines[0], extra={"stage": "listing"})
+
+        return items
+
+    def _list_by_mlsd(self, ftp, folder: str):
+        """Items of directory by MLSD. None if the server does not support it"""
+
+        lines = []
+        ftp.cwd(folder)
+        try:
+            ftp.retrlines("MLSD", lines.append)
+        except error_perm as e:
+            if self._listing == LISTING_MLSD or not str(e).startswith(("500", "501", "502")):
+                raise
+            return None
+
+        items = []
+        for line in lines:
+            item = parse_mlsd_line(line)
+            if item is not None:
+                items.append(item)
+
+        return items
+
+    def _list_by_nlst(self, ftp, folder: str) -> list:
+        """Items of directory by NLST. A name without size is considered a directory"""
+
+        ftp.cwd(folder)
+        items = []
+        for name in ftp.nlst():
+            name = name.rsplit("/", 1)[-1]
+            try:
+                size = ftp.size(name)
+            except error_perm:
+                items.append(ListItem(name, True, 0, None))
+                continue
+
+            try:
+                modified_on = parse_mlsd_time(ftp.sendcmd("MDTM " + name)[4:].strip())
+            except error_perm:
+                modified_on = None
+            items.append(ListItem(name, False, size or 0, modified_on))
+
+        return items
+
     def read(self):
-        """Читает файлы в папках, возвращает итератор"""
+        """Читает файлы в папках, возвращает итератор объектов `ArchiveEntry`.
+        Каждый файл помечен папкой, в которой он найден (атрибут "folder")
+        """
 
         self._read_root_folders()
+        self.regions_listed = 0
         for region in self._root_folders:
-            self.log.info(f"Read folder {region}")
-            if self._skipped_region is not None:
-                skipped_region = self._skipped_region
-                self._skipped_region = None
-                if skipped_region == region:
-                    continue
+            self.log.info("Read folder %s", region)
+            for looking_folder in self._looking_folders:
+                # region has been skipped while reading of previous folder
+                if self._skipped_region == region:
+                    break
 
-            full_folder = _FTP_ROOT_DIR + "/" + region + "/" + self._looking_folder
-            yield from self._read_folder_with_archives(full_folder, region)
+                full_folder = self._root_dir + "/" + region + "/" + looking_folder
+                yield from self._read_folder_with_archives(full_folder, region, looking_folder)
+
+            self._skipped_region = None
+            self.regions_listed += 1
+
+    @property
+    def regions_count(self) -> int:
+        """Count of regions on server. It is known when reading has been started"""
+
+        return len(self._root_folders)
 
     def set_region_skipped(self, region: str):
         self._skipped_region = region
@@ -63,63 +519,59 @@ class Client():
     def _read_root_folders(self):
         """Получить папки с регионами из корневой директории"""
 
-        self.ftp.cwd(_FTP_ROOT_DIR)
-        items = []
-        self.ftp.retrlines("LIST", items.append)
-        items = map(str.split, items)
-        self._root_folders = [item.pop()
-                              for item in items if item[0][0] == 'd']
+        self._root_folders = [item.name for item in self._list(self._root_dir) if item.is_dir]
 
-    def _read_folder_with_archives(self, folder: str, region: str):
+    def _read_folder_with_archives(self, folder: str, region: str, looking_folder: str, modified_on=None):
         """Прочитать файлы из указанной папки.
-        Вложенные папки также будут прочитаны. Возвращает итератор
+        Вложенные папки также будут прочитаны. Возвращает итератор.
+        Вложенные папки, которые не изменились (см. `skip_directory`), не читаются
 
         Args:
-            folder (str): имя папки
+            folder (str): абсолютный путь папки
+            region (str): регион
+            looking_folder (str): папка в директории региона, которой принадлежат файлы
+            modified_on (datetime, optional): время изменения папки. Defaults to None.
         """
 
-        # для начала читаем папку
-        self.ftp.cwd(folder)
-        self.log.info(f"Read files of directory {folder}")
-        items = []
-        self.ftp.retrlines("LIST", items.append)
-        items = map(str.split, items)
+        # для начала читаем папку. Содержимое папки читается целиком, поэтому переподключение
+        # во время обхода не теряет позицию
+        self.log.info("Read files of directory %s", folder, extra={"stage": "listing"})
+        items = self._list(folder)
 
         # идём по списку файлов
+        count = 0
+        has_subfolders = False
         for item in items:
             if self._skipped_region is not None and self._skipped_region == region:
-                self._leave_current_directory()
                 break
 
-            item_type = item[0][0]
-            if item_type == "d":
+            if item.is_dir:
 
                 # это директория. Вызовём для неё рекурсивно сами себя
-                local_folder = item.pop()
-                self.log.info(f"Go inside {local_folder}")
-                yield from self._read_folder_with_archives(folder + "/" + local_folder, region)
+                has_subfolders = True
+                local_folder = item.name
+                full_folder = folder + "/" + local_folder
+                if item.modified_on is not None and self._skip_directory is not None and \
+                        self._skip_directory(full_folder, item.modified_on):
+                    self.log.info("Skip unchanged %s", full_folder, extra={"stage": "listing"})
+                    continue
 
-                # После работы нужно вернуться в предыдущую папку
-                self.log.info(f"Leave {local_folder}")
-                self._leave_current_directory()
+                self.log.info("Go inside %s", local_folder, extra={"stage": "listing"})
+                yield from self._read_folder_with_archives(full_folder, region, looking_folder, item.modified_on)
+                self.log.info("Leave %s", local_folder, extra={"stage": "listing"})
             else:
 
                 # это файл, читаем информацию о нём и возвращаем её
-                file = item.pop()
-                full_file = folder + "/" + file
-                file_size = item[4]
-                yield {
-                    "full_name": full_file,
-                    "fname": file,
-                    "fsize": int(file_size),
-                    "region": region
-                }
-
-    def _leave_current_directory(self):
-        self.ftp.cwd("../")
+                count += 1
+                yield ArchiveEntry(folder, item.name, item.size, region, looking_folder, item.modified_on)
+        else:
+            # папка прочитана до конца. Папки с вложенными папками не запоминаются:
+            # время папки не меняется при изменениях во вложенных папках
+            if modified_on is not None and not has_subfolders:
+                self.completed_directories[folder] = (modified_on, count)
 
     def download(self, fpath, fname, download_dir=None):
-        """Скачать файл
+        """Скачать файл. После обрыва соединения загрузка продолжается с места обрыва
 
         Args:
             fpath (str): Файл на сервере с указанием абсолютного пути до него
@@ -136,4 +588,34 @@ class Client():
             download_dir = self._download_dir
 
         path_to_download = download_dir + "/" + fname
-        self.ftp.retrbinary(f"RETR {fpath}", open(path_to_download, "wb").write)
+        if self._controller is not None:
+            self._controller.acquire()
+
+        meter = _TransferMeter(self.log, fname)
+        try:
+            with open(path_to_download, "wb") as f:
+                def write(block):
+                    if self._rate_limiter is not None:
+                        self._rate_limiter.consume(len(block))
+                    f.write(block)
+                    meter.add(len(block))
+                    if self._controller is not None:
+                        self._controller.add_bytes(len(block))
+
+                def retrieve(ftp):
+                    offset = f.tell()
+                    try:
+                        ftp.retrbinary(f"RETR {fpath}", write, rest=offset if offset > 0 else None)
+                    except _CONNECTION_ERRORS:
+                        if self._controller is not None:
+                            self._controller.on_failure()
+                        raise
+
+                self._call(retrieve)
+        finally:
+            if self._controller is not None:
+                self._controller.release()
+
+        self.bytes_per_second = meter.rate
+        self.log.info("Downloaded %s: %s bytes, %.1f KB/s", fname, meter.size, meter.rate / 1024,
+                      extra={"stage": "download"})
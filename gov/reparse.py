@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""Parse again raw XML files which are kept in blob store and rewrite their data.
+
+It is used after changes of tag handlers or skipped tags, so FTP server is not crawled again.
+Files are read by batches ordered by ID of file. Batches are parsed by a pool of processes,
+the main process writes results of batches to DB in the order of batches.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .log import get_logger, configure_logging
+from .config import get_config, set_config
+from .blobs import BlobStore
+from .errors import XMLLimitError
+from .law.readers import get_reader_class
+from .law._base import NO_XML_DATA_REASON
+from .util import get_archive_date, get_archive_region
+
+
+_BATCH_SIZE = 500
+_REPARSE_REASON = "Reparsed"
+
+
+def _parse_batch(reader_class, blob_root: str, columns, files: list, limits=None) -> tuple:
+    """Parse a batch of files. It is run in a worker process.
+
+    Args:
+        reader_class (type): Class of reader.
+        blob_root (str): Root directory of blob store.
+        columns (frozenset): Projected columns or None.
+        files (list): Tuples (file ID, blob key, fields of archive).
+        limits (XMLLimits, optional): Limits of XML files. Defaults to None, the default limits are used.
+
+    Returns:
+        tuple: Parsed files, rows of data table, size of raw data in bytes, errors and quarantined files.
+    """
+
+    store = BlobStore(blob_root)
+    parsed_files = []
+    rows = []
+    errors = []
+    quarantined = []
+    raw_size = 0
+
+    for file_id, blob_key, archive_fields in files:
+        try:
+            xml = store.get(blob_key)
+            xml_type, file_data, fields = reader_class.parse(xml, columns, limits)
+        except XMLLimitError as e:
+            quarantined.append((file_id, e.limit, e.message))
+            continue
+        except Exception as e:
+            errors.append((file_id, str(e)))
+            continue
+
+        raw_size += len(xml)
+        if len(file_data) == 0:
+            parsed_files.append({"id": file_id, "xml_type": xml_type, "reason": NO_XML_DATA_REASON})
+            continue
+
+        rows.append(dict(fields, **archive_fields, archive_file_id=file_id, data=file_data))
+        parsed_files.append({"id": file_id, "xml_type": xml_type, "reason": _REPARSE_REASON})
+
+    return parsed_files, rows, raw_size, errors, quarantined
+
+
+def _get_fields_by_name(archive_name: str) -> dict:
+    """Fields of archive by its name. Readers take region from directory of FTP server, so it is used only
+    for archives without stored rows.
+    """
+
+    region, _ = get_archive_region(archive_name)
+    archive_date, _ = get_archive_date(archive_name)
+
+    return {"region": region, "archive_date": archive_date.date() if archive_date is not None else None}
+
+
+def _read_batches(db, table, law_number: str, folder_name: str, batch_size: int):
+    """Read batches of stored files with fields of their archives which are taken from stored rows.
+
+    Yields:
+        list: Tuples (file ID, blob key, fields of archive).
+    """
+
+    last_id = 0
+    while True:
+        files = db.get_stored_files_batch(law_number, folder_name, last_id, batch_size)
+        if len(files) == 0:
+            break
+
+        archive_fields = db.get_archive_fields(table, list({archive_id for _, _, archive_id, _ in files}))
+        yield [(file_id, blob_key, archive_fields.get(archive_id) or _get_fields_by_name(archive_name))
+               for file_id, blob_key, archive_id, archive_name in files]
+        last_id = files[-1][0]
+
+
+class _Progress():
+    """Counters of reparsed files and throughput"""
+
+    def __init__(self):
+        self.count = self.error_count = self.quarantined_count = self.size = 0
+        self._started_on = time.monotonic()
+
+    def add(self, count: int, error_count: int, size: int, quarantined_count=0):
+        self.count += count
+        self.error_count += error_count
+        self.quarantined_count += quarantined_count
+        self.size += size
+
+    def report(self, log):
+        elapsed = max(time.monotonic() - self._started_on, 1e-6)
+        log.info("Reparsed %s file(s), %s error(s), %s quarantined; %.1f files/s, %.2f MB/s",
+                 self.count, self.error_count, self.quarantined_count, self.count / elapsed,
+                 self.size / elapsed / 1024 / 1024)
+
+
+def reparse(law_number: str, folder_name: str, config, workers=None, batch_size=_BATCH_SIZE) -> tuple:
+    """Parse again all kept files of the folder and rewrite their rows.
+
+    Args:
+        law_number (str): Law number.
+        folder_name (str): Folder name.
+        config (Config): Config.
+        workers (int, optional): Count of worker processes. Defaults to None, count of CPUs is used.
+        batch_size (int, optional): Files per batch. Defaults to 500.
+
+    Returns:
+        tuple: Count of reparsed files and count of errors.
+    """
+
+    store = BlobStore.from_config(config)
+    if store is None:
+        raise ValueError("app.blob_store.path has to be set in config to reparse files")
+
+    reader_class = get_reader_class(law_number, folder_name)
+    db = reader_class._DB_CLASS(config)
+    columns = reader_class.get_projected_columns(config)
+    limits = reader_class.get_xml_limits(config)
+    workers = workers or os.cpu_count() or 1
+    progress = _Progress()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep every worker busy while the main process writes results
+        in_flight = deque()
+        for files in _read_batches(db, reader_class._DATA_TABLE, law_number, folder_name, batch_size):
+            in_flight.append(executor.submit(_parse_batch, reader_class, store.root, columns, files, limits))
+            if len(in_flight) >= workers * 2:
+                _write_batch(db, reader_class._DATA_TABLE, in_flight.popleft().result(), progress)
+
+        while len(in_flight) > 0:
+            _write_batch(db, reader_class._DATA_TABLE, in_flight.popleft().result(), progress)
+
+    return progress.count, progress.error_count
+
+
+def _write_batch(db, table, result: tuple, progress: _Progress):
+    log = get_logger(__name__)
+    parsed_files, rows, raw_size, errors, quarantined = result
+
+    for file_id, error in errors:
+        log.error("Got exception during reparse file %s: %s", file_id, error)
+    for file_id, _, reason in quarantined:
+        log.warning("Quarantine file %s: %s", file_id, reason, extra={"stage": "quarantine"})
+
+    if len(parsed_files) > 0 or len(quarantined) > 0:
+        db.replace_files_data(table, parsed_files, rows, quarantined)
+
+    progress.add(len(parsed_files), len(errors), raw_size, len(quarantined))
+    progress.report(log)
+
+
+def run(config=None):
+    config = config if config is not None else get_config()
+    set_config(config)
+    configure_logging(config)
+    log = get_logger(__name__)
+    cfg = config("app.reparse") or {}
+    workers = int(cfg["workers"]) if cfg.get("workers") else None
+    batch_size = int(cfg["batch_size"]) if cfg.get("batch_size") else _BATCH_SIZE
+
+    for law_number, folder_name in config("app.targets"):
+        log.info("Reparse files of folder '%s' of law %s", folder_name, law_number)
+        count, error_count = reparse(law_number, folder_name, config, workers, batch_size)
+        log.info("Total were reparsed: %s file(s); errors: %s", count, error_count)
@@ -7,6 +7,8 @@ from datetime import datetime as dt
 
 _ARCHIVE_DT_PATTERN = re.compile(r"^\d+$")
 _ARCHIVE_DT_TEMPLATE = "%Y%m%d%H"
+# archives of 223rd law have only date, e.g. purchaseNotice_Moskva_20190101_000000_20190101_235959_daily_001.xml.zip
+_ARCHIVE_DATE_TEMPLATE = "%Y%m%d"
 
 
 def get_archive_date(archive_name: str):
@@ -19,9 +21,28 @@ def get_archive_date(archive_name: str):
     if archive_date_str is None:
         return None, f"Cannot find date part in the archive {archive_name}"
 
+    template = _ARCHIVE_DATE_TEMPLATE if len(archive_date_str) == 8 else _ARCHIVE_DT_TEMPLATE
     try:
-        archive_date = dt.strptime(archive_date_str, _ARCHIVE_DT_TEMPLATE)
+        archive_date = dt.strptime(archive_date_str, template)
     except ValueError as error:
         return None, error
     else:
         return archive_date, None
+
+
+def get_archive_region(archive_name: str):
+    """Get region from archive name, e.g. 'Adygeja_Resp' from 'notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip'"""
+
+    archive_parts = archive_name.split("_")
+    region_parts = []
+    for archive_part in archive_parts[1:]:
+        if _ARCHIVE_DT_PATTERN.match(archive_part):
+            break
+        region_parts.append(archive_part)
+    else:
+        return None, f"Cannot find date part in the archive {archive_name}"
+
+    if len(region_parts) == 0:
+        return None, f"Cannot find region part in the archive {archive_name}"
+
+    return "_".join(region_parts), None
@@ -13,13 +13,17 @@ setup(
     license="MIT",
     python_requires='>=3.6.0',
     install_requires=["lxml", "psycopg2", "psycopg2-binary", "SQLAlchemy"],
+    extras_require={"parquet": ["pyarrow"]},
     setup_requires=['pytest-runner'],
     tests_require=["pytest"],
     description="Crawler of resources from ftp.zakupki.gov.ru",
     url='https://github.com/ruzhnikov/gov-purchases-crawler',
     entry_points={
         "console_scripts": [
-            "gov-purchases=gov.app:run"
+            "gov-purchases=gov.app:run",
+            "gov-purchases-backfill=gov.backfill:run",
+            "gov-purchases-reparse=gov.reparse:run",
+            "gov-purchases-export=gov.export:run"
         ]
     },
     long_description="""..."""
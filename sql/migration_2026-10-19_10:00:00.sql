@@ -0,0 +1,28 @@
+-- projected fields of notifications and protocols. See gov.law.util.project_fields
+ALTER TABLE forty_fourth_law.notifications_data
+    ADD purchase_number VARCHAR(50),
+    ADD customer_inn VARCHAR(12),
+    ADD region VARCHAR(100),
+    ADD max_price NUMERIC,
+    ADD publish_date TIMESTAMP WITHOUT TIME ZONE;
+
+ALTER TABLE forty_fourth_law.protocols_data
+    ADD purchase_number VARCHAR(50),
+    ADD customer_inn VARCHAR(12),
+    ADD region VARCHAR(100),
+    ADD max_price NUMERIC,
+    ADD publish_date TIMESTAMP WITHOUT TIME ZONE;
+
+CREATE INDEX notifications_data_purchase_number_idx ON forty_fourth_law.notifications_data (purchase_number);
+CREATE INDEX notifications_data_customer_inn_idx ON forty_fourth_law.notifications_data (customer_inn);
+CREATE INDEX notifications_data_region_publish_date_idx ON forty_fourth_law.notifications_data (region, publish_date);
+CREATE INDEX notifications_data_max_price_idx ON forty_fourth_law.notifications_data (max_price);
+CREATE INDEX notifications_data_publish_date_idx ON forty_fourth_law.notifications_data (publish_date);
+
+CREATE INDEX protocols_data_purchase_number_idx ON forty_fourth_law.protocols_data (purchase_number);
+CREATE INDEX protocols_data_customer_inn_idx ON forty_fourth_law.protocols_data (customer_inn);
+CREATE INDEX protocols_data_region_publish_date_idx ON forty_fourth_law.protocols_data (region, publish_date);
+CREATE INDEX protocols_data_max_price_idx ON forty_fourth_law.protocols_data (max_price);
+CREATE INDEX protocols_data_publish_date_idx ON forty_fourth_law.protocols_data (publish_date);
+
+-- existing rows are filled by `gov-purchases-backfill -c <config file> -f <folder>`
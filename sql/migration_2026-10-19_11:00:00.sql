@@ -0,0 +1,16 @@
+-- date of archive, the partition key of data tables. See gov.db._partitions
+ALTER TABLE forty_fourth_law.notifications_data ADD archive_date DATE;
+ALTER TABLE forty_fourth_law.protocols_data ADD archive_date DATE;
+
+-- e.g. notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip
+UPDATE forty_fourth_law.notifications_data nd
+SET archive_date = to_date(substring(a.name FROM '_(\d{8})\d{2}[_.]'), 'YYYYMMDD')
+FROM archive_files af
+JOIN archives a ON a.id = af.archive_id
+WHERE af.id = nd.archive_file_id;
+
+UPDATE forty_fourth_law.protocols_data pd
+SET archive_date = to_date(substring(a.name FROM '_(\d{8})\d{2}[_.]'), 'YYYYMMDD')
+FROM archive_files af
+JOIN archives a ON a.id = af.archive_id
+WHERE af.id = pd.archive_file_id;
@@ -0,0 +1,12 @@
+-- Unique covering indexes for lookups of archives and their files. Requires PostgreSQL 11 or above.
+-- Duplicates have to be removed before, they can be found by
+--     SELECT name, size, count(*) FROM archives GROUP BY name, size HAVING count(*) > 1;
+--     SELECT archive_id, name, size, count(*) FROM archive_files GROUP BY archive_id, name, size HAVING count(*) > 1;
+ALTER TABLE archives
+    ADD CONSTRAINT archives_name_size_key UNIQUE (name, size) INCLUDE (id, has_parsed);
+ALTER TABLE archive_files
+    ADD CONSTRAINT archive_files_archive_id_name_size_key UNIQUE (archive_id, name, size) INCLUDE (id, has_parsed);
+
+-- foreign keys of data tables. They are used by delete_file_data and ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS notifications_data_archive_file_id_idx ON forty_fourth_law.notifications_data (archive_file_id);
+CREATE INDEX IF NOT EXISTS protocols_data_archive_file_id_idx ON forty_fourth_law.protocols_data (archive_file_id);
@@ -0,0 +1,40 @@
+-- data of 223rd law. See gov.law._ttl_readers
+CREATE SCHEMA two_hundred_twenty_third_law;
+
+-- a table for storing file's data of purchase notices in JSONB format
+CREATE TABLE two_hundred_twenty_third_law.purchase_notices_data (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
+);
+CREATE INDEX purchase_notices_data_archive_file_id_idx ON two_hundred_twenty_third_law.purchase_notices_data (archive_file_id);
+CREATE INDEX purchase_notices_data_purchase_number_idx ON two_hundred_twenty_third_law.purchase_notices_data (purchase_number);
+CREATE INDEX purchase_notices_data_customer_inn_idx ON two_hundred_twenty_third_law.purchase_notices_data (customer_inn);
+CREATE INDEX purchase_notices_data_region_publish_date_idx ON two_hundred_twenty_third_law.purchase_notices_data (region, publish_date);
+CREATE INDEX purchase_notices_data_max_price_idx ON two_hundred_twenty_third_law.purchase_notices_data (max_price);
+CREATE INDEX purchase_notices_data_publish_date_idx ON two_hundred_twenty_third_law.purchase_notices_data (publish_date);
+
+-- a table for storing file's data of purchase protocols in JSONB format
+CREATE TABLE two_hundred_twenty_third_law.purchase_protocols_data (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
+);
+CREATE INDEX purchase_protocols_data_archive_file_id_idx ON two_hundred_twenty_third_law.purchase_protocols_data (archive_file_id);
+CREATE INDEX purchase_protocols_data_purchase_number_idx ON two_hundred_twenty_third_law.purchase_protocols_data (purchase_number);
+CREATE INDEX purchase_protocols_data_customer_inn_idx ON two_hundred_twenty_third_law.purchase_protocols_data (customer_inn);
+CREATE INDEX purchase_protocols_data_region_publish_date_idx ON two_hundred_twenty_third_law.purchase_protocols_data (region, publish_date);
+CREATE INDEX purchase_protocols_data_max_price_idx ON two_hundred_twenty_third_law.purchase_protocols_data (max_price);
+CREATE INDEX purchase_protocols_data_publish_date_idx ON two_hundred_twenty_third_law.purchase_protocols_data (publish_date);
@@ -0,0 +1,2 @@
+-- key of raw XML file in the local blob store. See gov.blobs
+ALTER TABLE archive_files ADD blob_key VARCHAR(64);
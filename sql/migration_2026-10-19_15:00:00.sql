@@ -0,0 +1,17 @@
+-- modification time of archive on FTP server. See gov.purchases.ArchiveEntry
+ALTER TABLE archives ADD modified_on TIMESTAMP WITHOUT TIME ZONE;
+-- the status check reads modification time too, so it is added to the covering index
+ALTER TABLE archives
+    DROP CONSTRAINT archives_name_size_key,
+    ADD CONSTRAINT archives_name_size_key UNIQUE (name, size) INCLUDE (id, has_parsed, modified_on);
+
+-- directories of FTP server which have been read completely.
+-- A directory is not read again while its modification time is the same
+CREATE TABLE folders (
+    id SERIAL PRIMARY KEY,
+    law_number law NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    modified_on TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    checked_on TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    CONSTRAINT folders_law_number_path_key UNIQUE (law_number, path)
+);
@@ -0,0 +1,10 @@
+-- XML files which are above limits of size, depth or count of elements and have not been parsed.
+-- Raw files can be taken from the blob store by `archive_files.blob_key`
+CREATE TABLE quarantined_files (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT NOT NULL REFERENCES archive_files (id) ON DELETE CASCADE,
+    "limit" VARCHAR(20) NOT NULL,
+    reason VARCHAR(250),
+    created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    CONSTRAINT quarantined_files_archive_file_id_key UNIQUE (archive_file_id)
+);
@@ -0,0 +1,57 @@
+-- Optional. Converts data tables into tables partitioned by archive_date.
+-- Set 'db.partition_by: archive_date' in config after that. Requires PostgreSQL 11 or above.
+-- Partitions for new values are created by the crawler, see gov.db._partitions.
+CREATE OR REPLACE FUNCTION partition_data_table(schema_name TEXT, table_name TEXT) RETURNS VOID AS $$
+DECLARE
+    key_value RECORD;
+    partition_name TEXT;
+BEGIN
+    -- names of tables and sequences below are resolved in the schema of law
+    PERFORM set_config('search_path', quote_ident(schema_name) || ', public', true);
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', table_name, table_name || '_old');
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY NONE', table_name || '_id_seq');
+    EXECUTE format('CREATE TABLE %I (
+        id INT NOT NULL DEFAULT nextval(''%I''),
+        archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
+        data JSONB,
+        purchase_number VARCHAR(50),
+        customer_inn VARCHAR(12),
+        region VARCHAR(100),
+        max_price NUMERIC,
+        publish_date TIMESTAMP WITHOUT TIME ZONE,
+        archive_date DATE
+    ) PARTITION BY RANGE (archive_date)', table_name, table_name || '_id_seq');
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', table_name || '_id_seq', table_name);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT',
+                   table_name || '_default', table_name);
+
+    FOR key_value IN EXECUTE format('SELECT DISTINCT date_trunc(''month'', archive_date)::date AS value
+                                     FROM %I WHERE archive_date IS NOT NULL', table_name || '_old') LOOP
+        partition_name := table_name || to_char(key_value.value, '"_y"YYYY"m"MM');
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, table_name, key_value.value, (key_value.value + INTERVAL '1 month')::date);
+    END LOOP;
+
+    EXECUTE format('INSERT INTO %I SELECT id, archive_file_id, data, purchase_number, customer_inn,
+                    region, max_price, publish_date, archive_date FROM %I', table_name, table_name || '_old');
+    EXECUTE format('DROP TABLE %I', table_name || '_old');
+
+    EXECUTE format('CREATE INDEX %I ON %I (id)', table_name || '_id_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (archive_file_id)', table_name || '_archive_file_id_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (purchase_number)', table_name || '_purchase_number_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (customer_inn)', table_name || '_customer_inn_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (region, publish_date)', table_name || '_region_publish_date_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (max_price)', table_name || '_max_price_idx', table_name);
+    EXECUTE format('CREATE INDEX %I ON %I (publish_date)', table_name || '_publish_date_idx', table_name);
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+SELECT partition_data_table('forty_fourth_law', 'notifications_data');
+SELECT partition_data_table('forty_fourth_law', 'protocols_data');
+SELECT partition_data_table('two_hundred_twenty_third_law', 'purchase_notices_data');
+SELECT partition_data_table('two_hundred_twenty_third_law', 'purchase_protocols_data');
+COMMIT;
+
+DROP FUNCTION partition_data_table(TEXT, TEXT);
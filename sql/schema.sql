@@ -12,7 +12,21 @@ CREATE TABLE archives (
     has_parsed boolean NOT NULL DEFAULT FALSE,
     law_number law NOT NULL DEFAULT '44',
     folder_name VARCHAR(100),
-    reason VARCHAR(250) DEFAULT 'OK'
+    reason VARCHAR(250) DEFAULT 'OK',
+    modified_on TIMESTAMP WITHOUT TIME ZONE,
+    CONSTRAINT archives_name_size_key UNIQUE (name, size) INCLUDE (id, has_parsed, modified_on)
+);
+
+-- directories of FTP server which have been read completely.
+-- A directory is not read again while its modification time is the same
+DROP TABLE IF EXISTS folders CASCADE;
+CREATE TABLE folders (
+    id SERIAL PRIMARY KEY,
+    law_number law NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    modified_on TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    checked_on TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    CONSTRAINT folders_law_number_path_key UNIQUE (law_number, path)
 );
 
 -- table for storing files of archive
@@ -25,7 +39,21 @@ CREATE TABLE archive_files (
     size INT NOT NULL,
     parsed_on TIMESTAMP WITHOUT TIME ZONE DEFAULT NULL,
     has_parsed BOOLEAN NOT NULL DEFAULT FALSE,
-    reason VARCHAR(250)
+    reason VARCHAR(250),
+    blob_key VARCHAR(64),
+    CONSTRAINT archive_files_archive_id_name_size_key UNIQUE (archive_id, name, size) INCLUDE (id, has_parsed)
+);
+
+-- XML files which are above limits of size, depth or count of elements and have not been parsed.
+-- Raw files can be taken from the blob store by `archive_files.blob_key`
+DROP TABLE IF EXISTS quarantined_files CASCADE;
+CREATE TABLE quarantined_files (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT NOT NULL REFERENCES archive_files (id) ON DELETE CASCADE,
+    "limit" VARCHAR(20) NOT NULL,
+    reason VARCHAR(250),
+    created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc'),
+    CONSTRAINT quarantined_files_archive_file_id_key UNIQUE (archive_file_id)
 );
 
 DROP SCHEMA IF EXISTS forty_fourth_law CASCADE;
@@ -36,13 +64,80 @@ DROP TABLE IF EXISTS forty_fourth_law.notifications_data;
 CREATE TABLE forty_fourth_law.notifications_data (
     id SERIAL PRIMARY KEY,
     archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
-    data JSONB
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
 );
+CREATE INDEX notifications_data_archive_file_id_idx ON forty_fourth_law.notifications_data (archive_file_id);
+CREATE INDEX notifications_data_purchase_number_idx ON forty_fourth_law.notifications_data (purchase_number);
+CREATE INDEX notifications_data_customer_inn_idx ON forty_fourth_law.notifications_data (customer_inn);
+CREATE INDEX notifications_data_region_publish_date_idx ON forty_fourth_law.notifications_data (region, publish_date);
+CREATE INDEX notifications_data_max_price_idx ON forty_fourth_law.notifications_data (max_price);
+CREATE INDEX notifications_data_publish_date_idx ON forty_fourth_law.notifications_data (publish_date);
 
 -- a table for storing file's data of protocols in JSONB format
 DROP TABLE IF EXISTS forty_fourth_law.protocols_data;
 CREATE TABLE forty_fourth_law.protocols_data (
     id SERIAL PRIMARY KEY,
     archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
-    data JSONB
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
+);
+CREATE INDEX protocols_data_archive_file_id_idx ON forty_fourth_law.protocols_data (archive_file_id);
+CREATE INDEX protocols_data_purchase_number_idx ON forty_fourth_law.protocols_data (purchase_number);
+CREATE INDEX protocols_data_customer_inn_idx ON forty_fourth_law.protocols_data (customer_inn);
+CREATE INDEX protocols_data_region_publish_date_idx ON forty_fourth_law.protocols_data (region, publish_date);
+CREATE INDEX protocols_data_max_price_idx ON forty_fourth_law.protocols_data (max_price);
+CREATE INDEX protocols_data_publish_date_idx ON forty_fourth_law.protocols_data (publish_date);
+
+DROP SCHEMA IF EXISTS two_hundred_twenty_third_law CASCADE;
+CREATE SCHEMA two_hundred_twenty_third_law;
+
+-- a table for storing file's data of purchase notices of 223rd law in JSONB format
+DROP TABLE IF EXISTS two_hundred_twenty_third_law.purchase_notices_data;
+CREATE TABLE two_hundred_twenty_third_law.purchase_notices_data (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
+);
+CREATE INDEX purchase_notices_data_archive_file_id_idx ON two_hundred_twenty_third_law.purchase_notices_data (archive_file_id);
+CREATE INDEX purchase_notices_data_purchase_number_idx ON two_hundred_twenty_third_law.purchase_notices_data (purchase_number);
+CREATE INDEX purchase_notices_data_customer_inn_idx ON two_hundred_twenty_third_law.purchase_notices_data (customer_inn);
+CREATE INDEX purchase_notices_data_region_publish_date_idx ON two_hundred_twenty_third_law.purchase_notices_data (region, publish_date);
+CREATE INDEX purchase_notices_data_max_price_idx ON two_hundred_twenty_third_law.purchase_notices_data (max_price);
+CREATE INDEX purchase_notices_data_publish_date_idx ON two_hundred_twenty_third_law.purchase_notices_data (publish_date);
+
+-- a table for storing file's data of purchase protocols of 223rd law in JSONB format
+DROP TABLE IF EXISTS two_hundred_twenty_third_law.purchase_protocols_data;
+CREATE TABLE two_hundred_twenty_third_law.purchase_protocols_data (
+    id SERIAL PRIMARY KEY,
+    archive_file_id INT REFERENCES archive_files (id) ON DELETE CASCADE,
+    data JSONB,
+    purchase_number VARCHAR(50),
+    customer_inn VARCHAR(12),
+    region VARCHAR(100),
+    max_price NUMERIC,
+    publish_date TIMESTAMP WITHOUT TIME ZONE,
+    archive_date DATE
 );
+CREATE INDEX purchase_protocols_data_archive_file_id_idx ON two_hundred_twenty_third_law.purchase_protocols_data (archive_file_id);
+CREATE INDEX purchase_protocols_data_purchase_number_idx ON two_hundred_twenty_third_law.purchase_protocols_data (purchase_number);
+CREATE INDEX purchase_protocols_data_customer_inn_idx ON two_hundred_twenty_third_law.purchase_protocols_data (customer_inn);
+CREATE INDEX purchase_protocols_data_region_publish_date_idx ON two_hundred_twenty_third_law.purchase_protocols_data (region, publish_date);
+CREATE INDEX purchase_protocols_data_max_price_idx ON two_hundred_twenty_third_law.purchase_protocols_data (max_price);
+CREATE INDEX purchase_protocols_data_publish_date_idx ON two_hundred_twenty_third_law.purchase_protocols_data (publish_date);
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from gov.db import DBClient, FileStatus
+from gov.db._bloom import BloomFilter, get_shared_filter
+from gov.log import get_logger
+
+
+def _names(count: int, prefix="notification"):
+    return [f"{prefix}_Moskva_2019010100_2019020100_{i:06d}.xml.zip" for i in range(count)]
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(10000, 0.01)
+    names = _names(10000)
+    for name in names:
+        bloom.add(name, 1000)
+
+    # there are no false negatives
+    assert all(bloom.contains(name, 1000) for name in names)
+    # the size is a part of the key
+    assert sum(bloom.contains(name, 1001) for name in names) < 300
+    false_positives = sum(bloom.contains(name, 1000) for name in _names(10000, "protocol"))
+    assert false_positives < 300
+    assert 9900 <= bloom.count <= 10000
+    assert not bloom.is_overfilled
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "parsed.bloom")
+    assert BloomFilter.load(path) is None
+
+    bloom = BloomFilter(100)
+    bloom.add("a.zip", 10)
+    bloom.synced_on = "2019-01-01 00:00:00.000000"
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert loaded.contains("a.zip", 10)
+    assert not loaded.contains("b.zip", 10)
+    assert (loaded.count, loaded.capacity, loaded.synced_on) == (1, 100, "2019-01-01 00:00:00.000000")
+
+
+def test_shared_filter(tmp_path):
+    path = str(tmp_path / "shared.bloom")
+    bloom = get_shared_filter(path, lambda: BloomFilter(10))
+
+    assert get_shared_filter(path, lambda: pytest.fail("The filter is created once")) is bloom
+
+
+@pytest.mark.parametrize("trust", (False, True))
+def test_archive_status_by_filter(trust):
+    db = DBClient.__new__(DBClient)
+    db.log = get_logger(__name__)
+    db._parsed_filter = BloomFilter(100)
+    db._parsed_filter.add("parsed.zip", 10)
+    db._is_parsed_filter_trusted = trust
+    db._state = None
+    checks = []
+
+    def session():
+        checks.append(True)
+        raise RuntimeError("DB is checked")
+
+    db._session = session
+
+    # a definite miss does not go to DB
+    assert db.get_archive_status("new.zip", 10) == FileStatus.FILE_DOES_NOT_EXIST
+    assert checks == []
+
+    # a probable hit is confirmed by DB unless the filter is trusted
+    if trust:
+        assert db.get_archive_status("parsed.zip", 10) == FileStatus.FILE_EXISTS
+        assert checks == []
+    else:
+        with pytest.raises(RuntimeError):
+            db.get_archive_status("parsed.zip", 10)
+        assert checks == [True]
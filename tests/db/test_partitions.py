@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from datetime import date
+from gov.db import _partitions as partitions
+from gov.db.models import FFLNotificationsData
+
+
+def test_get_partition_name():
+    assert partitions.get_partition_name("notifications_data", "archive_date", date(2019, 3, 12)) == \
+        "notifications_data_y2019m03"
+    assert partitions.get_partition_name("notifications_data", "region", "Adygeja_Resp") == \
+        "notifications_data_adygeja_resp"
+
+    with pytest.raises(ValueError):
+        partitions.get_partition_name("notifications_data", "unknown", "value")
+
+
+def test_get_partition_ddl():
+    table = FFLNotificationsData.__table__
+
+    ddl = str(partitions.get_partition_ddl(table, "archive_date", date(2019, 12, 31)))
+    assert ddl == "CREATE TABLE IF NOT EXISTS forty_fourth_law.notifications_data_y2019m12 PARTITION OF " \
+        "forty_fourth_law.notifications_data FOR VALUES FROM ('2019-12-01') TO ('2020-01-01')"
+
+    ddl = str(partitions.get_partition_ddl(table, "region", "Moskva'"))
+    assert ddl.endswith("FOR VALUES IN ('Moskva''')")
+
+
+def test_get_partition_table():
+    partition = partitions.get_partition_table(FFLNotificationsData.__table__, "region", "Moskva")
+
+    assert partition.name == "notifications_data_moskva"
+    assert partition.schema == "forty_fourth_law"
+    assert "id" not in partition.columns
+    assert "archive_date" in partition.columns
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+from datetime import datetime as dt
+import pytest
+from gov.db._state import LocalStateStore, FileRow
+from gov.db import DBClient
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalStateStore(str(tmp_path / "state.sqlite"))
+    yield store
+    store.close()
+
+
+def test_archives(store):
+    assert store.get_archive("44", "notifications", "archive.zip", 100) is None
+
+    store.put_archives([(1, "44", "notifications", "archive.zip", 100, False, None)])
+    assert store.get_archive("44", "notifications", "archive.zip", 100) == FileRow(100, False)
+    assert store.get_archive("44", "protocols", "archive.zip", 100) is None
+    assert store.get_archive("44", "notifications", "archive.zip", 200) is None
+
+    store.update_archive(1, has_parsed=True, reason="OK")
+    assert store.get_archive("44", "notifications", "archive.zip", 100) == FileRow(100, True)
+
+    store.update_archive(1, size=200)
+    assert store.get_archive("44", "notifications", "archive.zip", 200) == FileRow(200, True)
+
+    # rows from DB replace local ones
+    store.put_archives([(1, "44", "notifications", "archive.zip", 300, False, None)])
+    assert store.get_archive("44", "notifications", "archive.zip", 300) == FileRow(300, False)
+
+
+def test_archive_modification_time(store):
+    store.put_archives([(1, "44", "notifications", "archive.zip", 100, True, dt(2019, 1, 5, 10, 30))])
+    assert store.get_archive("44", "notifications", "archive.zip", 100) == \
+        FileRow(100, True, dt(2019, 1, 5, 10, 30))
+
+    store.update_archive(1, modified_on=dt(2019, 2, 1, 8, 0, 15))
+    assert store.get_archive("44", "notifications", "archive.zip", 100).modified_on == dt(2019, 2, 1, 8, 0, 15)
+
+
+def test_migrate_old_store(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE archives (id INTEGER PRIMARY KEY, law TEXT NOT NULL, folder TEXT NOT NULL, "
+                 "name TEXT NOT NULL, size INTEGER NOT NULL, has_parsed INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("INSERT INTO archives VALUES (1, '44', 'notifications', 'archive.zip', 100, 1)")
+    conn.commit()
+    conn.close()
+
+    store = LocalStateStore(path)
+    assert store.get_archive("44", "notifications", "archive.zip", 100) == FileRow(100, True, None)
+    store.close()
+
+
+def test_archive_files(store):
+    store.put_archive_files([(1, 10, "file.xml", 100, False), (2, 10, "file2.xml", 100, True)])
+    assert store.get_archive_file(10, "file.xml", 100) == FileRow(100, False)
+    assert store.get_archive_file(10, "file2.xml", 100) == FileRow(100, True)
+    assert store.get_archive_file(11, "file.xml", 100) is None
+
+    store.update_archive_file(1, has_parsed=True)
+    assert store.get_archive_file(10, "file.xml", 100) == FileRow(100, True)
+
+    store.delete_archive_files(10)
+    assert store.get_archive_file(10, "file.xml", 100) is None
+
+
+def test_meta(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    store = LocalStateStore(path)
+    assert store.get_meta("synced_on") is None
+    store.set_meta("synced_on", "2019-01-01 00:00:00.000000")
+    store.close()
+
+    store = LocalStateStore(path)
+    assert store.get_meta("synced_on") == "2019-01-01 00:00:00.000000"
+    store.close()
+
+
+def test_archive_is_modified():
+    stored_on = dt(2019, 1, 5, 10, 30)
+    assert DBClient._is_modified(stored_on, dt(2019, 1, 6, 10, 30))
+    # LIST gives times without seconds and dates without times for old files
+    assert not DBClient._is_modified(stored_on, dt(2019, 1, 5, 10, 30, 45))
+    assert not DBClient._is_modified(stored_on, dt(2019, 1, 5))
+    # modification times are unknown, only sizes are compared
+    assert not DBClient._is_modified(None, dt(2019, 1, 6))
+    assert not DBClient._is_modified(stored_on, None)
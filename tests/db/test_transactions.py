@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import json
+from decimal import Decimal
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+from gov.db import DBClient
+from gov.db._db import _dumps_json
+from gov.db._state import LocalStateStore, FileRow
+from gov.db.models import ArchiveFile
+from gov.log import get_logger
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+
+    # pysqlite does not begin transactions itself, SAVEPOINTs need it
+    @sa.event.listens_for(engine, "connect")
+    def connect(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @sa.event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    ArchiveFile.__table__.create(engine)
+
+    db = DBClient.__new__(DBClient)
+    db.log = get_logger(__name__)
+    db._session_maker = sessionmaker(bind=engine)
+    db._state = LocalStateStore(str(tmp_path / "state.sqlite"))
+    db._state.put_archive_files([(file_id, 1, f"{file_id}.xml", 10, False) for file_id in (1, 2, 3)])
+    sess = db.get_session()
+    sess.execute(ArchiveFile.__table__.insert(),
+                 [{"id": file_id, "archive_id": 1, "name": f"{file_id}.xml", "size": 10} for file_id in (1, 2, 3)])
+    sess.commit()
+    sess.close()
+    yield db
+    db._state.close()
+
+
+def _parsed_files(db) -> list:
+    sess = db.get_session()
+    rows = sess.query(ArchiveFile.id).filter(ArchiveFile.has_parsed == True).order_by(ArchiveFile.id).all()
+    sess.close()
+    return [row[0] for row in rows]
+
+
+def _is_parsed_in_state(db, file_id: int) -> bool:
+    return db._state.get_archive_file(1, f"{file_id}.xml", 10) == FileRow(10, True)
+
+
+def test_savepoints_inside_archive_transaction(db):
+    session = db.get_session()
+    db.mark_archive_file_as_parsed(1, "notification", session=session)
+
+    with pytest.raises(ValueError):
+        with db.savepoint(session):
+            db.mark_archive_file_as_parsed(2, "notification", session=session)
+            raise ValueError("broken file")
+
+    with db.savepoint(session):
+        db.mark_archive_file_as_parsed(3, "notification", session=session)
+
+    # nothing is visible before the commit of archive
+    assert _parsed_files(db) == []
+    assert not _is_parsed_in_state(db, 1)
+
+    session.commit()
+    session.close()
+
+    assert _parsed_files(db) == [1, 3]
+    assert [_is_parsed_in_state(db, file_id) for file_id in (1, 2, 3)] == [True, False, True]
+
+
+def test_rolled_back_archive_transaction(db):
+    session = db.get_session()
+    with db.savepoint(session):
+        db.mark_archive_file_as_parsed(1, "notification", session=session)
+    session.rollback()
+    session.commit()
+    session.close()
+
+    assert _parsed_files(db) == []
+    assert not _is_parsed_in_state(db, 1)
+
+
+def test_decimals_are_json_numbers():
+    data = {"lot": [{"maxPrice": Decimal("1500.50")}, {"maxPrice": 20}], "name": "decimal:1"}
+
+    assert _dumps_json(data) == '{"lot": [{"maxPrice": 1500.50}, {"maxPrice": 20}], "name": "decimal:1"}'
+    assert json.loads(_dumps_json(data), parse_float=Decimal) == data
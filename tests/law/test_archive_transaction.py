@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+import zipfile
+import pytest
+from datetime import date
+from contextlib import contextmanager
+from gov.config import Config
+from gov.db import FileStatus
+from gov.law import util
+from gov.law._ffl_readers import FortyFourthLawNotifications
+from gov.law._zip import MmapZipFile
+from gov.log import get_logger
+from gov.progress import Progress
+
+
+_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:oos="http://zakupki.gov.ru/oos/types/1">
+<fcsNotificationEF><oos:purchaseNumber>{number}</oos:purchaseNumber></fcsNotificationEF>
+</export>
+"""
+
+
+class _Session():
+    def __init__(self):
+        self.commits = 0
+        self.is_closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.is_closed = True
+
+
+class _FakeDB():
+    def __init__(self):
+        self.session = _Session()
+        self.files = {}
+        self.parsed = []
+        self.rolled_back = []
+        self.archive = {}
+        self.partitions = []
+        self.is_session_opened = False
+        self.quarantined = []
+        self.broken_files = set()
+
+    def prepare_partition(self, table, fields):
+        # the partition is created before the transaction of archive
+        assert not self.is_session_opened
+        self.partitions.append(fields)
+
+    def get_session(self):
+        self.is_session_opened = True
+        return self.session
+
+    @contextmanager
+    def savepoint(self, session):
+        assert session is self.session
+        try:
+            yield
+        except Exception:
+            self.rolled_back.append(len(self.files))
+            raise
+
+    def get_archive_file_status(self, archive_id, fname, fsize):
+        return FileStatus.FILE_DOES_NOT_EXIST
+
+    def add_archive_file(self, archive_id, fname, fsize, blob_key=None, session=None):
+        assert session is self.session
+        if fname in self.broken_files:
+            raise ValueError("broken file")
+        self.files[fname] = len(self.files) + 1
+        return self.files[fname]
+
+    def quarantine_archive_file(self, file_id, limit, message, session=None):
+        assert session is self.session
+        self.quarantined.append(file_id)
+
+    def insert_notification_data(self, file_id, data, session=None, fields=None):
+        assert session is self.session
+        if fields["purchase_number"] == "2":
+            raise ValueError("broken data")
+
+    def mark_archive_file_as_parsed(self, file_id, xml_type, session=None, reason=None):
+        assert session is self.session
+        self.parsed.append(file_id)
+
+    def update_archive(self, archive_id, session=None, **kwargs):
+        assert session is self.session
+        self.archive.update(kwargs)
+
+    def mark_archive_as_parsed(self, archive_id, reason="OK", session=None):
+        assert session is self.session
+        self.archive["has_parsed"] = True
+
+
+class _Killer():
+    kill_now = False
+
+
+def _make_reader(db):
+    reader = FortyFourthLawNotifications.__new__(FortyFourthLawNotifications)
+    reader.log = get_logger(__name__)
+    reader.db = db
+    reader.killer = _Killer()
+    reader._files = {}
+    reader._conf = lambda key: None
+    reader._blobs = None
+    reader._parse_cache = None
+    reader._inflate_threads = 1
+    reader._projected_columns = None
+    reader._xml_limits = util.DEFAULT_XML_LIMITS
+    reader._progress = Progress()
+    return reader
+
+
+def test_archive_is_written_by_one_transaction(tmp_path):
+    archive = str(tmp_path / "notification_Moskva_2019010100_2019020100_001.xml.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for number in ("1", "2", "3"):
+            zip_file.writestr(f"{number}.xml", _XML.format(number=number))
+
+    db = _FakeDB()
+    reader = _make_reader(db)
+
+    assert reader.handle_archive(archive, 1, "Moskva") is False
+
+    # the broken file is rolled back alone, the rest is committed once with the archive
+    assert db.rolled_back == [2]
+    assert db.parsed == [1, 3]
+    assert db.session.commits == 1
+    assert db.session.is_closed
+    assert db.partitions == [{"region": "Moskva", "archive_date": date(2019, 1, 1)}]
+    assert db.archive == {"reason": "One or more file(s) of archive weren't parsed"}
+    assert reader._progress.snapshot()["counters"]["files_failed"] == 1
+
+
+def test_interrupted_archive_is_not_marked(tmp_path):
+    archive = str(tmp_path / "notification_Moskva_2019010100_2019020100_001.xml.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("1.xml", _XML.format(number="1"))
+
+    db = _FakeDB()
+    reader = _make_reader(db)
+    reader.killer.kill_now = True
+
+    # the interrupted archive differs from a parsed one, so its directory is not taken as read
+    assert reader.handle_archive(archive, 1, "Moskva") is None
+    assert db.parsed == []
+    assert db.archive == {}
+    assert db.session.is_closed
+
+
+def test_errors_of_file_registration_are_kept_in_file(tmp_path, caplog):
+    archive = str(tmp_path / "notification_Moskva_2019010100_2019020100_001.xml.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for number in ("1", "3", "4"):
+            zip_file.writestr(f"{number}.xml", _XML.format(number=number))
+        zip_file.writestr("large.xml", _XML.format(number="5" * 1000))
+        zip_file.writestr("broken_large.xml", _XML.format(number="6" * 1000))
+
+    db = _FakeDB()
+    db.broken_files = {"3.xml", "broken_large.xml"}
+    reader = _make_reader(db)
+    reader._xml_limits = util.XMLLimits(max_size=1000, max_depth=200, max_elements=2000000)
+
+    # failed writes of files are rolled back by their SAVEPOINTs, the run goes on with the next files
+    assert reader.handle_archive(archive, 1, "Moskva") is False
+    assert db.rolled_back == [1, 3]
+    assert db.parsed == [1, 2]
+    assert db.quarantined == [3]
+    # quarantined files are logged by their own stage which is not sampled with parsed files
+    assert [record.stage for record in caplog.records if record.getMessage().startswith("Quarantine")] == \
+        ["quarantine"]
+    assert db.session.commits == 1
+    assert db.archive == {"reason": "One or more file(s) of archive weren't parsed"}
+    assert reader._progress.snapshot()["counters"]["files_failed"] == 2
+
+
+def test_open_archive_by_configured_reader(tmp_path):
+    archive = str(tmp_path / "notification_Moskva_2019010100_2019020100_001.xml.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("1.xml", _XML.format(number="1"))
+
+    reader = _make_reader(_FakeDB())
+    for zip_reader, archive_class in ((None, MmapZipFile), ("mmap", MmapZipFile), ("zipfile", zipfile.ZipFile)):
+        reader._conf = lambda key, zip_reader=zip_reader: zip_reader
+        with reader._open_archive(archive) as zip_file:
+            assert type(zip_file) is archive_class
+
+    reader._conf = lambda key: "unzip"
+    with pytest.raises(ValueError):
+        reader._open_archive(archive)
+
+
+def test_xml_limits_of_config():
+    limits = FortyFourthLawNotifications.get_xml_limits(Config({"app": {"xml_limits": {"max_depth": "50"}}}))
+    assert limits == util.XMLLimits(max_size=util.DEFAULT_XML_LIMITS.max_size, max_depth=50,
+                                    max_elements=util.DEFAULT_XML_LIMITS.max_elements)
+
+    # 0 is not taken as the default limit
+    with pytest.raises(ValueError):
+        FortyFourthLawNotifications.get_xml_limits(Config({"app": {"xml_limits": {"max_size": "0"}}}))
@@ -2,7 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+from datetime import datetime
+from decimal import Decimal
 from lxml import etree
+from gov.errors import XMLLimitError
 from gov.law import util
 
 
@@ -32,3 +35,150 @@ def test_bool_replace():
     assert util.bool_replace(true_txt) == True
     assert util.bool_replace(false_txt) == False
     assert util.bool_replace(other_txt) == other_txt
+
+
+def test_number_replace():
+    assert util.number_replace("100") == 100
+    assert util.number_replace("-100") == -100
+    assert util.number_replace("1234.56") == Decimal("1234.56")
+    assert util.number_replace("0.10") == Decimal("0.10")
+    assert util.number_replace("12 345") == "12 345"
+    assert util.number_replace("1e5") == "1e5"
+
+
+def test_date_replace():
+    assert util.date_replace("2019-03-12+03:00") == "2019-03-12+03:00"
+    assert util.date_replace("2019-03-12Z") == "2019-03-12+00:00"
+    assert util.date_replace("2019-03-12") == "2019-03-12"
+    assert util.date_replace("2019-03-12T10:30:00") == "2019-03-12T10:30:00"
+    assert util.date_replace("2019-03-12T10:30:00+03:00") == "2019-03-12T07:30:00+00:00"
+    assert util.date_replace("2019-03-12T01:30:00.5+03:00") == "2019-03-11T22:30:00.500000+00:00"
+    assert util.date_replace("2019-03-12T10:30:00Z") == "2019-03-12T10:30:00+00:00"
+    assert util.date_replace("2019-13-12T10:30:00") == "2019-13-12T10:30:00"
+    assert util.date_replace("Just other text") == "Just other text"
+
+
+def test_to_datetime():
+    assert util.to_datetime("2019-03-12T10:30:00+03:00") == datetime(2019, 3, 12, 7, 30)
+    # the day of date is not moved by its time zone
+    assert util.to_datetime("2019-03-12+03:00") == datetime(2019, 3, 12)
+    assert util.to_datetime("2019-03-12") == datetime(2019, 3, 12)
+    assert util.to_datetime("Just other text") is None
+
+
+def test_compile_tag_handlers():
+    handlers = util.compile_tag_handlers({"id": util.number_replace}, {"id": str.upper})
+    assert handlers["id"] is str.upper
+
+    with pytest.raises(TypeError):
+        util.compile_tag_handlers({"id": "not callable"})
+
+
+def test_get_xml_data_with_tag_handlers():
+    handlers = util.compile_tag_handlers({"id": util.number_replace})
+    xml_type, data = util.get_xml_data(simple_xml, tag_handlers=handlers)
+
+    assert xml_type == "fcsContractSign"
+    assert data["fcsContractSign"]["id"] == 4780921
+    assert util.get_xml_data(simple_xml)[1]["fcsContractSign"]["id"] == "4780921"
+
+
+def test_get_xml_data_type_from_root():
+    xml_type, data = util.get_xml_data(simple_xml, type_from_root=True)
+
+    assert xml_type == "export"
+    assert data["fcsContractSign"]["id"] == "4780921"
+
+
+def test_project_fields():
+    data = {
+        "fcsNotificationEF": {
+            "purchaseNumber": "0173200001419000123",
+            "docPublishDate": "2019-03-12T10:30:00+03:00",
+            "lots": {"lot": [{"maxPrice": 1000.5}, {"maxPrice": 20}]},
+        }
+    }
+    fields = {
+        "purchase_number": ((("purchaseNumber",),), util.to_str),
+        "max_price": ((("lot", "maxPrice"), ("lots", "lot", "maxPrice")), util.to_decimal),
+        "publish_date": ((("docPublishDate",),), util.to_datetime),
+        "customer_inn": ((("purchaseResponsible", "responsibleOrg", "INN"),), util.to_str),
+    }
+
+    projected = util.project_fields(data["fcsNotificationEF"], fields)
+    assert projected == {
+        "purchase_number": "0173200001419000123",
+        "max_price": Decimal("1000.5"),
+        "publish_date": datetime(2019, 3, 12, 7, 30),
+        "customer_inn": None,
+    }
+    assert util.project_fields(data["fcsNotificationEF"], fields, ("max_price",)) == {"max_price": Decimal("1000.5")}
+    assert util.project_fields(None, fields)["purchase_number"] is None
+
+
+nested_xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://localhost/oos/export/1" xmlns:oos="http://localhost/oos/types/1">
+    <fcsNotificationEF schemeVersion="8.3">
+        <oos:id>20112233</oos:id>
+        <oos:lots>
+            <oos:lot><oos:maxPrice>1000.50</oos:maxPrice><oos:isEmpty/></oos:lot>
+            <oos:lot><oos:maxPrice>20</oos:maxPrice><oos:printForm><oos:url>http://localhost</oos:url></oos:printForm></oos:lot>
+        </oos:lots>
+        <oos:printForm><oos:signature>AAAA</oos:signature></oos:printForm>
+        <oos:isGOZ>false</oos:isGOZ>
+    </fcsNotificationEF>
+</export>
+"""
+
+
+def test_iterative_read_dict_is_same_as_recursive():
+    skip_tags = ("printForm",)
+    tag_handlers = {"maxPrice": util.to_decimal}
+    expected = util.recursive_read_dict(etree.fromstring(nested_xml), skip_tags, tag_handlers)
+
+    root_tag, first_child_tag, data = util.iterative_read_dict(nested_xml, skip_tags, tag_handlers)
+
+    assert (root_tag, first_child_tag) == ("export", "fcsNotificationEF")
+    assert (root_tag, data) == expected
+    assert "printForm" not in data["fcsNotificationEF"]
+    assert data["fcsNotificationEF"]["lots"]["lot"][0] == {"maxPrice": Decimal("1000.50"), "isEmpty": None}
+
+
+def test_iterative_read_dict_skips_comments():
+    xml = b"<export><!-- comment --><doc><?pi data?><code>1</code><!-- comment --></doc></export>"
+
+    assert util.get_xml_data(xml) == ("doc", {"doc": {"code": "1"}})
+
+
+def test_iterative_read_dict_repeated_leaf_elements():
+    xml = b"<export><doc><code>1</code><code>2</code><code>3</code><name>a</name></doc></export>"
+
+    assert util.get_xml_data(xml) == ("doc", {"doc": {"code": ["1", "2", "3"], "name": "a"}})
+
+
+def test_iterative_read_dict_deep_nesting():
+    depth = 250
+    xml = ("<a>" * depth + "1" + "</a>" * depth).encode("utf-8")
+    limits = util.XMLLimits(max_size=len(xml), max_depth=depth, max_elements=depth)
+
+    _, _, data = util.iterative_read_dict(xml, limits=limits)
+    for _ in range(depth - 2):
+        data = data["a"]
+    assert data == {"a": "1"}
+
+
+@pytest.mark.parametrize("limits, limit", (
+    (util.XMLLimits(max_size=100, max_depth=200, max_elements=1000), "size"),
+    (util.XMLLimits(max_size=10000, max_depth=3, max_elements=1000), "depth"),
+    (util.XMLLimits(max_size=10000, max_depth=200, max_elements=5), "elements"),
+))
+def test_iterative_read_dict_limits(limits, limit):
+    with pytest.raises(XMLLimitError) as error:
+        util.get_xml_data(nested_xml, limits=limits)
+
+    assert error.value.limit == limit
+
+
+def test_get_xml_data_without_document():
+    with pytest.raises(ValueError):
+        util.get_xml_data(b"<export>text</export>")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import zipfile
+import pytest
+from contextlib import closing
+from gov.law._zip import MmapZipFile, inflate_ahead
+
+
+_MEMBERS = {
+    "notification_0001.xml": b"<export>" + b"<a>1</a>" * 1000 + b"</export>",
+    "stored.xml": b"<export><b>2</b></export>",
+    "протокол.xml": "<export>Москва</export>".encode(),
+    "empty.xml": b"",
+}
+
+
+def _make_zip(path, compression=zipfile.ZIP_DEFLATED, comment=b""):
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for name, data in _MEMBERS.items():
+            zip_file.writestr(name, data, compression if name != "stored.xml" else zipfile.ZIP_STORED)
+        zip_file.comment = comment
+
+    return str(path)
+
+
+def _assert_same_as_zipfile(path):
+    with zipfile.ZipFile(path) as expected, MmapZipFile(path) as zip_file:
+        assert zip_file.is_supported()
+        assert zip_file.namelist() == expected.namelist()
+        for entry, expected_entry in zip(zip_file.infolist(), expected.infolist()):
+            assert entry.filename == expected_entry.filename
+            assert entry.file_size == expected_entry.file_size
+            assert zip_file.read(entry) == expected.read(expected_entry)
+
+
+def test_read(tmp_path):
+    path = _make_zip(tmp_path / "a.zip", comment=b"comment of archive")
+    _assert_same_as_zipfile(path)
+
+    with MmapZipFile(path) as zip_file:
+        assert zip_file.read("stored.xml") == _MEMBERS["stored.xml"]
+        with pytest.raises(KeyError):
+            zip_file.read("unknown.xml")
+
+
+def test_read_zip64(tmp_path, monkeypatch):
+    # every offset and size is written as 64-bit value
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 10)
+    path = _make_zip(tmp_path / "a.zip")
+    monkeypatch.undo()
+
+    _assert_same_as_zipfile(path)
+
+
+def test_unsupported_compression(tmp_path):
+    path = _make_zip(tmp_path / "a.zip", compression=zipfile.ZIP_BZIP2)
+
+    with MmapZipFile(path) as zip_file:
+        assert not zip_file.is_supported()
+        with pytest.raises(NotImplementedError):
+            zip_file.read("notification_0001.xml")
+
+
+def test_bad_files(tmp_path):
+    empty = tmp_path / "empty.zip"
+    empty.write_bytes(b"")
+    with pytest.raises(zipfile.BadZipFile):
+        MmapZipFile(str(empty))
+
+    text = tmp_path / "text.zip"
+    text.write_bytes(b"not a zip file")
+    with pytest.raises(zipfile.BadZipFile):
+        MmapZipFile(str(text))
+
+    # corrupt data of stored member
+    path = _make_zip(tmp_path / "a.zip")
+    data = bytearray((tmp_path / "a.zip").read_bytes())
+    position = data.find(b"<b>2</b>")
+    data[position + 1] = ord("c")
+    (tmp_path / "a.zip").write_bytes(bytes(data))
+    with MmapZipFile(path) as zip_file:
+        with pytest.raises(zipfile.BadZipFile):
+            zip_file.read("stored.xml")
+
+
+def test_inflate_is_bounded_by_declared_size(tmp_path):
+    path = str(tmp_path / "bomb.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("bomb.xml", b"\0" * 10 * 1024 * 1024)
+
+    with MmapZipFile(path) as zip_file:
+        entry = zip_file.getinfo("bomb.xml")
+        # the header declares a small member, which is not inflated further
+        for file_size in (100, entry.file_size + 1):
+            with pytest.raises(zipfile.BadZipFile):
+                zip_file.read(entry._replace(file_size=file_size))
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_inflate_ahead(tmp_path, threads):
+    path = _make_zip(tmp_path / "a.zip")
+
+    with MmapZipFile(path) as zip_file:
+        items = [(entry, i) for i, entry in enumerate(zip_file.infolist())]
+        result = list(inflate_ahead(zip_file, items, threads, depth=2))
+
+    assert [(entry.filename, i, data) for entry, i, data in result] == \
+        [(name, i, data) for i, (name, data) in enumerate(_MEMBERS.items())]
+
+
+def test_inflate_ahead_close(tmp_path):
+    path = _make_zip(tmp_path / "a.zip")
+
+    with MmapZipFile(path) as zip_file:
+        items = [(entry,) for entry in zip_file.infolist()]
+        with closing(inflate_ahead(zip_file, items, 4)) as files:
+            entry, data = next(files)
+
+    assert data == _MEMBERS[entry.filename]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from datetime import datetime as dt, timedelta
+from types import SimpleNamespace
+from gov.app import _Application, _DownloadSessions, _Prefetcher
+from gov.purchases import AIMDController
+
+
+def _downloads(prefetcher, sizes, downloaded):
+    for size in sizes:
+        if not prefetcher.acquire(size):
+            break
+        downloaded.append(size)
+        yield size
+
+
+def _wait_for(condition, timeout=2.0):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        event.wait(0.01)
+
+    return False
+
+
+def test_prefetch_depth():
+    prefetcher = _Prefetcher(1, 0)
+    downloaded = []
+    prefetcher.start(_downloads(prefetcher, [10, 20, 30, 40], downloaded))
+
+    items = iter(prefetcher)
+    assert next(items) == 10
+    # one archive is handled and one is downloaded ahead
+    assert _wait_for(lambda: downloaded == [10, 20])
+    assert not _wait_for(lambda: len(downloaded) > 2, 0.2)
+
+    prefetcher.release(10)
+    assert _wait_for(lambda: downloaded == [10, 20, 30])
+
+    for size in [20, 30, 40]:
+        assert next(items) == size
+        prefetcher.release(size)
+
+    assert list(items) == []
+
+
+def test_prefetch_byte_budget():
+    prefetcher = _Prefetcher(10, 100)
+    downloaded = []
+    prefetcher.start(_downloads(prefetcher, [150, 60, 50], downloaded))
+
+    items = iter(prefetcher)
+    # an archive larger than the budget is allowed alone
+    assert next(items) == 150
+    assert not _wait_for(lambda: len(downloaded) > 1, 0.2)
+
+    prefetcher.release(150)
+    assert _wait_for(lambda: downloaded == [150, 60])
+    assert not _wait_for(lambda: len(downloaded) > 2, 0.2)
+
+    prefetcher.release(next(items))
+    assert next(items) == 50
+
+
+def test_prefetch_stop():
+    prefetcher = _Prefetcher(2, 0)
+    downloaded = []
+    prefetcher.start(_downloads(prefetcher, [1, 2, 3, 4, 5], downloaded))
+
+    items = iter(prefetcher)
+    assert next(items) == 1
+    assert _wait_for(lambda: len(downloaded) == 3)
+
+    assert prefetcher.stop() == [2, 3]
+
+
+def test_unchanged_directory_is_rechecked():
+    app = _Application.__new__(_Application)
+    app._recheck_interval = timedelta(days=1)
+    modified_on = dt(2019, 1, 1)
+    app._folders = {
+        "/fcs_regions/Moskva/notifications/currMonth": (modified_on, dt.utcnow() - timedelta(hours=1)),
+        "/fcs_regions/Moskva/notifications/prevMonth": (modified_on, dt.utcnow() - timedelta(days=2)),
+    }
+
+    assert app._is_unchanged_directory("/fcs_regions/Moskva/notifications/currMonth", modified_on)
+    assert not app._is_unchanged_directory("/fcs_regions/Moskva/notifications/currMonth", dt(2019, 1, 2))
+    # files republished in place do not change time of directory, so it is listed again after the interval
+    assert not app._is_unchanged_directory("/fcs_regions/Moskva/notifications/prevMonth", modified_on)
+    assert not app._is_unchanged_directory("/fcs_regions/Moskva/contracts/currMonth", modified_on)
+
+    app._recheck_interval = None
+    assert app._is_unchanged_directory("/fcs_regions/Moskva/notifications/prevMonth", modified_on)
+
+
+class _SessionClient():
+    def __init__(self, clients):
+        self.is_closed = False
+        clients.append(self)
+
+    def close(self):
+        self.is_closed = True
+
+
+def test_download_sessions():
+    clients = []
+    sessions = _DownloadSessions(lambda: _SessionClient(clients), 2)
+    both_started = threading.Barrier(2, timeout=2)
+
+    def download(entry, client):
+        # both downloads are in progress at once
+        both_started.wait()
+        return entry, client
+
+    first, second = sessions.submit(download, "a"), sessions.submit(download, "b")
+    assert first.result()[0] == "a"
+    assert second.result()[0] == "b"
+    # every thread has its own session
+    assert first.result()[1] is not second.result()[1]
+
+    sessions.close()
+    assert len(clients) == 2
+    assert all(client.is_closed for client in clients)
+
+
+def test_archives_are_downloaded_in_parallel_in_order_of_listing():
+    entries = [SimpleNamespace(fname=name, fsize=1) for name in ("a", "b", "c")]
+    app = _Application.__new__(_Application)
+    app._client = SimpleNamespace(read=lambda: iter(entries))
+    app._controller = AIMDController(2)
+    app._downloads = _DownloadSessions(lambda: _SessionClient([]), 2)
+    app._progress = SimpleNamespace(add=lambda **kwargs: None)
+    app.killer = SimpleNamespace(kill_now=False)
+    app._prepare_archive = lambda entry: {"entry": entry}
+    a_is_waiting = threading.Event()
+    b_is_done = threading.Event()
+
+    def download(entry, client):
+        # "b" is downloaded while "a" is still in progress
+        if entry.fname == "a":
+            a_is_waiting.set()
+            return b_is_done.wait(2)
+        a_is_waiting.wait(2)
+        b_is_done.set()
+        return True
+
+    app._download = download
+    budget = _Prefetcher(2, 0)
+    jobs = []
+    for job in app._iter_downloaded_archives(False, None, budget):
+        jobs.append((job["entry"].fname, job["downloaded"]))
+        budget.release(job["entry"].fsize)
+    app._downloads.close()
+
+    assert jobs == [("a", True), ("b", True), ("c", True)]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from decimal import Decimal
+from gov.backfill import backfill
+from gov.config import Config
+from gov.db.models import FFLNotificationsData
+
+
+_ARCHIVE_NAME = "notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip"
+
+
+class _BackfillDB():
+    """Data table of notifications. Batches and updates are recorded"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.batches = []
+        self.updates = []
+
+    def get_data_batch(self, table, last_id, limit):
+        self.batches.append(last_id)
+        return [row for row in self.rows if row[0] > last_id][:limit]
+
+    def update_projected_fields(self, table, rows):
+        assert table is FFLNotificationsData
+        self.updates.extend(rows)
+
+
+def _row(row_id, purchase_number, archive_name=_ARCHIVE_NAME):
+    data = {"fcsNotificationEF": {"purchaseNumber": purchase_number, "lot": {"maxPrice": Decimal("10.50")}}}
+    return row_id, data, "fcsNotificationEF", archive_name
+
+
+def test_backfill():
+    db = _BackfillDB([_row(1, "1"), _row(2, "2"), _row(5, "5", "notification_unknown.xml.zip")])
+    config = Config({"app": {"projected_fields": ["purchase_number", "max_price"]}})
+
+    assert backfill(db, "notifications", config, batch_size=2) == 3
+
+    # rows are read by batches after the last ID until an empty batch
+    assert db.batches == [0, 2, 5]
+    assert [row["id"] for row in db.updates] == [1, 2, 5]
+    assert db.updates[0] == {"id": 1, "purchase_number": "1", "max_price": Decimal("10.50"),
+                             "region": "Adygeja_Resp", "archive_date": date(2019, 1, 1)}
+    # fields of archive are empty if its name cannot be read
+    assert db.updates[2]["archive_date"] is None
+
+
+def test_backfill_of_empty_table():
+    db = _BackfillDB([])
+
+    assert backfill(db, "notifications", Config({"app": {}})) == 0
+    assert db.updates == []
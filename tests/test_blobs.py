@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import os
+import zlib
+import pytest
+from gov.blobs import BlobStore
+from gov.config import Config
+
+
+def test_put_and_get(tmp_path):
+    store = BlobStore(str(tmp_path))
+    data = b'<?xml version="1.0" encoding="UTF-8"?><export>\xd0\x9c\xd0\xbe\xd1\x81\xd0\xba\xd0\xb2\xd0\xb0</export>'
+
+    key = store.put(data)
+    assert store.has(key)
+    assert store.get(key) == data
+
+    # files are appended to one pack
+    other_key = store.put(b"<a>1</a>")
+    assert store.get_path(other_key) == store.get_path(key)
+    assert os.listdir(os.path.join(str(tmp_path), "packs")) == [os.path.basename(store.get_path(key))]
+    store.close()
+
+    # the key is the location of file, it is read by another store without index
+    assert BlobStore(str(tmp_path)).get(other_key) == b"<a>1</a>"
+
+
+def test_put_same_content(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    assert store.put(b"<a>1</a>") == store.put(b"<a>1</a>")
+    assert store.put(b"<a>1</a>") != store.put(b"<a>2</a>")
+    store.close()
+
+    # the index of contents is kept between runs
+    assert BlobStore(str(tmp_path)).put(b"<a>2</a>") == store.put(b"<a>2</a>")
+
+
+def test_rolling_packs(tmp_path):
+    store = BlobStore(str(tmp_path), pack_size=10)
+    keys = [store.put(str(number).encode() * 20) for number in range(3)]
+
+    assert len({store.get_path(key) for key in keys}) == 3
+    assert [store.get(key) for key in keys] == [str(number).encode() * 20 for number in range(3)]
+    store.close()
+
+
+def test_get_file_of_older_versions(tmp_path):
+    store = BlobStore(str(tmp_path))
+    key = BlobStore.get_key(b"<a>1</a>")
+    path = store.get_path(key)
+    assert path == os.path.join(str(tmp_path), key[:2], key[2:4], key + ".z")
+
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(zlib.compress(b"<a>1</a>"))
+
+    assert store.has(key)
+    assert store.get(key) == b"<a>1</a>"
+
+
+def test_get_unknown_key(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        store.get(BlobStore.get_key(b"unknown"))
+    with pytest.raises(FileNotFoundError):
+        store.get("unknown:0:10")
+
+
+def test_from_config(tmp_path):
+    assert BlobStore.from_config(Config({"app": {}})) is None
+
+    config = Config({"app": {"blob_store": {"path": str(tmp_path), "compress_level": "1"}}})
+    store = BlobStore.from_config(config)
+    assert store.get(store.put(b"data")) == b"data"
+    # readers of all folders share the store
+    assert BlobStore.from_config(config) is store
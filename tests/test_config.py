@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from gov.config import _parse_targets
+
+
+def test_parse_targets():
+    assert _parse_targets("notifications", "44") == [["44", "notifications"]]
+    assert _parse_targets("notifications,protocols", "44") == [["44", "notifications"], ["44", "protocols"]]
+    assert _parse_targets("protocols, 223:purchaseNotice", "44") == [["44", "protocols"], ["223", "purchaseNotice"]]
+    assert _parse_targets("purchaseProtocol", "223") == [["223", "purchaseProtocol"]]
+    assert _parse_targets("protocols,protocols", "44") == [["44", "protocols"]]
+
+
+def test_parse_wrong_targets():
+    with pytest.raises(ValueError):
+        _parse_targets("purchaseNotice", "44")
+
+    with pytest.raises(ValueError):
+        _parse_targets("100:notifications", "44")
+
+    with pytest.raises(ValueError):
+        _parse_targets(",", "44")
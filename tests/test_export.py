@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import date, datetime as dt
+from decimal import Decimal
+import pytest
+from gov import export as export_module
+from gov.config import Config
+from gov.export import ParquetExporter, export, read_watermark, write_watermark
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _row(row_id, region, archive_date, data):
+    return {
+        "id": row_id,
+        "archive_file_id": row_id * 10,
+        "xml_type": "fcsNotificationEF",
+        "data": {"fcsNotificationEF": data},
+        "purchase_number": str(row_id),
+        "customer_inn": None,
+        "region": region,
+        "max_price": Decimal("100.50"),
+        "publish_date": dt(2019, 1, 2, 10, 0),
+        "archive_date": archive_date,
+    }
+
+
+def _get_document(xml_type, data):
+    return data.get(xml_type)
+
+
+def test_export_partitions(tmp_path):
+    exporter = ParquetExporter(str(tmp_path), {"placing_way": ("placingWay", "code"), "lot": ("lot",)},
+                               row_group_size=2, max_open_files=1)
+    exporter.write([
+        _row(1, "Moskva", date(2019, 1, 1), {"placingWay": {"code": "EA44"}, "lot": {"maxPrice": 1}}),
+        _row(2, "Moskva", date(2019, 1, 1), {}),
+        _row(3, "Adygeja_Resp", date(2019, 2, 1), {"placingWay": {"code": "OK44"}}),
+        _row(4, "Moskva", date(2019, 1, 1), {}),
+        _row(5, None, None, {}),
+    ], _get_document)
+    exporter.close()
+
+    moskva = tmp_path / "region=Moskva" / "month=2019-01"
+    # the file of Moskva was closed because of the limit of open files, so the last row is in a new file
+    assert sorted(os.listdir(moskva)) == ["part-1.parquet", "part-3.parquet"]
+    table = pq.read_table(str(moskva / "part-1.parquet"))
+    assert table.column("id").to_pylist() == [1, 2]
+    assert table.column("placing_way").to_pylist() == ["EA44", None]
+    assert table.column("lot").to_pylist() == ['{"maxPrice": 1}', None]
+    # prices are exported as decimals without loss of precision
+    assert str(table.schema.field("max_price").type) == "decimal128(38, 2)"
+    assert table.column("max_price").to_pylist() == [Decimal("100.50"), Decimal("100.50")]
+
+    assert os.listdir(tmp_path / "region=Adygeja_Resp" / "month=2019-02") == ["part-2.parquet"]
+    # month is taken from publish date if there is no date of archive
+    assert os.listdir(tmp_path / "region=__HIVE_DEFAULT_PARTITION__" / "month=2019-01") == ["part-4.parquet"]
+
+
+def test_abort(tmp_path):
+    exporter = ParquetExporter(str(tmp_path), row_group_size=1)
+    exporter.write([_row(1, "Moskva", date(2019, 1, 1), {})])
+    exporter.abort()
+
+    assert os.listdir(tmp_path / "region=Moskva" / "month=2019-01") == []
+
+
+def test_watermark(tmp_path):
+    assert read_watermark(str(tmp_path)) == (0, 0)
+    write_watermark(str(tmp_path), (42, 7))
+    assert read_watermark(str(tmp_path)) == (42, 7)
+
+    # a watermark of older version has only file ID
+    (tmp_path / "_watermark.json").write_text('{"archive_file_id": 42}')
+    assert read_watermark(str(tmp_path))[0] == 42
+    assert read_watermark(str(tmp_path)) > (42, 10 ** 12)
+
+
+class _ExportDB():
+    rows = []
+
+    def __init__(self, config):
+        pass
+
+    def get_export_batch(self, table, last_key, limit):
+        rows = [row for row in self.rows if (row["archive_file_id"], row["id"]) > tuple(last_key)]
+        return sorted(rows, key=lambda row: (row["archive_file_id"], row["id"]))[:limit]
+
+
+class _ExportReader():
+    _DB_CLASS = _ExportDB
+    _DATA_TABLE = None
+    _get_document = staticmethod(_get_document)
+
+
+def test_export_is_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_module, "get_reader_class", lambda law, folder: _ExportReader)
+    config = Config({"app": {"export": {"path": str(tmp_path), "batch_size": "2"}}})
+    # several rows of the last file
+    _ExportDB.rows = [dict(_row(row_id, "Moskva", date(2019, 1, 1), {}), archive_file_id=10) for row_id in (1, 2, 3)]
+
+    assert export("44", "notifications", config) == 3
+    assert export("44", "notifications", config) == 0
+
+    _ExportDB.rows.append(dict(_row(4, "Moskva", date(2019, 1, 1), {}), archive_file_id=10))
+    assert export("44", "notifications", config) == 1
+
+    folder = tmp_path / "44" / "notifications" / "region=Moskva" / "month=2019-01"
+    ids = [row_id for name in os.listdir(folder)
+           for row_id in pq.read_table(str(folder / name)).column("id").to_pylist()]
+    assert sorted(ids) == [1, 2, 3, 4]
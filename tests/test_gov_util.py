@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from datetime import datetime as dt
+from gov import util
+
+
+def test_get_archive_date():
+    date, error = util.get_archive_date("notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip")
+    assert error is None
+    assert date == dt(2019, 1, 1, 0)
+
+    date, error = util.get_archive_date("purchaseNotice_Moskva_20190101_000000_20190101_235959_daily_001.xml.zip")
+    assert error is None
+    assert date == dt(2019, 1, 1)
+
+    date, error = util.get_archive_date("notification_Adygeja_Resp.xml.zip")
+    assert date is None
+    assert error is not None
+
+
+def test_get_archive_region():
+    assert util.get_archive_region("notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip") == \
+        ("Adygeja_Resp", None)
+    assert util.get_archive_region("protocol_Moskva_2019010100_2019020100_001.xml.zip") == ("Moskva", None)
+
+    region, error = util.get_archive_region("notification_2019010100_2019020100_001.xml.zip")
+    assert region is None
+    assert error is not None
+
+    region, error = util.get_archive_region("notification_Moskva.xml.zip")
+    assert region is None
+    assert error is not None
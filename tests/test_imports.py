@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+
+_ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def _run(code: str):
+    return subprocess.run([sys.executable, "-c", code], cwd=_ROOT, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def test_import_has_no_side_effects():
+    # wrong command line arguments would break any attempt to load config
+    result = _run("""
+import sys
+sys.argv = ["worker", "--unknown-argument"]
+import gov.law.util, gov.log, gov.config
+from gov import config
+assert not config.is_loaded()
+assert "yaml" not in sys.modules
+assert "argparse" not in sys.modules
+assert "sqlalchemy" not in sys.modules
+""")
+    assert result.returncode == 0, result.stderr
+
+
+def test_explicit_config():
+    result = _run("""
+import sys
+sys.argv = ["worker", "--unknown-argument"]
+from gov import config
+from gov.db import FortyFourthLawDB
+cfg = config.Config({"app": {"mode": "prod"}, "db": {"echo": None}})
+db = FortyFourthLawDB(cfg)
+assert not config.is_loaded()
+assert db._get_engine_echo() is False
+""")
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime as dt
+from zoneinfo import ZoneInfo
+import pytest
+from gov.listing import ListItem, parse_list_line, parse_mlsd_line, parse_mlsd_time
+
+
+_NOW = dt(2019, 3, 1, 12, 0)
+
+
+@pytest.mark.parametrize("line, item", (
+    ("-rw-r--r-- 1 ftp ftp 1024 Jan 05 10:30 notification_Moskva_2019010100_2019020100_001.xml.zip",
+     ListItem("notification_Moskva_2019010100_2019020100_001.xml.zip", False, 1024, dt(2019, 1, 5, 10, 30))),
+    ("-rw-r--r--    1 1000     1000        77 Dec 31  2017 name with  spaces.zip",
+     ListItem("name with  spaces.zip", False, 77, None)),
+    ("drwxr-xr-x 2 ftp 4096 Feb 28 23:59 currMonth", ListItem("currMonth", True, 4096, dt(2019, 2, 28, 23, 59))),
+    # the date without year is in the previous year
+    ("-rw-r--r--+ 1 ftp ftp 5 Nov 10 08:00 old.zip", ListItem("old.zip", False, 5, dt(2018, 11, 10, 8, 0))),
+    ("lrwxrwxrwx 1 ftp ftp 9 Jan 01 00:00 last -> prevMonth", ListItem("last", False, 9, dt(2019, 1, 1))),
+    ("01-05-19  10:30PM       <DIR>          prevMonth", ListItem("prevMonth", True, 0, dt(2019, 1, 5, 22, 30))),
+    ("01-05-2019  12:05AM            1024 a b.zip", ListItem("a b.zip", False, 1024, dt(2019, 1, 5, 0, 5))),
+))
+def test_parse_list_line(line, item):
+    assert parse_list_line(line, _NOW) == item
+
+
+def test_parse_list_line_in_server_time_zone():
+    tz = ZoneInfo("Europe/Moscow")
+    assert parse_list_line("-rw-r--r-- 1 ftp ftp 5 Jan 05 01:30 a.zip", _NOW, tz).modified_on == dt(2019, 1, 4, 22, 30)
+    assert parse_list_line("01-05-19  10:30PM  5 a.zip", _NOW, tz).modified_on == dt(2019, 1, 5, 19, 30)
+    assert parse_list_line("-rw-r--r-- 1 ftp ftp 5 Dec 31  2017 a.zip", _NOW, tz).modified_on is None
+
+
+@pytest.mark.parametrize("line", ("total 8", "", "garbage line"))
+def test_parse_list_line_not_item(line):
+    assert parse_list_line(line, _NOW) is None
+
+
+def test_parse_mlsd_line():
+    assert parse_mlsd_line("type=file;size=1024;modify=20190105103000.123;UNIX.mode=0644; a b.zip") == \
+        ListItem("a b.zip", False, 1024, dt(2019, 1, 5, 10, 30))
+    assert parse_mlsd_line("Type=dir;Modify=20190105103000; currMonth") == \
+        ListItem("currMonth", True, 0, dt(2019, 1, 5, 10, 30))
+    assert parse_mlsd_line("type=cdir;modify=20190105103000; /fcs_regions") is None
+    assert parse_mlsd_line("type=pdir; ..") is None
+    assert parse_mlsd_line("broken") is None
+
+
+def test_parse_mlsd_time():
+    assert parse_mlsd_time("20190105103000") == dt(2019, 1, 5, 10, 30)
+    assert parse_mlsd_time("20191305103000") is None
+    assert parse_mlsd_time("2019") is None
+    assert parse_mlsd_time(None) is None
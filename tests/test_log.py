@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from gov import log
+
+
+def _record(message="message %s", args=("arg",), stage=None):
+    record = logging.LogRecord("test", logging.INFO, __file__, 10, message, args, None)
+    if stage is not None:
+        record.stage = stage
+    return record
+
+
+def test_sampling_filter():
+    sampling = log._SamplingFilter({"parse_file": 3, "listing": 1})
+
+    passed = [sampling.filter(_record(stage="parse_file")) for _ in range(7)]
+    assert passed == [True, False, False, True, False, False, True]
+    assert all(sampling.filter(_record(stage="listing")) for _ in range(3))
+    assert all(sampling.filter(_record()) for _ in range(3))
+
+
+def test_json_formatter():
+    data = json.loads(log._JsonFormatter().format(_record(stage="parse_file")))
+
+    assert data["message"] == "message arg"
+    assert data["level"] == "INFO"
+    assert data["logger"] == "test"
+    assert data["stage"] == "parse_file"
+
+
+def test_lazy_queue_handler():
+    records = []
+
+    class _Queue():
+        def put_nowait(self, record):
+            records.append(record)
+
+    record = _record()
+    log._LazyQueueHandler(_Queue()).emit(record)
+
+    assert records == [record]
+    assert record.args == ("arg",)
+    assert record.msg == "message %s"
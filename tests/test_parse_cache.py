@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import zlib
+from datetime import datetime as dt
+from decimal import Decimal
+import pytest
+from gov.config import Config
+from gov.parse_cache import ParseCache
+from gov.law import util
+from gov.law._ffl_readers import FortyFourthLawNotifications, FortyFourthLawProtocols
+from gov.law._zip import ZipEntry
+from gov.log import get_logger
+
+
+_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:oos="http://zakupki.gov.ru/oos/types/1">
+<fcsNotificationEF>
+<oos:purchaseNumber>0101200000119000001</oos:purchaseNumber>
+<oos:lot><oos:maxPrice>1500.50</oos:maxPrice></oos:lot>
+</fcsNotificationEF>
+</export>
+"""
+
+
+def test_get_and_put(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ParseCache(path)
+    result = ("fcsNotificationEF", {"fcsNotificationEF": {"maxPrice": Decimal("1.5"), "date": dt(2019, 1, 1)}})
+
+    assert cache.get(1, 100, "v1", b"data") is None
+    cache.put(1, 100, "v1", b"data", result)
+    assert cache.get(1, 100, "v1", b"data") == result
+    # other version of parser
+    assert cache.get(1, 100, "v2", b"data") is None
+    # collision of CRC-32 and size
+    assert cache.get(1, 100, "v1", b"atad") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.close()
+
+    cache = ParseCache(path)
+    assert cache.get(1, 100, "v1", b"data") == result
+    assert cache.size > 0
+    cache.close()
+
+
+def test_evict_least_recently_used(tmp_path):
+    value = b"x" * 1000
+    entry_size = len(zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+    cache = ParseCache(str(tmp_path / "cache.sqlite"), max_bytes=entry_size * 3)
+    for crc in range(3):
+        cache.put(crc, 1000, "v1", bytes([crc]), value)
+
+    # the first result is used, so the second one is the least recently used
+    assert cache.get(0, 1000, "v1", bytes([0])) == value
+    cache.put(3, 1000, "v1", bytes([3]), value)
+
+    assert cache.size <= entry_size * 3
+    assert cache.get(1, 1000, "v1", bytes([1])) is None
+    assert cache.get(0, 1000, "v1", bytes([0])) == value
+    assert cache.get(3, 1000, "v1", bytes([3])) == value
+    cache.close()
+
+
+def test_reader_skips_parsing_of_cached_files(tmp_path, monkeypatch):
+    calls = []
+    get_xml_data = util.get_xml_data
+
+    def counted_get_xml_data(*args, **kwargs):
+        calls.append(args[0])
+        return get_xml_data(*args, **kwargs)
+
+    monkeypatch.setattr(util, "get_xml_data", counted_get_xml_data)
+    reader = FortyFourthLawNotifications.__new__(FortyFourthLawNotifications)
+    reader.log = get_logger(__name__)
+    reader._parse_cache = ParseCache(str(tmp_path / "cache.sqlite"))
+    reader._xml_limits = util.DEFAULT_XML_LIMITS
+    entry = ZipEntry("notification.xml", len(_XML), 0, 8, zlib.crc32(_XML), 0, 0)
+
+    first = reader._get_xml_data(_XML, entry)
+    second = reader._get_xml_data(_XML, entry)
+
+    assert first == second
+    assert first[0] == "fcsNotificationEF"
+    assert len(calls) == 1
+
+    # the file is below the depth limit of the cached result, but above the new one
+    reader._xml_limits = util.XMLLimits(max_size=len(_XML), max_depth=2, max_elements=100)
+    with pytest.raises(util.XMLLimitError):
+        reader._get_xml_data(_XML, entry)
+    reader._parse_cache.close()
+
+
+def test_cache_is_shared_by_path(tmp_path):
+    config = Config({"app": {"parse_cache": {"path": str(tmp_path / "cache.sqlite"), "max_bytes": "1000"}}})
+    cache = ParseCache.from_config(config)
+
+    assert ParseCache.from_config(config) is cache
+    assert ParseCache.from_config(Config({"app": {}})) is None
+
+
+def test_parser_versions():
+    assert FortyFourthLawNotifications.get_parser_version() != FortyFourthLawProtocols.get_parser_version()
+    assert FortyFourthLawNotifications.get_parser_version() == FortyFourthLawNotifications.get_parser_version()
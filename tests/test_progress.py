@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import json
+import urllib.error
+import urllib.request
+import pytest
+from gov.config import Config
+from gov.progress import Progress, ProgressReporter, StatusServer, format_snapshot, start_monitoring
+
+
+class _Clock():
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot():
+    clock = _Clock()
+    progress = Progress(clock)
+    progress.add(archives_listed=2, bytes_listed=300, archives_skipped=5)
+    progress.add(archives_done=1, bytes_done=100, bytes_downloaded=200, files_parsed=20, rows_inserted=18)
+    progress.set_queue("prefetch", lambda: 1)
+    clock.now += 10
+
+    snapshot = progress.snapshot()
+
+    assert snapshot["counters"]["archives_skipped"] == 5
+    assert snapshot["rates"]["docs"] == 2.0
+    assert snapshot["rates"]["rows"] == 1.8
+    assert snapshot["queues"] == {"prefetch": 1}
+    # the listing is complete: 200 bytes are left at 10 bytes/s
+    assert snapshot["eta"] == 20.0
+
+    progress.set_queue("prefetch", None)
+    assert progress.snapshot()["queues"] == {}
+
+
+def test_eta_is_extrapolated_by_listed_regions():
+    clock = _Clock()
+    progress = Progress(clock)
+    regions = [0, 4]
+    progress.set_listing(lambda: tuple(regions))
+    progress.add(archives_listed=1, bytes_listed=100)
+    assert progress.snapshot()["eta"] is None
+
+    progress.add(archives_done=1, bytes_done=100)
+    clock.now += 10
+    # no region has been listed completely yet
+    assert progress.snapshot()["eta"] is None
+
+    regions[0] = 1
+    # 100 bytes of one region of 4, 300 bytes are left at 10 bytes/s
+    assert progress.snapshot()["eta"] == 30.0
+
+
+def test_format_snapshot():
+    progress = Progress(_Clock())
+    progress.add(archives_listed=3, archives_done=1, archives_failed=1, bytes_downloaded=3 * 1024 * 1024)
+
+    line = format_snapshot(progress.snapshot())
+
+    assert line.startswith("archives 2/3 (1 failed, 0 skipped)")
+    assert "3.0 MB downloaded" in line
+    assert line.endswith("ETA unknown")
+
+
+def test_status_server():
+    progress = Progress()
+    progress.add(files_parsed=7)
+    server = StatusServer(progress, 0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/status") as response:
+            assert response.headers["Content-Type"] == "application/json"
+            assert json.loads(response.read())["counters"]["files_parsed"] == 7
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other")
+        assert error.value.code == 404
+    finally:
+        server.stop()
+
+
+def test_start_monitoring():
+    services = start_monitoring(Progress(), Config({"app": {"progress": {"interval": 0, "http_port": 0}}}))
+    try:
+        assert [type(service) for service in services] == [StatusServer]
+    finally:
+        for service in services:
+            service.stop()
+
+    # values of config file are strings
+    services = start_monitoring(Progress(), Config({"app": {"progress": {"interval": "0"}}}))
+    assert services == []
+
+    services = start_monitoring(Progress(), Config({"app": {}}))
+    assert [type(service) for service in services] == [ProgressReporter]
+    services[0].stop()
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+import ftplib
+import time
+from datetime import datetime, timedelta
+import pytest
+import gov.purchases as purchases
+
+
+_TREE = {
+    "/fcs_regions": ["Adygeja_Resp", "Moskva"],
+    "/fcs_regions/Adygeja_Resp/notifications": ["a.zip"],
+    "/fcs_regions/Adygeja_Resp/protocols": ["b.zip", "currMonth/"],
+    "/fcs_regions/Adygeja_Resp/protocols/currMonth": ["c.zip"],
+    "/fcs_regions/Moskva/notifications": ["d.zip", "e.zip"],
+    "/fcs_regions/Moskva/protocols": ["f.zip"],
+}
+
+
+class _FakeFTP():
+    """FTP server with the tree above. Every LIST call is counted"""
+
+    def __init__(self, server, timeout=None):
+        self.cwd_path = None
+        self.lists = []
+        self.timeout = timeout
+
+    def login(self, user, password):
+        pass
+
+    def cwd(self, path):
+        if path != "../":
+            self.cwd_path = path
+
+    def retrlines(self, command, callback):
+        if command == "MLSD":
+            raise ftplib.error_perm("500 Unknown command")
+
+        self.lists.append(self.cwd_path)
+        callback("total 8")
+        for item in _TREE[self.cwd_path]:
+            if self.cwd_path == "/fcs_regions" or item.endswith("/"):
+                callback(f"drwxr-xr-x 2 ftp ftp 4096 Jan 01 00:00 {item.rstrip('/')}")
+            else:
+                callback(f"-rw-r--r-- 1 ftp ftp 100 Jan 01 00:00 {item}")
+
+    def retrbinary(self, command, callback, rest=None):
+        if command == "RETR /throttled.zip":
+            raise ftplib.error_temp("421 Too many connections")
+        if command == "RETR /dropped.zip" and rest is None:
+            callback(b"x" * 100)
+            raise EOFError
+        for _ in range(3 if rest is None else 2):
+            callback(b"x" * 100)
+
+    def voidcmd(self, command):
+        self.noops = getattr(self, "noops", 0) + 1
+
+    def close(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+class _MlsdFTP(_FakeFTP):
+    """The server supports MLSD, LIST is not expected"""
+
+    def retrlines(self, command, callback):
+        assert command == "MLSD"
+        self.lists.append(self.cwd_path)
+        callback(f"type=cdir;modify=20190101000000; {self.cwd_path}")
+        for item in _TREE[self.cwd_path]:
+            if self.cwd_path == "/fcs_regions" or item.endswith("/"):
+                callback(f"type=dir;modify=20190101000000; {item.rstrip('/')}")
+            else:
+                callback(f"type=file;size=100;modify=20190102030405; {item}")
+
+
+class _NlstFTP(_FakeFTP):
+    """LIST of unknown layout"""
+
+    def retrlines(self, command, callback):
+        if command == "MLSD":
+            raise ftplib.error_perm("500 Unknown command")
+        callback("unknown layout")
+
+    def nlst(self):
+        return [item.rstrip("/") for item in _TREE[self.cwd_path]]
+
+    def size(self, name):
+        if self.cwd_path == "/fcs_regions" or name + "/" in _TREE[self.cwd_path]:
+            raise ftplib.error_perm("550 Not a file")
+        return 100
+
+    def sendcmd(self, command):
+        return "213 20190102030405"
+
+
+# the last listing was two days ago, LIST gives times without year and seconds
+_MODIFIED_ON = (datetime.utcnow() - timedelta(days=2)).replace(second=0, microsecond=0)
+
+
+class _ServerTimeFTP(_NlstFTP):
+    """MLSD and MDTM give times in UTC, LIST gives them in Moscow time"""
+
+    def retrlines(self, command, callback):
+        for item in _TREE[self.cwd_path]:
+            name = item.rstrip("/")
+            is_dir = self.cwd_path == "/fcs_regions" or item.endswith("/")
+            if command == "MLSD":
+                callback(f"type={'dir' if is_dir else 'file'};size=100;modify={_MODIFIED_ON:%Y%m%d%H%M%S}; {name}")
+            elif self.is_list_known:
+                moscow_time = _MODIFIED_ON + timedelta(hours=3)
+                callback(f"{'d' if is_dir else '-'}rw-r--r-- 1 ftp ftp 100 {moscow_time:%b %d %H:%M} {name}")
+            else:
+                callback("unknown layout")
+
+    def sendcmd(self, command):
+        return f"213 {_MODIFIED_ON:%Y%m%d%H%M%S}"
+
+
+class _DroppedFTP(_FakeFTP):
+    def cwd(self, path):
+        raise EOFError
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(purchases, "FTP", _FakeFTP)
+    monkeypatch.setattr(purchases, "_RECONNECT_DELAY", 0)
+    client = purchases.Client("localhost", looking_folder=("notifications", "protocols"), keepalive_interval=0)
+    yield client
+    client.close()
+
+
+def test_read_several_folders(client):
+    files = [(f.region, f.folder, f.fname) for f in client.read()]
+
+    assert files == [
+        ("Adygeja_Resp", "notifications", "a.zip"),
+        ("Adygeja_Resp", "protocols", "b.zip"),
+        ("Adygeja_Resp", "protocols", "c.zip"),
+        ("Moskva", "notifications", "d.zip"),
+        ("Moskva", "notifications", "e.zip"),
+        ("Moskva", "protocols", "f.zip"),
+    ]
+    # the root folder is listed once for both folders
+    assert client.ftp.lists.count("/fcs_regions") == 1
+    assert (client.regions_listed, client.regions_count) == (2, 2)
+
+
+def test_archive_entries(client):
+    entries = list(client.read())
+
+    assert entries[1].full_name == "/fcs_regions/Adygeja_Resp/protocols/b.zip"
+    assert entries[1].fsize > 0 and entries[1].id is None and entries[1].status is None
+    # regions and folders are shared by entries
+    assert entries[1].region is entries[2].region
+    assert entries[1].folder is entries[2].folder
+    assert not hasattr(entries[0], "__dict__")
+
+
+@pytest.mark.parametrize("ftp_class", (_MlsdFTP, _NlstFTP))
+def test_read_by_mlsd_and_nlst(monkeypatch, ftp_class):
+    monkeypatch.setattr(purchases, "FTP", ftp_class)
+    client = purchases.Client("localhost", looking_folder=("notifications", "protocols"), keepalive_interval=0)
+    try:
+        entries = list(client.read())
+    finally:
+        client.close()
+
+    assert [entry.full_name for entry in entries] == [
+        "/fcs_regions/Adygeja_Resp/notifications/a.zip",
+        "/fcs_regions/Adygeja_Resp/protocols/b.zip",
+        "/fcs_regions/Adygeja_Resp/protocols/currMonth/c.zip",
+        "/fcs_regions/Moskva/notifications/d.zip",
+        "/fcs_regions/Moskva/notifications/e.zip",
+        "/fcs_regions/Moskva/protocols/f.zip",
+    ]
+    assert all(entry.fsize == 100 and entry.modified_on == datetime(2019, 1, 2, 3, 4, 5) for entry in entries)
+
+
+def test_skip_unchanged_directories(monkeypatch):
+    monkeypatch.setattr(purchases, "FTP", _MlsdFTP)
+    skipped = []
+
+    def skip_directory(path, modified_on):
+        skipped.append((path, modified_on))
+        return path == "/fcs_regions/Adygeja_Resp/protocols/currMonth"
+
+    client = purchases.Client("localhost", looking_folder="protocols", keepalive_interval=0,
+                              skip_directory=skip_directory)
+    try:
+        names = [entry.fname for entry in client.read()]
+    finally:
+        client.close()
+
+    assert names == ["b.zip", "f.zip"]
+    assert skipped == [("/fcs_regions/Adygeja_Resp/protocols/currMonth", datetime(2019, 1, 1))]
+
+
+def test_completed_directories(monkeypatch):
+    monkeypatch.setattr(purchases, "FTP", _MlsdFTP)
+    client = purchases.Client("localhost", looking_folder="protocols", keepalive_interval=0)
+    try:
+        entries = client.read()
+        next(entries)
+        # the directory is not read to the end yet
+        assert client.completed_directories == {}
+        list(entries)
+    finally:
+        client.close()
+
+    # only directories without subdirectories and with known modification time are remembered
+    assert client.completed_directories == {
+        "/fcs_regions/Adygeja_Resp/protocols/currMonth": (datetime(2019, 1, 1), 1)}
+
+
+@pytest.mark.parametrize("listing, is_list_known", (
+    (purchases.LISTING_MLSD, True), (purchases.LISTING_LIST, True), (purchases.LISTING_LIST, False)))
+def test_times_do_not_depend_on_listing(monkeypatch, listing, is_list_known):
+    monkeypatch.setattr(purchases, "FTP", _ServerTimeFTP)
+    monkeypatch.setattr(_ServerTimeFTP, "is_list_known", is_list_known, raising=False)
+    client = purchases.Client("localhost", looking_folder="protocols", keepalive_interval=0, listing=listing)
+    try:
+        times = {entry.full_name: entry.modified_on for entry in client.read()}
+    finally:
+        client.close()
+
+    # the same directory listed by MLSD, LIST and NLST with MDTM gives the same UTC times
+    assert times == {
+        "/fcs_regions/Adygeja_Resp/protocols/b.zip": _MODIFIED_ON,
+        "/fcs_regions/Adygeja_Resp/protocols/currMonth/c.zip": _MODIFIED_ON,
+        "/fcs_regions/Moskva/protocols/f.zip": _MODIFIED_ON,
+    }
+    if is_list_known:
+        assert client.completed_directories == {"/fcs_regions/Adygeja_Resp/protocols/currMonth": (_MODIFIED_ON, 1)}
+
+
+def test_unknown_listing(monkeypatch):
+    monkeypatch.setattr(purchases, "FTP", _FakeFTP)
+    with pytest.raises(ValueError):
+        purchases.Client("localhost", listing="nlst", keepalive_interval=0)
+
+
+def test_skip_region_in_all_folders(client):
+    files = []
+    for f in client.read():
+        files.append(f.fname)
+        if f.region == "Adygeja_Resp":
+            client.set_region_skipped(f.region)
+
+    assert files == ["a.zip", "d.zip", "e.zip", "f.zip"]
+
+
+class _FakeClock():
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket():
+    clock = _FakeClock()
+    bucket = purchases.TokenBucket(100, clock=clock, sleep=clock.sleep)
+
+    # the full bucket is taken without waiting
+    bucket.consume(100)
+    assert clock.sleeps == []
+
+    # debt is paid by waiting
+    bucket.consume(50)
+    assert clock.sleeps == [0.5]
+
+    clock.now += 1.0
+    bucket.consume(100)
+    assert clock.sleeps == [0.5]
+
+
+def test_token_bucket_without_limit():
+    clock = _FakeClock()
+    bucket = purchases.TokenBucket(0, clock=clock, sleep=clock.sleep)
+    bucket.consume(10 ** 9)
+
+    assert clock.sleeps == []
+
+
+def test_aimd_controller():
+    clock = _FakeClock()
+    controller = purchases.AIMDController(4, window=1.0, clock=clock)
+    assert controller.limit == 1
+
+    assert controller.acquire()
+    assert not controller.acquire(timeout=0)
+
+    # throughput grows, the limit grows by one per window
+    for rate in (100, 200, 300):
+        clock.now += 1.0
+        controller.add_bytes(rate)
+    assert controller.limit == 4
+
+    # throughput stays the same, the limit is kept
+    clock.now += 1.0
+    controller.add_bytes(300)
+    assert controller.limit == 4
+    assert controller.acquire(timeout=0)
+
+    # the server throttles us
+    controller.on_failure()
+    assert controller.limit == 2
+    controller.on_failure()
+    controller.on_failure()
+    assert controller.limit == 1
+
+    controller.release()
+    controller.release()
+    assert controller.active == 0
+
+
+def test_download(client, tmp_path):
+    controller = purchases.AIMDController(2)
+    client._controller = controller
+
+    client.download("/fcs_regions/Moskva/protocols/f.zip", "f.zip", str(tmp_path))
+    assert (tmp_path / "f.zip").read_bytes() == b"x" * 300
+    assert client.bytes_per_second > 0
+
+    controller._limit = 2
+    with pytest.raises(ftplib.error_temp):
+        client.download("/throttled.zip", "throttled.zip", str(tmp_path))
+    assert controller.limit == 1
+    assert controller.active == 0
+
+
+def test_download_resume(client, tmp_path):
+    first_ftp = client.ftp
+    client.download("/dropped.zip", "dropped.zip", str(tmp_path))
+
+    assert client.ftp is not first_ftp
+    assert (tmp_path / "dropped.zip").read_bytes() == b"x" * 300
+
+
+def test_read_after_reconnect(client):
+    files = []
+    for f in client.read():
+        files.append(f.fname)
+        # the connection is dropped by server while the archive is handled
+        client.ftp = _DroppedFTP("localhost")
+
+    assert files == ["a.zip", "b.zip", "c.zip", "d.zip", "e.zip", "f.zip"]
+
+
+def test_connection_timeout(client, monkeypatch):
+    assert client.ftp.timeout == purchases.DEFAULT_TIMEOUT
+
+    monkeypatch.setattr(purchases, "FTP", _FakeFTP)
+    other = purchases.Client("localhost", keepalive_interval=0, timeout=5.0)
+    assert other.ftp.timeout == 5.0
+    other.close()
+
+
+def test_keepalive(monkeypatch):
+    monkeypatch.setattr(purchases, "FTP", _FakeFTP)
+    client = purchases.Client("localhost", keepalive_interval=0.05)
+    time.sleep(1.5)
+    client.close()
+
+    assert client.ftp.noops >= 1
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime as dt
+from decimal import Decimal
+from gov.blobs import BlobStore
+from gov.law._base import NO_XML_DATA_REASON
+from gov.law import util
+from gov.law._ffl_readers import FortyFourthLawNotifications
+from gov.reparse import _Progress, _parse_batch, _read_batches, _write_batch
+
+
+_ARCHIVE_NAME = "notification_Adygeja_Resp_2019010100_2019020100_001.xml.zip"
+_ARCHIVE_FIELDS = {"region": "Adygeja_Resp", "archive_date": date(2019, 1, 1)}
+_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:oos="http://zakupki.gov.ru/oos/types/1">
+<fcsNotificationEF>
+<oos:purchaseNumber>0101200000119000001</oos:purchaseNumber>
+<oos:docPublishDate>2019-01-10T10:00:00+03:00</oos:docPublishDate>
+<oos:lot><oos:maxPrice>1500.50</oos:maxPrice></oos:lot>
+</fcsNotificationEF>
+</export>
+"""
+
+
+def test_parse_batch(tmp_path):
+    store = BlobStore(str(tmp_path))
+    key = store.put(_XML)
+    empty_key = store.put(b"<export></export>")
+
+    files = [(1, key, _ARCHIVE_FIELDS), (2, empty_key, _ARCHIVE_FIELDS),
+             (3, BlobStore.get_key(b"lost"), _ARCHIVE_FIELDS)]
+    parsed_files, rows, raw_size, errors, quarantined = _parse_batch(
+        FortyFourthLawNotifications, str(tmp_path), None, files)
+
+    # a file without documents and a lost file are errors
+    assert [file["id"] for file in parsed_files] == [1]
+    assert parsed_files[0]["xml_type"] == "fcsNotificationEF"
+    assert raw_size == len(_XML)
+    assert [file_id for file_id, _ in errors] == [2, 3]
+    assert quarantined == []
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["archive_file_id"] == 1
+    assert row["purchase_number"] == "0101200000119000001"
+    assert row["max_price"] == Decimal("1500.50")
+    assert row["publish_date"] == dt(2019, 1, 10, 7, 0)
+    assert row["region"] == "Adygeja_Resp"
+    assert row["archive_date"] == date(2019, 1, 1)
+    assert row["data"]["fcsNotificationEF"]["purchaseNumber"] == "0101200000119000001"
+
+
+def test_parse_batch_with_limits(tmp_path):
+    store = BlobStore(str(tmp_path))
+    key = store.put(_XML)
+    limits = util.XMLLimits(max_size=100, max_depth=200, max_elements=1000)
+
+    parsed_files, rows, _, errors, quarantined = _parse_batch(
+        FortyFourthLawNotifications, str(tmp_path), None, [(1, key, _ARCHIVE_FIELDS)], limits)
+
+    # a file above the limits is quarantined, it is not an error
+    assert (parsed_files, rows, errors) == ([], [], [])
+    assert [(file_id, limit) for file_id, limit, _ in quarantined] == [(1, "size")]
+
+
+class _ReplacingDB():
+    def __init__(self):
+        self.replaced = []
+
+    def replace_files_data(self, table, parsed_files, rows, quarantined=None):
+        self.replaced.append((parsed_files, rows, quarantined))
+
+
+class _StoredFilesDB():
+    """Stored files of two archives, only the first one has rows"""
+
+    def __init__(self):
+        self.files = [(1, "a", 10, "notification_Moskva_2019010100_2019020100_001.xml.zip"),
+                      (2, "b", 20, _ARCHIVE_NAME)]
+
+    def get_stored_files_batch(self, law_number, folder_name, last_id, limit):
+        return [file for file in self.files if file[0] > last_id][:limit]
+
+    def get_archive_fields(self, table, archive_ids):
+        fields = {10: {"region": "Moskovskaja_obl", "archive_date": date(2019, 3, 1)}}
+        return {archive_id: fields[archive_id] for archive_id in archive_ids if archive_id in fields}
+
+
+def test_read_batches():
+    batches = list(_read_batches(_StoredFilesDB(), FortyFourthLawNotifications._DATA_TABLE, "44", "notifications", 1))
+
+    # fields of archive are reused from its rows, they are taken from its name only if there are no rows
+    assert batches == [
+        [(1, "a", {"region": "Moskovskaja_obl", "archive_date": date(2019, 3, 1)})],
+        [(2, "b", _ARCHIVE_FIELDS)],
+    ]
+
+
+def test_parse_batch_without_data(tmp_path):
+    store = BlobStore(str(tmp_path))
+    # the only element of the file is skipped, so the file has no data
+    key = store.put(b"<export><signature>c2lnbmF0dXJl</signature></export>")
+
+    result = _parse_batch(FortyFourthLawNotifications, str(tmp_path), None, [(1, key, _ARCHIVE_FIELDS)])
+    db = _ReplacingDB()
+    progress = _Progress()
+    _write_batch(db, FortyFourthLawNotifications._DATA_TABLE, result, progress)
+
+    # the file is marked as parsed with the reason and has no rows
+    assert db.replaced == [([{"id": 1, "xml_type": "signature", "reason": NO_XML_DATA_REASON}], [], [])]
+    assert (progress.count, progress.error_count) == (1, 0)
+
+
+def test_write_batch_with_quarantined_files():
+    db = _ReplacingDB()
+    progress = _Progress()
+    _write_batch(db, FortyFourthLawNotifications._DATA_TABLE, ([], [], 0, [], [(1, "size", "too large")]), progress)
+
+    # old rows of the quarantined file are replaced too
+    assert db.replaced == [([], [], [(1, "size", "too large")])]
+    assert (progress.count, progress.error_count, progress.quarantined_count) == (0, 0, 1)